@@ -1,6 +1,6 @@
 import subprocess
 from autodocgenerator.config.env_config import env_config
-from autodocgenerator.manage import Manager
+from autodocgenerator.manage import Manager, AsyncManager
 from autodocgenerator.schema.cache_settings import CacheSettings, CheckGitStatusResultSchema
 from autodocgenerator.preprocessor.checker import have_to_change
 
@@ -52,9 +52,14 @@ def get_detailed_diff_stats(target_hash) -> list[dict[str, str]]:
 def get_git_revision_hash() -> str:
     return subprocess.check_output(['git', 'rev-parse', 'HEAD']).decode('ascii').strip()
 
-def check_git_status(manager: Manager) -> CheckGitStatusResultSchema:
+def need_full_remake(manager: Manager) -> bool:
     if env_config.github_event_name == "workflow_dispatch" or manager.cache_settings.last_commit == "":
         manager.cache_settings.last_commit = get_git_revision_hash()
+        return True
+    return False
+
+def check_git_status(manager: Manager) -> CheckGitStatusResultSchema:
+    if need_full_remake(manager):
         return CheckGitStatusResultSchema(need_to_remake=True, remake_gl_file=True)
 
     changes = get_detailed_diff_stats(manager.cache_settings.last_commit)
@@ -62,3 +67,12 @@ def check_git_status(manager: Manager) -> CheckGitStatusResultSchema:
     
     return result
 
+async def async_check_git_status(manager: AsyncManager) -> CheckGitStatusResultSchema:
+    if need_full_remake(manager):
+        return CheckGitStatusResultSchema(need_to_remake=True, remake_gl_file=True)
+
+    changes = get_detailed_diff_stats(manager.cache_settings.last_commit)
+    result = await manager.check_sense_changes(changes)
+
+    return result
+
@@ -1,6 +1,10 @@
 import yaml #type: ignore
 from autodocgenerator.factory.modules.general_modules import CustomModule, CustomModuleWithOutContext, BaseModule
 from ..config.config import Config, ProjectBuildConfig
+from ..preprocessor.admission import AdmissionSettings
+from ..engine.models.scheduler import SchedulerSettings
+from ..engine.models.router import RoutingSettings
+from ..engine.models.budget import OutputBudgetSettings
 from typing import Any
 
 
@@ -10,6 +14,11 @@ class StructureSettings:
     use_global_file = True
     max_doc_part_size = 5_000
     include_intro_text = True
+    use_structural_chunking = False
+    concurrent_doc_parts = False
+    concurrent_global_info = False
+    max_concurrency = 4
+    use_async_pipeline = False
 
     def load_settings(self, data: dict[str, Any]):
         for key, el in data.items():
@@ -30,7 +39,20 @@ def read_config(file_data: str) -> tuple[Config, list[BaseModule], StructureSett
     pcs = ProjectBuildConfig()
     pcs.load_settings(project_settings)
     
-    config.set_language(language).set_project_name(project_name).set_pcs(pcs)
+    admission_settings = AdmissionSettings()
+    admission_settings.load_settings(data.get("admission_settings", {}))
+
+    scheduler_settings = SchedulerSettings()
+    scheduler_settings.load_settings(data.get("scheduler_settings", {}))
+
+    model_routing = RoutingSettings()
+    model_routing.load_settings(data.get("model_routing", {}))
+
+    output_budget = OutputBudgetSettings()
+    output_budget.load_settings(data.get("output_budget", {}))
+
+    config.set_language(language).set_project_name(project_name).set_pcs(pcs).set_admission_settings(admission_settings)
+    config.set_scheduler_settings(scheduler_settings).set_model_routing(model_routing).set_output_budget(output_budget)
 
     for pattern in ignore_files:
         config.add_ignore_file(pattern)
@@ -1,16 +1,19 @@
 import sys
-from autodocgenerator.manage import Manager
+import asyncio
+from autodocgenerator.manage import Manager, AsyncManager
 from autodocgenerator.factory.base_factory import DocFactory
 from autodocgenerator.factory.modules.general_modules import CustomModule, CustomModuleWithOutContext
 from autodocgenerator.factory.modules.intro import IntroLinks, IntroText, BaseModule
 from autodocgenerator.ui.progress_base import ConsoleGtiHubProgress
 from autodocgenerator.auto_runner.config_reader import Config, read_config, StructureSettings
-from autodocgenerator.engine.models.gpt_model import GPTModel, AsyncGPTModel, GPT4oModel, Model
-from autodocgenerator.engine.models.azure_model import AzureModel
+from autodocgenerator.engine.models.gpt_model import GPTModel, AsyncGPTModel, GPT4oModel, AsyncGPT4oModel, Model, AsyncModel
+from autodocgenerator.engine.models.azure_model import AzureModel, AsyncAzureModel
+from autodocgenerator.engine.models.scheduler import RequestScheduler
+from autodocgenerator.engine.models.budget import OutputBudgetController
 
 from autodocgenerator.config.env_config import env_config
-from autodocgenerator.postprocessor.embedding import Embedding
-from autodocgenerator.auto_runner.check_git_status import check_git_status
+from autodocgenerator.postprocessor.embedding import Embedding, AsyncEmbedding
+from autodocgenerator.auto_runner.check_git_status import check_git_status, async_check_git_status
 from autodocgenerator.schema.cache_settings import CheckGitStatusResultSchema
 
 MODELS_CONFIG = {
@@ -19,13 +22,49 @@ MODELS_CONFIG = {
     "groq_cloud": GPTModel
 }
 
+ASYNC_MODELS_CONFIG = {
+    "git": AsyncGPT4oModel,
+    "azure": AsyncAzureModel,
+    "groq_cloud": AsyncGPTModel
+}
+
+def stop_early(manager: Manager):
+    manager.load_all_info()
+    manager.save()
+    if env_config.output_github_file:
+        with open(env_config.output_github_file, "a") as f:
+            f.write("skip_next=true\n")
+    print("Stopping workflow early")
+    sys.exit(0)
+
+def get_additionals_modules(structure_settings: StructureSettings) -> list[BaseModule]:
+    additionals_modules: list[BaseModule] = []
+
+    if structure_settings.include_intro_text:
+        additionals_modules.append(IntroText())
+
+    if structure_settings.include_intro_links:
+        additionals_modules.append(IntroLinks())
+
+    return additionals_modules
+
 def gen_doc(project_path: str, 
             config: Config, 
             custom_modules: list[BaseModule], 
             structure_settings: StructureSettings) -> str:
     
+    RequestScheduler().set_settings(config.scheduler_settings)
+    OutputBudgetController().set_settings(config.output_budget)
+
     sync_model: Model
-    sync_model = MODELS_CONFIG.get(env_config.type_of_model, GPT4oModel)(env_config.models_api_keys, use_random=False)
+    sync_model = MODELS_CONFIG.get(env_config.type_of_model, GPT4oModel)(env_config.models_api_keys, use_random=False,
+                                                                         base_url=env_config.models_base_url)
+
+    async_model: AsyncModel | None = None
+    use_async_model = structure_settings.concurrent_doc_parts or structure_settings.concurrent_global_info
+    if use_async_model and env_config.type_of_model in ASYNC_MODELS_CONFIG:
+        async_model = ASYNC_MODELS_CONFIG[env_config.type_of_model](env_config.models_api_keys, use_random=False,
+                                                                    base_url=env_config.models_base_url)
 
     embedding_model = Embedding(env_config.google_embedding_api_key)
     
@@ -36,61 +75,112 @@ def gen_doc(project_path: str,
         llm_model=sync_model,
         embedding_model=embedding_model,
         progress_bar=ConsoleGtiHubProgress(), 
+        async_llm_model=async_model,
     )
 
     change_info: CheckGitStatusResultSchema = check_git_status(manager)
     print(change_info)
 
     if not change_info.need_to_remake and not change_info.remake_gl_file:
-        manager.load_all_info()
-        manager.save()
-        if env_config.output_github_file:
-            with open(env_config.output_github_file, "a") as f:
-                f.write("skip_next=true\n")
-        print("Stopping workflow early")
-        sys.exit(0)
+        stop_early(manager)
         return manager.doc_info.doc.get_full_doc()
     
 
     
     manager.generate_code_file()
     if structure_settings.use_global_file:
-        manager.generate_global_info(compress_power=4, is_reusable=not change_info.remake_gl_file)
+        manager.generate_global_info(compress_power=4, is_reusable=not change_info.remake_gl_file,
+                                     concurrent=structure_settings.concurrent_global_info,
+                                     max_concurrency=structure_settings.max_concurrency)
     
-    manager.generete_doc_parts(max_symbols=structure_settings.max_doc_part_size, with_global_file=structure_settings.use_global_file)
+    manager.generete_doc_parts(max_symbols=structure_settings.max_doc_part_size, with_global_file=structure_settings.use_global_file,
+                               structural_chunking=structure_settings.use_structural_chunking,
+                               concurrent=structure_settings.concurrent_doc_parts,
+                               max_concurrency=structure_settings.max_concurrency)
    
 
     manager.factory_generate_doc(DocFactory(*custom_modules))
     if structure_settings.include_order:
         manager.order_doc()
     
-    additionals_modules: list[BaseModule] = []
-
-    if structure_settings.include_intro_text:
-        additionals_modules.append(IntroText())
-
-    if structure_settings.include_intro_links:
-        additionals_modules.append(IntroLinks())
-
-    
-    manager.factory_generate_doc(DocFactory(*additionals_modules, with_splited=False), to_start=True)
+    manager.factory_generate_doc(DocFactory(*get_additionals_modules(structure_settings), with_splited=False), to_start=True)
     manager.create_embedding_layer()
     manager.clear_cache()
 
     manager.save()
     return manager.doc_info.doc.get_full_doc()
 
+async def async_gen_doc(project_path: str, 
+                        config: Config, 
+                        custom_modules: list[BaseModule], 
+                        structure_settings: StructureSettings) -> str:
+    
+    RequestScheduler().set_settings(config.scheduler_settings)
+    OutputBudgetController().set_settings(config.output_budget)
+
+    async_model: AsyncModel
+    async_model = ASYNC_MODELS_CONFIG.get(env_config.type_of_model, AsyncGPT4oModel)(env_config.models_api_keys, use_random=False,
+                                                                                     base_url=env_config.models_base_url)
+
+    embedding_model = AsyncEmbedding(env_config.google_embedding_api_key)
+
+    manager = AsyncManager(
+        project_path, 
+        config=config,
+        llm_model=async_model,
+        embedding_model=embedding_model,
+        progress_bar=ConsoleGtiHubProgress(), 
+        max_concurrency=structure_settings.max_concurrency,
+    )
+
+    # stop_early leaves through sys.exit, the pooled async clients are closed on every way out
+    try:
+        change_info: CheckGitStatusResultSchema = await async_check_git_status(manager)
+        print(change_info)
+
+        if not change_info.need_to_remake and not change_info.remake_gl_file:
+            stop_early(manager)
+            return manager.doc_info.doc.get_full_doc()
+
+        await manager.generate_code_file()
+        if structure_settings.use_global_file:
+            await manager.generate_global_info(compress_power=4, is_reusable=not change_info.remake_gl_file)
+
+        await manager.generete_doc_parts(max_symbols=structure_settings.max_doc_part_size, with_global_file=structure_settings.use_global_file,
+                                         structural_chunking=structure_settings.use_structural_chunking)
+
+        await manager.factory_generate_doc(DocFactory(*custom_modules))
+        if structure_settings.include_order:
+            await manager.order_doc()
+
+        await manager.factory_generate_doc(DocFactory(*get_additionals_modules(structure_settings), with_splited=False), to_start=True)
+        await manager.create_embedding_layer()
+        manager.clear_cache()
+
+        manager.save()
+        return manager.doc_info.doc.get_full_doc()
+    finally:
+        await manager.close()
+
 if __name__ == "__main__":
     with open(r"autodocconfig.yml", "r", encoding="utf-8") as file:
         config_data = file.read()
     config, custom_modules, structure_settings = read_config(config_data)
 
-    output_doc = gen_doc(
-        r".",
-        config,
-        custom_modules,
-        structure_settings
-    )
+    if structure_settings.use_async_pipeline:
+        output_doc = asyncio.run(async_gen_doc(
+            r".",
+            config,
+            custom_modules,
+            structure_settings
+        ))
+    else:
+        output_doc = gen_doc(
+            r".",
+            config,
+            custom_modules,
+            structure_settings
+        )
 
     
 
@@ -1,4 +1,9 @@
 from ..preprocessor.settings import ProjectSettings
+from ..preprocessor.ignore_matcher import IgnoreMatcher
+from ..preprocessor.admission import AdmissionSettings
+from ..engine.models.scheduler import SchedulerSettings
+from ..engine.models.router import RoutingSettings
+from ..engine.models.budget import OutputBudgetSettings
 from typing import Any
 
 
@@ -6,6 +11,28 @@ class ProjectBuildConfig:
     save_logs = False
     log_level = -1
     threshold_changes = 20000
+    streaming_code_mix = False
+    use_snapshot_cache = False
+    read_workers = 1
+    use_doc_part_cache = False
+    doc_part_cache_size = 5000
+    use_response_cache = False
+    response_cache_size = 2000
+    response_cache_ttl = 7 * 24 * 3600
+    stream_answers = False
+    batch_small_prompts = False
+    max_batch_prompts = 4
+    max_batch_tokens = 6000
+    hedge_requests = False
+    hedge_percentile = 95
+    hedge_min_samples = 20
+    hedge_window = 200
+    prompt_token_budget = 0
+    incremental_global_info = False
+    adaptive_compression = False
+    global_info_target_tokens = 2000
+    max_compress_power = 8
+    max_compress_input_tokens = 0
     def load_settings(self, data: dict[str, Any]):
         for key, el in data.items():
             setattr(self, key, el)
@@ -21,6 +48,11 @@ class Config:
         self.project_name: str = ""
         self.project_additional_info: dict = {}
         self.pbc: ProjectBuildConfig = ProjectBuildConfig()
+        self.admission_settings: AdmissionSettings = AdmissionSettings()
+        self.scheduler_settings: SchedulerSettings = SchedulerSettings()
+        self.model_routing: RoutingSettings = RoutingSettings()
+        self.output_budget: OutputBudgetSettings = OutputBudgetSettings()
+        self._ignore_matcher: IgnoreMatcher | None = None
 
     def set_language(self, language: str):
         self.language = language
@@ -30,6 +62,22 @@ class Config:
         self.pbc = pcs
         return self
     
+    def set_admission_settings(self, admission_settings: AdmissionSettings):
+        self.admission_settings = admission_settings
+        return self
+
+    def set_scheduler_settings(self, scheduler_settings: SchedulerSettings):
+        self.scheduler_settings = scheduler_settings
+        return self
+
+    def set_model_routing(self, model_routing: RoutingSettings):
+        self.model_routing = model_routing
+        return self
+
+    def set_output_budget(self, output_budget: OutputBudgetSettings):
+        self.output_budget = output_budget
+        return self
+
     def set_project_name(self, name: str):
         self.project_name = name
         return self
@@ -40,7 +88,13 @@ class Config:
     
     def add_ignore_file(self, pattern: str):
         self.ignore_files.append(pattern)
+        self._ignore_matcher = None
         return self
+
+    def get_ignore_matcher(self) -> IgnoreMatcher:
+        if self._ignore_matcher is None:
+            self._ignore_matcher = IgnoreMatcher(self.ignore_files)
+        return self._ignore_matcher
     
     
     def get_project_settings(self):
@@ -6,6 +6,7 @@ class EnvConfig(BaseSettings):
     models_api_keys: str | List[str] = Field(..., alias="MODELS_API_KEYS")
     
     type_of_model: str = Field("git", alias="TYPE_OF_MODEL")
+    models_base_url: str | None = Field(None, alias="MODELS_BASE_URL")
     
     google_embedding_api_key: str = Field("", alias="GOOGLE_EMBEDDING_API_KEY")
     github_event_name: str = Field("", alias="GITHUB_EVENT_NAME")
@@ -172,11 +172,11 @@ Example: `true|false` (means update docs, but keep Global Info as is).
 
 def get_BASE_COMPRESS_TEXT(start, power):
     return f"""
-Task: Analyze the provided code snippet (~{start} chars) and generate a hyper-compressed Markdown architectural map.
+Task: Analyze the provided code snippet (~{start} tokens) and generate a hyper-compressed Markdown architectural map.
 Goal: Create a context baseline for other AI models so they understand the "big picture" and functional dependencies when looking at isolated parts of this code.
 
 Constraints:
-Strict Length: Maximum {int(start / power)} characters.
+Strict Length: Maximum {int(start / power)} tokens.
 Format: Pure Markdown. Use visual markers (arrows, lists) for flow.
 Tone: Technical, dense, no conversational filler.
 
@@ -206,3 +206,10 @@ Markdown
 """
 
 
+
+BASE_BATCH_PROMPT = """
+You will receive several independent tasks in one message. Each task starts with a line <<<TASK N>>> and has its own instructions and input.
+Solve every task separately, exactly as if it was the only task you received: follow its own instructions, language and output format, and do not mix information between tasks.
+Write the answer to task N between a line <<<ANSWER N>>> and a line <<<END ANSWER N>>>.
+Answer every task, keep the task order and write nothing outside of these blocks.
+"""
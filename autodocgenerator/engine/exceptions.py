@@ -3,4 +3,11 @@
 
 class ModelExhaustedException(Exception):
     """If in list of models no one model is available for use."""
-    ...
\ No newline at end of file
+    ...
+
+class OutputTruncatedException(Exception):
+    """The answer was cut by max_tokens, answer keeps the truncated text."""
+
+    def __init__(self, answer: str | None):
+        super().__init__("Answer was cut by max_tokens.")
+        self.answer = answer
@@ -1,88 +1,169 @@
 from .model import Model, AsyncModel,  History
-from ..exceptions import ModelExhaustedException
-from ...ui.logging import BaseLogger, InfoLog, ErrorLog, WarningLog
+from .gpt_model import GITHUB_MODELS_URL
+from .client_pool import ClientPool
 from azure.ai.inference import ChatCompletionsClient
-from azure.ai.inference.models import SystemMessage, UserMessage, ChatRequestMessage
+from azure.ai.inference.aio import ChatCompletionsClient as AsyncChatCompletionsClient
+from azure.ai.inference.models import SystemMessage, UserMessage, AssistantMessage
 from azure.core.credentials import AzureKeyCredential
+from azure.core.pipeline.transport import RequestsTransport
+import requests
 import re
+from typing import Any, Iterator, AsyncIterator
+
+
+def clean_deepseek_response(text: str | None) -> str | None:
+    """Удаляет блок <think>...</think> и лишние пробелы."""
+    if text is None:
+        return None
+    cleaned_text = re.sub(r'<think>.*?</think>', '', text, flags=re.DOTALL)
+    return cleaned_text.strip()
+
+
+def get_tag_prefix_length(text: str, tag: str) -> int:
+    """Length of the longest end of text that may be the beginning of tag."""
+    for length in range(min(len(tag) - 1, len(text)), 0, -1):
+        if text.endswith(tag[:length]):
+            return length
+    return 0
+
+
+class ThinkStripper:
+    """Streaming twin of clean_deepseek_response: text is given out only once it can not be part of a <think> block."""
+
+    def __init__(self):
+        self.buffer = ""
+        self.started = False
+
+    def feed(self, delta: str) -> str:
+        self.buffer += delta
+        while True:
+            start = self.buffer.find("<think>")
+            end = self.buffer.find("</think>", start) if start != -1 else -1
+            if end == -1:
+                break
+            self.buffer = self.buffer[:start] + self.buffer[end + len("</think>"):]
+
+        cut = self.buffer.find("<think>")
+        if cut == -1:
+            cut = len(self.buffer) - get_tag_prefix_length(self.buffer, "<think>")
+        # trailing whitespace waits, the answer may end right here
+        ready = self.buffer[:cut].rstrip()
+        self.buffer = self.buffer[len(ready):]
+        return self._start(ready)
+
+    def finish(self) -> str:
+        rest, self.buffer = self.buffer.rstrip(), ""
+        return self._start(rest)
+
+    def _start(self, text: str) -> str:
+        if not self.started:
+            text = text.lstrip()
+            self.started = bool(text)
+        return text
+
+
+def parse_prompt(data: list[dict[str, str]]) -> list[UserMessage | SystemMessage | AssistantMessage]:
+    result: list[UserMessage | SystemMessage | AssistantMessage] = []
+    for el in data:
+        if el["role"] == "system":
+            result.append(SystemMessage(el["content"]))
+            continue
+
+        if el["role"] == "user":
+            result.append(UserMessage(el["content"]))
+            continue
+
+        if el["role"] == "assistant":
+            result.append(AssistantMessage(el["content"]))
+            continue
+
+    return result
 
 
 class AzureModel(Model):
-    def __init__(self, api_key, history = History(), 
-                 models_list: list[str] = ["deepseek/DeepSeek-V3-0324"], 
-                 use_random: bool = True):
-        super().__init__(api_key, history, models_list, use_random)
-        self.client = ChatCompletionsClient(
-            endpoint="https://models.github.ai/inference",
-            credential=AzureKeyCredential(self.api_keys[self.current_key_index]),
+    sampling_params = {"temperature": 0.2, "top_p": 1.0, "max_tokens": 10000}
+    pool_provider = "azure"
+
+    def __init__(self, api_key, history: History | None = None,
+                 models_list: list[str] = ["deepseek/DeepSeek-V3-0324"],
+                 use_random: bool = True, base_url: str | None = None):
+        super().__init__(api_key, history, models_list, use_random, base_url)
+
+    def _create_client(self) -> ChatCompletionsClient:
+        pool = ClientPool()
+        api_key = self.api_keys[self.current_key_index]
+        session = pool.get_shared("requests:azure", requests.Session)
+        return pool.get(self._get_pool_provider(self.pool_provider), api_key, lambda: ChatCompletionsClient(
+            endpoint=self.base_url or GITHUB_MODELS_URL,
+            credential=AzureKeyCredential(api_key),
+            retry_total=0,
+            transport=RequestsTransport(session=session, session_owner=False),
+        ))
+
+    def _complete(self, messages: list[dict[str, str]], model_name: str, params: dict[str, Any] | None = None) -> str | None:
+        response = self.client.complete(
+            messages=parse_prompt(messages), #type: ignore
+            model=model_name,
+            **self.get_request_params(params),
         )
-        self.logger = BaseLogger()
-
-    def _clean_deepseek_response(self, text: str) -> str:
-        """Удаляет блок <think>...</think> и лишние пробелы."""
-        cleaned_text = re.sub(r'<think>.*?</think>', '', text, flags=re.DOTALL)
-        return cleaned_text.strip()
-
-    def _parse_prompt(self, data: list[dict[str, str]]) -> list[UserMessage | SystemMessage]:
-        result: list[UserMessage | SystemMessage] = []
-        for el in data:
-            if el["role"] == "system":
-                result.append(SystemMessage(el["content"]))
-                continue
-
-            if el["role"] == "user":
-                result.append(UserMessage(el["content"]))
-                continue
-
-        return result
-
-
-    def generate_answer(self, with_history: bool = True, prompt: list[dict[str, str]] |  None = None) -> str:
-        self.logger.log(InfoLog("Generating answer..."))
-        if with_history:
-            messages = self.history.history
-        elif prompt is not None:
-            messages = prompt
-        
-        chat_completion = None
-        model_name = None
-        
-        parse_messages: list[UserMessage | SystemMessage] = self._parse_prompt(messages)
-        while True:
-            if len(self.regen_models_name) <= 0:
-                self.logger.log(ErrorLog("No models available for use."))
-                raise ModelExhaustedException("No models available for use.")
-            
-            model_name = self.regen_models_name[self.current_model_index]
-            try:
-                response = self.client.complete(
-                    messages=parse_messages, #type: ignore
-                    temperature=0.2,
-                    top_p=1.0,
-                    max_tokens=10000,
-                    model=model_name
-                )
+        choice = response.choices[0]
+        return self._check_finish(choice.finish_reason, clean_deepseek_response(choice.message.content))
 
-                break
-            except Exception as e:
-                print(e)
-                self.logger.log(WarningLog(f"Model {model_name} failed with error: {str(e)}. Trying next model..."))
-                self.current_key_index = 0 if self.current_key_index + 1 >= len(self.api_keys) else self.current_key_index + 1
-                if self.current_key_index == 0:
-                    self.current_model_index = 0 if self.current_model_index + 1 >= len(self.regen_models_name) else self.current_model_index + 1
-                    
-                self.client = ChatCompletionsClient(
-                    endpoint="https://models.github.ai/inference",
-                    credential=AzureKeyCredential(self.api_keys[self.current_key_index]),
-                )
-
-
-
-
-        result = self._clean_deepseek_response(response.choices[0].message.content)
-        self.logger.log(InfoLog(f"Generated answer with model {model_name}."))
-        self.logger.log(InfoLog(f"Answer: {result}", level=2))
-        if result is None:
-            return ""
-        
-        return result
\ No newline at end of file
+    def _stream(self, messages: list[dict[str, str]], model_name: str, params: dict[str, Any] | None = None) -> Iterator[str]:
+        stream = self.client.complete(
+            messages=parse_prompt(messages), #type: ignore
+            model=model_name,
+            stream=True,
+            **self.get_request_params(params),
+        )
+        stripper = ThinkStripper()
+        for update in stream:
+            if update.choices:
+                yield stripper.feed(update.choices[0].delta.content or "")
+        yield stripper.finish()
+
+
+class AsyncAzureModel(AsyncModel):
+    sampling_params = {"temperature": 0.2, "top_p": 1.0, "max_tokens": 10000}
+    pool_provider = "azure"
+
+    def __init__(self, api_key, history: History | None = None,
+                 models_list: list[str] = ["deepseek/DeepSeek-V3-0324"],
+                 use_random: bool = True, base_url: str | None = None):
+        super().__init__(api_key, history, models_list, use_random, base_url)
+
+    def _create_client(self) -> AsyncChatCompletionsClient:
+        from azure.core.pipeline.transport import AioHttpTransport
+        import aiohttp
+
+        pool = ClientPool()
+        api_key = self.api_keys[self.current_key_index]
+        session = pool.get_async_shared("aiohttp:azure", aiohttp.ClientSession)
+        return pool.get_async(self._get_pool_provider(self.pool_provider), api_key, lambda: AsyncChatCompletionsClient(
+            endpoint=self.base_url or GITHUB_MODELS_URL,
+            credential=AzureKeyCredential(api_key),
+            retry_total=0,
+            transport=AioHttpTransport(session=session, session_owner=False),
+        ))
+
+    async def _complete(self, messages: list[dict[str, str]], model_name: str, params: dict[str, Any] | None = None) -> str | None:
+        response = await self.client.complete(
+            messages=parse_prompt(messages), #type: ignore
+            model=model_name,
+            **self.get_request_params(params),
+        )
+        choice = response.choices[0]
+        return self._check_finish(choice.finish_reason, clean_deepseek_response(choice.message.content))
+
+    async def _stream(self, messages: list[dict[str, str]], model_name: str, params: dict[str, Any] | None = None) -> AsyncIterator[str]:
+        stream = await self.client.complete(
+            messages=parse_prompt(messages), #type: ignore
+            model=model_name,
+            stream=True,
+            **self.get_request_params(params),
+        )
+        stripper = ThinkStripper()
+        async for update in stream:
+            if update.choices:
+                yield stripper.feed(update.choices[0].delta.content or "")
+        yield stripper.finish()
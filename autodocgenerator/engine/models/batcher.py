@@ -0,0 +1,117 @@
+import asyncio
+import re
+from .model import Model, AsyncModel, ParentModel
+from ..config.config import BASE_BATCH_PROMPT
+from ...ui.logging import BaseLogger, InfoLog, WarningLog
+
+
+class PromptBatcher:
+    """
+    Packs small independent prompts into one request (up to max_prompts prompts / max_tokens prompt tokens)
+    and splits the delimited answer back. Prompts whose answer can not be found are asked one by one.
+    """
+
+    def __init__(self, max_prompts: int = 4, max_tokens: int = 6000):
+        self.max_prompts = max(1, max_prompts)
+        self.max_tokens = max_tokens
+        self.logger = BaseLogger()
+        self.prompts = 0
+        self.calls = 0
+        self.fallbacks = 0
+
+    def pack(self, prompts: list[list[dict[str, str]]], model: ParentModel) -> list[list[int]]:
+        batches: list[list[int]] = []
+        current: list[int] = []
+        current_tokens = 0
+        for i, prompt in enumerate(prompts):
+            tokens = model.token_counter.count_messages(prompt)
+            if current and (len(current) >= self.max_prompts or current_tokens + tokens > self.max_tokens):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(i)
+            current_tokens += tokens
+
+        if current:
+            batches.append(current)
+        return batches
+
+    @staticmethod
+    def get_batch_prompt(prompts: list[list[dict[str, str]]]) -> list[dict[str, str]]:
+        tasks = []
+        for i, prompt in enumerate(prompts, start=1):
+            messages = "\n\n".join(f"{el['role']}: {el['content']}" for el in prompt)
+            tasks.append(f"<<<TASK {i}>>>\n{messages}")
+
+        return [
+            {
+                "role": "system",
+                "content": BASE_BATCH_PROMPT
+            },
+            {
+                "role": "user",
+                "content": "\n\n".join(tasks)
+            }
+        ]
+
+    @staticmethod
+    def parse_answers(answer: str, count: int) -> list[str | None]:
+        result: list[str | None] = []
+        for i in range(1, count + 1):
+            match = re.search(rf"<<<ANSWER {i}>>>\s*(.*?)\s*<<<END ANSWER {i}>>>", answer, flags=re.DOTALL)
+            result.append(match.group(1) if match is not None and match.group(1) else None)
+        return result
+
+    def _split(self, batch: list[int], answer: str) -> list[str | None]:
+        answers = self.parse_answers(answer, len(batch))
+        missing = sum(1 for el in answers if el is None)
+        if missing:
+            self.logger.log(WarningLog(f"Batched answer misses {missing} of {len(batch)} answers, asking them one by one."))
+            self.fallbacks += missing
+        return answers
+
+    def ask_many(self, prompts: list[list[dict[str, str]]], model: Model, task: str | None = None) -> list[str]:
+        results: list[str] = [""] * len(prompts)
+        for batch in self.pack(prompts, model):
+            self.prompts += len(batch)
+            self.calls += 1
+            if len(batch) == 1:
+                results[batch[0]] = model.get_answer_without_history(prompts[batch[0]], task)
+                continue
+
+            answer = model.get_answer_without_history(self.get_batch_prompt([prompts[i] for i in batch]), task)
+            for i, el in zip(batch, self._split(batch, answer)):
+                if el is None:
+                    self.calls += 1
+                    el = model.get_answer_without_history(prompts[i], task)
+                results[i] = el
+        return results
+
+    async def async_ask_many(self, prompts: list[list[dict[str, str]]], model: AsyncModel, task: str | None = None) -> list[str]:
+        results: list[str] = [""] * len(prompts)
+
+        async def run_single(i: int):
+            self.calls += 1
+            results[i] = await model.get_answer_without_history(prompts[i], task)
+
+        async def run_batch(batch: list[int]):
+            self.prompts += len(batch)
+            if len(batch) == 1:
+                await run_single(batch[0])
+                return
+
+            self.calls += 1
+            answer = await model.get_answer_without_history(self.get_batch_prompt([prompts[i] for i in batch]), task)
+            missing = []
+            for i, el in zip(batch, self._split(batch, answer)):
+                if el is None:
+                    missing.append(i)
+                else:
+                    results[i] = el
+            await asyncio.gather(*[run_single(i) for i in missing])
+
+        await asyncio.gather(*[run_batch(batch) for batch in self.pack(prompts, model)])
+        return results
+
+    def log_stats(self):
+        self.logger.log(InfoLog(f"Prompt batcher: {self.prompts} prompts answered with {self.calls} requests "
+                                f"({self.fallbacks} asked again one by one)."))
@@ -0,0 +1,119 @@
+import threading
+from typing import Any
+from ...ui.logging import BaseLogger, InfoLog
+
+DEFAULT_MAX_OUTPUT_TOKENS = 16384
+
+
+class OutputBudgetSettings:
+    """
+    budgets: task -> [base, ratio], the output budget of a request is base + ratio * prompt tokens,
+    capped by the max_tokens of the model (max_output_tokens for models without one).
+    stop_sequences: task -> stop sequences sent with the request.
+    """
+    enabled = False
+    budgets: dict[str, list[float]] = {
+        "classify": [64, 0],
+        "order": [128, 1.0],
+        "compress": [256, 0.5],
+        "document": [1024, 1.0],
+        "intro": [1024, 0.25],
+    }
+    stop_sequences: dict[str, list[str]] = {
+        "classify": ["\n\n"],
+        "order": ["\n\n"],
+    }
+    growth = 2.0
+    max_output_tokens = DEFAULT_MAX_OUTPUT_TOKENS
+
+    def load_settings(self, data: dict[str, Any]):
+        for key, el in data.items():
+            setattr(self, key, el)
+
+
+class BudgetStats:
+    def __init__(self):
+        self.requests = 0
+        self.reserved = 0
+        self.released = 0
+        self.truncated = 0
+
+    def format(self) -> str:
+        return (f"{self.requests} budgeted requests reserved {self.reserved} output tokens "
+                f"({self.released} less than the model maximum), {self.truncated} truncated answers asked again")
+
+
+class OutputBudgetController:
+    """
+    Picks max_tokens and stop sequences of a request from its task and its prompt size. A model whose answer
+    was cut by max_tokens (finish reason "length") asks grow for a larger budget and sends the request again,
+    until the model maximum is reached. Disabled, it adds nothing to the requests.
+    """
+
+    def __new__(cls):
+        if not hasattr(cls, 'instance'):
+            cls.instance = super(OutputBudgetController, cls).__new__(cls)
+            cls.instance._init_controller()
+        return cls.instance
+
+    def _init_controller(self):
+        self._lock = threading.Lock()
+        self.logger = BaseLogger()
+        self.set_settings(OutputBudgetSettings())
+
+    def set_settings(self, settings: OutputBudgetSettings):
+        with self._lock:
+            self.settings = settings
+            self.stats = BudgetStats()
+
+    def get_limit(self, sampling_params: dict[str, Any]) -> int:
+        return int(sampling_params.get("max_tokens") or self.settings.max_output_tokens)
+
+    def make_params(self, task: str | None, prompt_tokens: int, sampling_params: dict[str, Any]) -> dict[str, Any]:
+        """Same params as get_params without counting a request, for cache keys."""
+        if not self.settings.enabled or task is None:
+            return {}
+
+        params: dict[str, Any] = {}
+        stop = self.settings.stop_sequences.get(task)
+        if stop:
+            params["stop"] = stop
+
+        if task in self.settings.budgets:
+            base, ratio = self.settings.budgets[task]
+            params["max_tokens"] = max(1, min(self.get_limit(sampling_params), int(base + ratio * prompt_tokens)))
+        return params
+
+    def get_params(self, task: str | None, prompt_tokens: int, sampling_params: dict[str, Any]) -> dict[str, Any]:
+        params = self.make_params(task, prompt_tokens, sampling_params)
+        if "max_tokens" in params:
+            limit = self.get_limit(sampling_params)
+            with self._lock:
+                self.stats.requests += 1
+                self.stats.reserved += params["max_tokens"]
+                self.stats.released += limit - params["max_tokens"]
+        return params
+
+    def get_stream_params(self, task: str | None) -> dict[str, Any]:
+        """Streamed text can not be taken back, so streams keep the model max_tokens and only get stop sequences."""
+        if not self.settings.enabled or task is None:
+            return {}
+        stop = self.settings.stop_sequences.get(task)
+        return {"stop": stop} if stop else {}
+
+    def grow(self, params: dict[str, Any], sampling_params: dict[str, Any]) -> dict[str, Any] | None:
+        """Params for the next try of a truncated request, None if the budget can not grow."""
+        limit = self.get_limit(sampling_params)
+        if not self.settings.enabled or "max_tokens" not in params or params["max_tokens"] >= limit:
+            return None
+
+        max_tokens = min(limit, max(params["max_tokens"] + 1, int(params["max_tokens"] * self.settings.growth)))
+        with self._lock:
+            self.stats.truncated += 1
+            self.stats.reserved += max_tokens
+        self.logger.log(InfoLog(f"Answer was cut at {params['max_tokens']} tokens, asking again with {max_tokens}."))
+        return {**params, "max_tokens": max_tokens}
+
+    def log_stats(self):
+        if self.settings.enabled:
+            self.logger.log(InfoLog(f"Output budget: {self.stats.format()}"))
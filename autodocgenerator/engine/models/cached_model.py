@@ -0,0 +1,155 @@
+import hashlib
+import json
+import time
+from typing import Any, Iterator, AsyncIterator
+from .model import Model, AsyncModel, ParentModel
+from ...preprocessor.lru_store import LRUStore
+from ...ui.logging import BaseLogger, InfoLog
+
+
+class ResponseCache(LRUStore):
+    """
+    Persistent cache of get_answer_without_history answers, evicted by LRU (max_entries) and by age (ttl seconds).
+    The key is a hash of the canonical messages, the model list, the sampling parameters and the output budget
+    of the request, so an answer cut by a small max_tokens is not given to a request with a larger one.
+    """
+
+    FILE_NAME = "response_cache.json"
+
+    def __init__(self, file_path: str, max_entries: int = 2000, ttl: float = 7 * 24 * 3600):
+        self.ttl = ttl
+        self.expired = 0
+        super().__init__(file_path, max_entries)
+        for key in [key for key, value in self.entries.items() if self._is_expired(value)]:
+            del self.entries[key]
+            self.expired += 1
+
+    @staticmethod
+    def make_key(prompt: list[dict[str, str]], model: ParentModel, task: str | None = None, stream: bool = False) -> str:
+        """Model names are sorted: the rotation order (and the model that answered) does not matter."""
+        if stream:
+            budget = model.output_budget.get_stream_params(task)
+        else:
+            budget = model.output_budget.make_params(task, model.token_counter.count_messages(prompt), model.sampling_params)
+        data = {
+            "messages": [{"role": el["role"], "content": el["content"]} for el in prompt],
+            "models": sorted(model.get_models_for_task(task)),
+            "sampling": {**model.sampling_params, **budget},
+        }
+        return hashlib.sha256(json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+    def _is_expired(self, value: str) -> bool:
+        return self.ttl > 0 and time.time() - json.loads(value)[0] > self.ttl
+
+    def get_answer(self, key: str) -> str | None:
+        value = self.get(key)
+        if value is None:
+            return None
+        if self._is_expired(value):
+            with self._lock:
+                self.entries.pop(key, None)
+                self.hits -= 1
+                self.misses += 1
+                self.expired += 1
+            return None
+        return json.loads(value)[1]
+
+    def put_answer(self, key: str, answer: str):
+        self.put(key, json.dumps([int(time.time()), answer], ensure_ascii=False))
+
+    def log_stats(self):
+        BaseLogger().log(InfoLog(f"Response cache: {self.hits} hits, {self.misses} misses, {self.evictions} evicted, "
+                                 f"{self.expired} expired, {len(self)} entries stored."))
+
+
+class CachedModel(Model):
+    """
+    Wraps a model and answers get_answer_without_history from a ResponseCache, a hit does not touch the network.
+    Everything else (history, rotation state, token counter) is the wrapped model's.
+    """
+
+    def __init__(self, model: Model, cache: ResponseCache):
+        self.model = model
+        self.cache = cache
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.model, name)
+
+    @property
+    def sampling_params(self) -> dict[str, Any]:  # type: ignore
+        return self.model.sampling_params
+
+    def generate_answer(self, with_history: bool = True, prompt: list[dict[str, str]] | None = None,
+                        task: str | None = None) -> str:
+        return self.model.generate_answer(with_history, prompt, task)
+
+    def get_answer_without_history(self, prompt: list[dict[str, str]], task: str | None = None) -> str:
+        key = self.cache.make_key(prompt, self.model, task)
+        answer = self.cache.get_answer(key)
+        if answer is None:
+            answer = self.model.get_answer_without_history(prompt, task)
+            if answer:
+                self.cache.put_answer(key, answer)
+        return answer
+
+    def stream_answer_without_history(self, prompt: list[dict[str, str]], task: str | None = None) -> Iterator[str]:
+        key = self.cache.make_key(prompt, self.model, task, stream=True)
+        answer = self.cache.get_answer(key)
+        if answer is not None:
+            yield answer
+            return
+
+        result = []
+        for delta in self.model.stream_answer_without_history(prompt, task):
+            result.append(delta)
+            yield delta
+        if result:
+            self.cache.put_answer(key, "".join(result))
+
+    def get_answer(self, prompt: str) -> str:
+        return self.model.get_answer(prompt)
+
+
+class AsyncCachedModel(AsyncModel):
+    """Async twin of CachedModel."""
+
+    def __init__(self, model: AsyncModel, cache: ResponseCache):
+        self.model = model
+        self.cache = cache
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.model, name)
+
+    @property
+    def sampling_params(self) -> dict[str, Any]:  # type: ignore
+        return self.model.sampling_params
+
+    async def generate_answer(self, with_history: bool = True, prompt: list[dict[str, str]] | None = None,
+                              task: str | None = None) -> str:
+        return await self.model.generate_answer(with_history, prompt, task)
+
+    async def get_answer_without_history(self, prompt: list[dict[str, str]], task: str | None = None) -> str:
+        key = self.cache.make_key(prompt, self.model, task)
+        answer = self.cache.get_answer(key)
+        if answer is None:
+            answer = await self.model.get_answer_without_history(prompt, task)
+            if answer:
+                self.cache.put_answer(key, answer)
+        return answer
+
+    async def stream_answer_without_history(self, prompt: list[dict[str, str]], task: str | None = None) -> AsyncIterator[str]:
+        key = self.cache.make_key(prompt, self.model, task, stream=True)
+        answer = self.cache.get_answer(key)
+        if answer is not None:
+            yield answer
+            return
+
+        result = []
+        async for delta in self.model.stream_answer_without_history(prompt, task):
+            result.append(delta)
+            yield delta
+        if result:
+            self.cache.put_answer(key, "".join(result))
+
+    async def get_answer(self, prompt: str) -> str:
+        return await self.model.get_answer(prompt)
@@ -0,0 +1,212 @@
+import asyncio
+import inspect
+import threading
+from typing import Any, Callable
+import httpx
+from ...ui.logging import BaseLogger, InfoLog, WarningLog
+
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30)
+HTTP_TIMEOUT = httpx.Timeout(600, connect=10)
+
+
+class PoolStats:
+    """
+    requests counts the model requests of the provider, client_reuses those served by a client the pool
+    already had. Connections are traced for the httpx based providers only.
+    """
+
+    def __init__(self):
+        self.clients_created = 0
+        self.client_reuses = 0
+        self.requests = 0
+        self.new_connections = 0
+        self.traced = False
+
+    @property
+    def connection_reuses(self) -> int:
+        return max(0, self.requests - self.new_connections)
+
+    def format(self) -> str:
+        text = f"clients created {self.clients_created}, reused {self.client_reuses}; requests {self.requests}"
+        if not self.traced:
+            return text
+        return f"{text}, new connections {self.new_connections}, reused connections {self.connection_reuses}"
+
+
+async def close_resource(resource: Any):
+    """Closes an async client or session, whichever of aclose / close it has."""
+    close = getattr(resource, "aclose", None) or getattr(resource, "close", None)
+    if close is None:
+        return
+    result = close()
+    if inspect.isawaitable(result):
+        await result
+
+
+async def close_async_clients_after(coro: Any) -> Any:
+    """Awaits coro, then closes the async clients of the pool bound to the running loop, before asyncio.run ends it."""
+    try:
+        return await coro
+    finally:
+        await ClientPool().aclose_async()
+
+
+class ClientPool:
+    """
+    One backend client per (provider, api key), created on first use and kept for the whole process,
+    so rotating keys and models does not throw away connections. All clients of a provider share one
+    keep-alive http connection pool. Async clients are bound to the event loop they were created in,
+    aclose_async closes them before that loop ends. Clients left from an ended loop are closed and
+    recreated when a new loop (a new asyncio.run) uses them.
+    """
+
+    def __new__(cls):
+        if not hasattr(cls, 'instance'):
+            cls.instance = super(ClientPool, cls).__new__(cls)
+            cls.instance._init_pool()
+        return cls.instance
+
+    def _init_pool(self):
+        self._lock = threading.Lock()
+        self._clients: dict[tuple[str, str], Any] = {}
+        self._async_clients: dict[tuple[str, str], tuple[asyncio.AbstractEventLoop, Any]] = {}
+        self._shared: dict[str, Any] = {}
+        self._async_shared: dict[str, tuple[asyncio.AbstractEventLoop, Any]] = {}
+        self.stats: dict[str, PoolStats] = {}
+
+    def get_stats(self, provider: str) -> PoolStats:
+        if provider not in self.stats:
+            self.stats[provider] = PoolStats()
+        return self.stats[provider]
+
+    def _trace(self, provider: str) -> Callable[[str, dict], None]:
+        stats = self.get_stats(provider)
+        stats.traced = True
+
+        def trace(event_name: str, info: dict):
+            if event_name == "connection.connect_tcp.complete":
+                stats.new_connections += 1
+        return trace
+
+    def _async_trace(self, provider: str):
+        trace = self._trace(provider)
+
+        async def async_trace(event_name: str, info: dict):
+            trace(event_name, info)
+        return async_trace
+
+    def get_shared(self, name: str, factory: Callable[[], Any]) -> Any:
+        """Process wide resource (http client, session) shared by every client of a provider."""
+        with self._lock:
+            if name not in self._shared:
+                self._shared[name] = factory()
+            return self._shared[name]
+
+    def get_async_shared(self, name: str, factory: Callable[[], Any]) -> Any:
+        """Same as get_shared, but one resource per event loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            stale = self._async_shared.get(name)
+            if stale is None or stale[0] is not loop:
+                self._async_shared[name] = (loop, factory())
+            resource = self._async_shared[name][1]
+        if stale is not None and stale[0] is not loop:
+            self._close_stale(stale[0], stale[1])
+        return resource
+
+    def _close_stale(self, loop: asyncio.AbstractEventLoop, resource: Any):
+        """
+        Closes a resource of another event loop. A running loop closes it itself, the connections of an ended
+        loop can not be closed any more, the resource is only marked closed so it does not warn when collected.
+        """
+        if loop.is_running():
+            asyncio.run_coroutine_threadsafe(close_resource(resource), loop)
+            return
+        task = asyncio.ensure_future(close_resource(resource))
+        task.add_done_callback(lambda el: el.cancelled() or el.exception())
+
+    async def aclose_async(self):
+        """Closes every async client and shared resource bound to the running loop, call it before the loop ends."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = [el for el_loop, el in self._async_clients.values() if el_loop is loop]
+            shared = [el for el_loop, el in self._async_shared.values() if el_loop is loop]
+            self._async_clients = {key: el for key, el in self._async_clients.items() if el[0] is not loop}
+            self._async_shared = {key: el for key, el in self._async_shared.items() if el[0] is not loop}
+
+        # api clients first, they may still hold requests of the shared http clients and sessions
+        for resource in clients + shared:
+            try:
+                await close_resource(resource)
+            except Exception as e:
+                BaseLogger().log(WarningLog(f"Could not close {type(resource).__name__}: {e}"))
+
+    def get_http_client(self, provider: str) -> httpx.Client:
+        trace = self._trace(provider)
+
+        def on_request(request: httpx.Request):
+            request.extensions["trace"] = trace
+
+        return self.get_shared(f"httpx:{provider}", lambda: httpx.Client(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT,
+                                                                          event_hooks={"request": [on_request]}))
+
+    def get_async_http_client(self, provider: str) -> httpx.AsyncClient:
+        trace = self._async_trace(provider)
+
+        async def on_request(request: httpx.Request):
+            request.extensions["trace"] = trace
+
+        return self.get_async_shared(f"httpx:{provider}", lambda: httpx.AsyncClient(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT,
+                                                                                     event_hooks={"request": [on_request]}))
+
+    def count_request(self, provider: str, api_key: str, loop: asyncio.AbstractEventLoop | None = None):
+        """
+        Called by a model once per request, before it takes its client: a reuse when the client of the api key
+        (of the event loop loop, for async clients) is already in the pool.
+        """
+        key = (provider, api_key)
+        with self._lock:
+            stats = self.get_stats(provider)
+            stats.requests += 1
+            if loop is None:
+                reused = key in self._clients
+            else:
+                reused = key in self._async_clients and self._async_clients[key][0] is loop
+            if reused:
+                stats.client_reuses += 1
+
+    def get(self, provider: str, api_key: str, factory: Callable[[], Any]) -> Any:
+        key = (provider, api_key)
+        with self._lock:
+            if key in self._clients:
+                return self._clients[key]
+
+        client = factory()
+        with self._lock:
+            if key in self._clients:
+                return self._clients[key]
+            self._clients[key] = client
+            self.get_stats(provider).clients_created += 1
+        return client
+
+    def get_async(self, provider: str, api_key: str, factory: Callable[[], Any]) -> Any:
+        """Must be called inside a running event loop."""
+        key = (provider, api_key)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if key in self._async_clients and self._async_clients[key][0] is loop:
+                return self._async_clients[key][1]
+
+        client = factory()
+        with self._lock:
+            stale = self._async_clients.get(key)
+            self._async_clients[key] = (loop, client)
+            self.get_stats(provider).clients_created += 1
+        if stale is not None and stale[0] is not loop:
+            self._close_stale(stale[0], stale[1])
+        return client
+
+    def log_stats(self):
+        logger = BaseLogger()
+        for provider, stats in self.stats.items():
+            logger.log(InfoLog(f"Client pool {provider}: {stats.format()}"))
@@ -1,182 +1,165 @@
 from .model import Model, AsyncModel, History
 from groq import Groq, AsyncGroq
-from ..exceptions import ModelExhaustedException
-from ...ui.logging import BaseLogger, InfoLog, ErrorLog, WarningLog
 from openai import OpenAI, AsyncOpenAI
+from .client_pool import ClientPool
+from typing import Any, Iterator, AsyncIterator
+
+GITHUB_MODELS_URL = "https://models.github.ai/inference"
 
 
 class AsyncGPTModel(AsyncModel):
-    ...
+    pool_provider = "groq"
+
+    def __init__(self, api_key, history: History | None = None,
+                 models_list: list[str] = ["openai/gpt-oss-120b",  "llama-3.3-70b-versatile",  "openai/gpt-oss-safeguard-20b"],
+                 use_random: bool = True, base_url: str | None = None):
+        super().__init__(api_key, history, models_list, use_random, base_url)
+
+    def _create_client(self) -> AsyncGroq:
+        pool = ClientPool()
+        api_key = self.api_keys[self.current_key_index]
+        return pool.get_async(self._get_pool_provider(self.pool_provider), api_key, lambda: AsyncGroq(
+            api_key=api_key,
+            base_url=self.base_url,
+            max_retries=0,
+            http_client=pool.get_async_http_client(self._get_pool_provider(self.pool_provider)),
+        ))
+
+    async def _complete(self, messages: list[dict[str, str]], model_name: str, params: dict[str, Any] | None = None) -> str | None:
+        chat_completion = await self.client.chat.completions.create(
+            messages=messages, #type: ignore
+            model=model_name,
+            **self.get_request_params(params),
+        )
+        choice = chat_completion.choices[0]
+        return self._check_finish(choice.finish_reason, choice.message.content)
+
+    async def _stream(self, messages: list[dict[str, str]], model_name: str, params: dict[str, Any] | None = None) -> AsyncIterator[str]:
+        stream = await self.client.chat.completions.create(
+            messages=messages, #type: ignore
+            model=model_name,
+            stream=True,
+            **self.get_request_params(params),
+        )
+        async for chunk in stream:
+            if chunk.choices:
+                yield chunk.choices[0].delta.content or ""
+
 
 class AsyncGPT4oModel(AsyncModel):
-    def __init__(self, api_key, history = History(), 
-                 models_list: list[str] = ["openai/gpt-4o", "openai/gpt-4.1", "openai/gpt-5"], 
-                 use_random: bool = True):
-        
-        super().__init__(api_key, history, models_list, use_random)
-
-        self.client = AsyncOpenAI(
-            base_url="https://models.github.ai/inference",
-            api_key=self.api_keys[self.current_key_index],
+    sampling_params = {"temperature": 0.3, "top_p": 1.0, "max_tokens": 16384}
+    pool_provider = "github_models"
+
+    def __init__(self, api_key, history: History | None = None,
+                 models_list: list[str] = ["openai/gpt-4o", "openai/gpt-4.1", "openai/gpt-5"],
+                 use_random: bool = True, base_url: str | None = None):
+        super().__init__(api_key, history, models_list, use_random, base_url)
+
+    def _create_client(self) -> AsyncOpenAI:
+        pool = ClientPool()
+        api_key = self.api_keys[self.current_key_index]
+        return pool.get_async(self._get_pool_provider(self.pool_provider), api_key, lambda: AsyncOpenAI(
+            base_url=self.base_url or GITHUB_MODELS_URL,
+            api_key=api_key,
+            max_retries=0,
+            http_client=pool.get_async_http_client(self._get_pool_provider(self.pool_provider)),
+        ))
+
+    async def _complete(self, messages: list[dict[str, str]], model_name: str, params: dict[str, Any] | None = None) -> str | None:
+        chat_completion = await self.client.chat.completions.create(
+            messages=messages, #type: ignore
+            model=model_name,
+            **self.get_request_params(params),
+        )
+        choice = chat_completion.choices[0]
+        return self._check_finish(choice.finish_reason, choice.message.content)
+
+    async def _stream(self, messages: list[dict[str, str]], model_name: str, params: dict[str, Any] | None = None) -> AsyncIterator[str]:
+        stream = await self.client.chat.completions.create(
+            messages=messages, #type: ignore
+            model=model_name,
+            stream=True,
+            **self.get_request_params(params),
         )
-        self.logger = BaseLogger()
-
-    async def generate_answer(self, with_history: bool = True, prompt: list[dict[str, str]] |  None = None) -> str:
-        self.logger.log(InfoLog("Generating answer..."))
-        if with_history:
-            messages = self.history.history
-        elif prompt is not None:
-            messages = prompt
-        
-        chat_completion = None
-        model_name = None
-
-        while True:
-            if len(self.regen_models_name) <= 0:
-                self.logger.log(ErrorLog("No models available for use."))
-                raise ModelExhaustedException("No models available for use.")
-            
-            model_name = self.regen_models_name[self.current_model_index]
-            try:
-                chat_completion = await self.client.chat.completions.create(
-                    messages=messages, #type: ignore
-                    temperature=0.3,
-                    top_p=1.0,
-                    max_tokens=16384,
-                    model=model_name
-                )
-                break
-            except Exception as e:
-                print(e)
-                self.logger.log(WarningLog(f"Model {model_name} failed with error: {str(e)}. Trying next model..."))
-                self.current_key_index = 0 if self.current_key_index + 1 >= len(self.api_keys) else self.current_key_index + 1
-                if self.current_key_index == 0:
-                    self.current_model_index = 0 if self.current_model_index + 1 >= len(self.regen_models_name) else self.current_model_index + 1
-                    
-                self.client = AsyncOpenAI(
-                    base_url="https://models.github.ai/inference",
-                    api_key=self.api_keys[self.current_key_index],
-                )
-
-
-
-        result = chat_completion.choices[0].message.content
-        self.logger.log(InfoLog(f"Generated answer with model {model_name}."))
-        self.logger.log(InfoLog(f"Answer: {result}", level=2))
-        if result is None:
-            return ""
-        
-        return result
+        async for chunk in stream:
+            if chunk.choices:
+                yield chunk.choices[0].delta.content or ""
 
 
 class GPT4oModel(Model):
-    def __init__(self, api_key, history = History(), 
-                 models_list: list[str] = ["openai/gpt-4o", "openai/gpt-4.1", "openai/gpt-5"], 
-                 use_random: bool = True):
-        super().__init__(api_key, history, models_list, use_random)
-
-        self.client = OpenAI(
-            base_url="https://models.github.ai/inference",
-            api_key=self.api_keys[self.current_key_index],
+    sampling_params = {"temperature": 0.3, "top_p": 1.0, "max_tokens": 16384}
+    pool_provider = "github_models"
+
+    def __init__(self, api_key, history: History | None = None,
+                 models_list: list[str] = ["openai/gpt-4o", "openai/gpt-4.1", "openai/gpt-5"],
+                 use_random: bool = True, base_url: str | None = None):
+        super().__init__(api_key, history, models_list, use_random, base_url)
+
+    def _create_client(self) -> OpenAI:
+        pool = ClientPool()
+        api_key = self.api_keys[self.current_key_index]
+        return pool.get(self._get_pool_provider(self.pool_provider), api_key, lambda: OpenAI(
+            base_url=self.base_url or GITHUB_MODELS_URL,
+            api_key=api_key,
+            max_retries=0,
+            http_client=pool.get_http_client(self._get_pool_provider(self.pool_provider)),
+        ))
+
+    def _complete(self, messages: list[dict[str, str]], model_name: str, params: dict[str, Any] | None = None) -> str | None:
+        chat_completion = self.client.chat.completions.create(
+            messages=messages, #type: ignore
+            model=model_name,
+            **self.get_request_params(params),
         )
-        self.logger = BaseLogger()
-
-
-    def generate_answer(self, with_history: bool = True, prompt: list[dict[str, str]] |  None = None) -> str:
-        self.logger.log(InfoLog("Generating answer..."))
-        if with_history:
-            messages = self.history.history
-        elif prompt is not None:
-            messages = prompt
-        
-        chat_completion = None
-        model_name = None
-
-        while True:
-            if len(self.regen_models_name) <= 0:
-                self.logger.log(ErrorLog("No models available for use."))
-                raise ModelExhaustedException("No models available for use.")
-            
-            model_name = self.regen_models_name[self.current_model_index]
-            try:
-                chat_completion = self.client.chat.completions.create(
-                    messages=messages, #type: ignore
-                    temperature=0.3,
-                    top_p=1.0,
-                    max_tokens=16384,
-                    model=model_name
-                )
-                break
-            except Exception as e:
-                print(e)
-                self.logger.log(WarningLog(f"Model {model_name} failed with error: {str(e)}. Trying next model..."))
-                self.current_key_index = 0 if self.current_key_index + 1 >= len(self.api_keys) else self.current_key_index + 1
-                if self.current_key_index == 0:
-                    self.current_model_index = 0 if self.current_model_index + 1 >= len(self.regen_models_name) else self.current_model_index + 1
-                    
-                self.client = OpenAI(
-                    base_url="https://models.github.ai/inference",
-                    api_key=self.api_keys[self.current_key_index],
-                )
-
-
-
-        result = chat_completion.choices[0].message.content
-        self.logger.log(InfoLog(f"Generated answer with model {model_name}."))
-        self.logger.log(InfoLog(f"Answer: {result}", level=2))
-        if result is None:
-            return ""
-        
-        return result
+        choice = chat_completion.choices[0]
+        return self._check_finish(choice.finish_reason, choice.message.content)
+
+    def _stream(self, messages: list[dict[str, str]], model_name: str, params: dict[str, Any] | None = None) -> Iterator[str]:
+        stream = self.client.chat.completions.create(
+            messages=messages, #type: ignore
+            model=model_name,
+            stream=True,
+            **self.get_request_params(params),
+        )
+        for chunk in stream:
+            if chunk.choices:
+                yield chunk.choices[0].delta.content or ""
+
 
 class GPTModel(Model):
-    def __init__(self, api_key, history = History(), 
-                 models_list: list[str] = ["openai/gpt-oss-120b",  "llama-3.3-70b-versatile",  "openai/gpt-oss-safeguard-20b"], 
-                 use_random: bool = True):
-        super().__init__(api_key, history, models_list, use_random)
-        self.client = Groq(api_key=self.api_keys[self.current_key_index])
-        self.logger = BaseLogger()
-
-
-    def generate_answer(self, with_history: bool = True, prompt: list[dict[str, str]] |  None = None) -> str:
-        self.logger.log(InfoLog("Generating answer..."))
-        if with_history:
-            messages = self.history.history
-        elif prompt is not None:
-            messages = prompt
-        
-        chat_completion = None
-        model_name = None
-
-        while True:
-            if len(self.regen_models_name) <= 0:
-                self.logger.log(ErrorLog("No models available for use."))
-                raise ModelExhaustedException("No models available for use.")
-            
-            model_name = self.regen_models_name[self.current_model_index]
-            try:
-                chat_completion = self.client.chat.completions.create(
-                    messages=messages, #type: ignore
-                    model=model_name,
-
-                )
-                break
-            except Exception as e:
-                print(e)
-                self.logger.log(WarningLog(f"Model {model_name} failed with error: {str(e)}. Trying next model..."))
-                self.current_key_index = 0 if self.current_key_index + 1 >= len(self.api_keys) else self.current_key_index + 1
-                if self.current_key_index == 0:
-                    self.current_model_index = 0 if self.current_model_index + 1 >= len(self.regen_models_name) else self.current_model_index + 1
-                    
-                self.client = Groq(api_key=self.api_keys[self.current_key_index])
-
-
-
-
-        result = chat_completion.choices[0].message.content
-        self.logger.log(InfoLog(f"Generated answer with model {model_name}."))
-        self.logger.log(InfoLog(f"Answer: {result}", level=2))
-        if result is None:
-            return ""
-        
-        return result
\ No newline at end of file
+    pool_provider = "groq"
+
+    def __init__(self, api_key, history: History | None = None,
+                 models_list: list[str] = ["openai/gpt-oss-120b",  "llama-3.3-70b-versatile",  "openai/gpt-oss-safeguard-20b"],
+                 use_random: bool = True, base_url: str | None = None):
+        super().__init__(api_key, history, models_list, use_random, base_url)
+
+    def _create_client(self) -> Groq:
+        pool = ClientPool()
+        api_key = self.api_keys[self.current_key_index]
+        return pool.get(self._get_pool_provider(self.pool_provider), api_key, lambda: Groq(
+            api_key=api_key,
+            base_url=self.base_url,
+            max_retries=0,
+            http_client=pool.get_http_client(self._get_pool_provider(self.pool_provider)),
+        ))
+
+    def _complete(self, messages: list[dict[str, str]], model_name: str, params: dict[str, Any] | None = None) -> str | None:
+        chat_completion = self.client.chat.completions.create(
+            messages=messages, #type: ignore
+            model=model_name,
+            **self.get_request_params(params),
+        )
+        choice = chat_completion.choices[0]
+        return self._check_finish(choice.finish_reason, choice.message.content)
+
+    def _stream(self, messages: list[dict[str, str]], model_name: str, params: dict[str, Any] | None = None) -> Iterator[str]:
+        stream = self.client.chat.completions.create(
+            messages=messages, #type: ignore
+            model=model_name,
+            stream=True,
+            **self.get_request_params(params),
+        )
+        for chunk in stream:
+            if chunk.choices:
+                yield chunk.choices[0].delta.content or ""
@@ -0,0 +1,212 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED, TimeoutError as FutureTimeoutError
+from typing import Any, Iterator, AsyncIterator
+from .model import Model, AsyncModel, ParentModel
+from .scheduler import RequestScheduler
+from ...ui.logging import BaseLogger, InfoLog
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="hedge")
+    return _executor
+
+
+class LatencyTracker:
+    """Latencies of the last window requests of one model. No hedge delay until min_samples are known."""
+
+    def __init__(self, percentile: float = 95, min_samples: int = 20, window: int = 200):
+        self.percentile = percentile
+        self.min_samples = max(1, min_samples)
+        self.samples: deque[float] = deque(maxlen=max(self.min_samples, window))
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float):
+        with self._lock:
+            self.samples.append(seconds)
+
+    def get_delay(self) -> float | None:
+        with self._lock:
+            if len(self.samples) < self.min_samples:
+                return None
+            ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+        return ordered[index]
+
+    def get_tail_mean(self, above: float) -> float:
+        """Expected latency of a request that is already slower than above, used to estimate the time a hedge saved."""
+        with self._lock:
+            tail = [el for el in self.samples if el > above]
+        return sum(tail) / len(tail) if tail else above
+
+
+class HedgeStats:
+    def __init__(self):
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.saved = 0.0
+
+    def format(self) -> str:
+        return (f"{self.requests} requests, {self.hedges} hedged, {self.hedge_wins} won by the hedge, "
+                f"about {self.saved:.1f}s saved")
+
+
+def log_hedge_stats(stats: HedgeStats):
+    if stats.requests:
+        BaseLogger().log(InfoLog(f"Hedged requests: {stats.format()}"))
+
+
+def make_hedge_model(model: ParentModel) -> ParentModel | None:
+    """
+    Copy of the model that starts one step further in the key / model rotation, so the duplicate request goes
+    to another api key or model. None if the model has a single key and a single model.
+    """
+    rotation = list(RequestScheduler.rotation(model.api_keys, model.regen_models_name,
+                                              model.current_key_index, model.current_model_index))
+    if len(rotation) < 2:
+        return None
+    hedge_model = type(model)(model.api_keys, models_list=model.regen_models_name, use_random=False, base_url=model.base_url) # type: ignore
+    hedge_model.current_key_index, hedge_model.current_model_index = rotation[1]
+    return hedge_model
+
+
+class HedgedModel(Model):
+    """
+    Sends a duplicate of get_answer_without_history to another key or model once the request is slower than
+    the percentile of the observed latency, and returns the first answer. A thread can not be interrupted:
+    the losing request runs to its end in the background and its answer is dropped.
+    Requests with history and streams are not hedged.
+    """
+
+    def __init__(self, model: Model, stats: HedgeStats, percentile: float = 95, min_samples: int = 20, window: int = 200):
+        self.model = model
+        self.stats = stats
+        self.tracker = LatencyTracker(percentile, min_samples, window)
+        self.hedge_model = make_hedge_model(model)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.model, name)
+
+    @property
+    def sampling_params(self) -> dict[str, Any]:  # type: ignore
+        return self.model.sampling_params
+
+    def generate_answer(self, with_history: bool = True, prompt: list[dict[str, str]] | None = None,
+                        task: str | None = None) -> str:
+        return self.model.generate_answer(with_history, prompt, task)
+
+    def _track(self, future: Future, start: float):
+        future.add_done_callback(lambda _: self.tracker.add(time.perf_counter() - start))
+
+    def get_answer_without_history(self, prompt: list[dict[str, str]], task: str | None = None) -> str:
+        self.stats.requests += 1
+        delay = self.tracker.get_delay()
+        start = time.perf_counter()
+        if delay is None or self.hedge_model is None:
+            answer = self.model.get_answer_without_history(prompt, task)
+            self.tracker.add(time.perf_counter() - start)
+            return answer
+
+        primary = get_executor().submit(self.model.get_answer_without_history, prompt, task)
+        self._track(primary, start)
+        try:
+            return primary.result(timeout=delay)
+        except FutureTimeoutError:
+            pass
+
+        self.stats.hedges += 1
+        hedge = get_executor().submit(self.hedge_model.get_answer_without_history, prompt, task)
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    continue
+                for el in pending:
+                    el.cancel()
+                if future is hedge:
+                    self.stats.hedge_wins += 1
+                    elapsed = time.perf_counter() - start
+                    self.stats.saved += self.tracker.get_tail_mean(elapsed) - elapsed
+                return future.result()
+
+        return primary.result()
+
+    def stream_answer_without_history(self, prompt: list[dict[str, str]], task: str | None = None) -> Iterator[str]:
+        return self.model.stream_answer_without_history(prompt, task)
+
+    def get_answer(self, prompt: str) -> str:
+        return self.model.get_answer(prompt)
+
+
+class AsyncHedgedModel(AsyncModel):
+    """Async twin of HedgedModel, here the losing request is cancelled."""
+
+    def __init__(self, model: AsyncModel, stats: HedgeStats, percentile: float = 95, min_samples: int = 20, window: int = 200):
+        self.model = model
+        self.stats = stats
+        self.tracker = LatencyTracker(percentile, min_samples, window)
+        self.hedge_model = make_hedge_model(model)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.model, name)
+
+    @property
+    def sampling_params(self) -> dict[str, Any]:  # type: ignore
+        return self.model.sampling_params
+
+    async def generate_answer(self, with_history: bool = True, prompt: list[dict[str, str]] | None = None,
+                              task: str | None = None) -> str:
+        return await self.model.generate_answer(with_history, prompt, task)
+
+    async def get_answer_without_history(self, prompt: list[dict[str, str]], task: str | None = None) -> str:
+        self.stats.requests += 1
+        delay = self.tracker.get_delay()
+        start = time.perf_counter()
+        if delay is None or self.hedge_model is None:
+            answer = await self.model.get_answer_without_history(prompt, task)
+            self.tracker.add(time.perf_counter() - start)
+            return answer
+
+        primary = asyncio.ensure_future(self.model.get_answer_without_history(prompt, task))
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            self.tracker.add(time.perf_counter() - start)
+            return primary.result()
+
+        self.stats.hedges += 1
+        hedge = asyncio.ensure_future(self.hedge_model.get_answer_without_history(prompt, task))
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task_done in done:
+                    if task_done.exception() is not None:
+                        continue
+                    elapsed = time.perf_counter() - start
+                    if task_done is hedge:
+                        self.stats.hedge_wins += 1
+                        self.stats.saved += self.tracker.get_tail_mean(elapsed) - elapsed
+                    # a cancelled primary was at least this slow, keep it in the tail
+                    self.tracker.add(elapsed)
+                    return task_done.result()
+            return primary.result()
+        finally:
+            for el in pending:
+                el.cancel()
+
+    async def stream_answer_without_history(self, prompt: list[dict[str, str]], task: str | None = None) -> AsyncIterator[str]:
+        async for delta in self.model.stream_answer_without_history(prompt, task):
+            yield delta
+
+    async def get_answer(self, prompt: str) -> str:
+        return await self.model.get_answer(prompt)
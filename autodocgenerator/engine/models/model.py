@@ -1,27 +1,89 @@
 from ..config.config import BASE_SYSTEM_TEXT
+from ..tokenizer import TokenCounter, get_token_counter
+from ..exceptions import ModelExhaustedException, OutputTruncatedException
+from .scheduler import RequestScheduler
+from .budget import OutputBudgetController
+from .client_pool import ClientPool
+from ...ui.logging import BaseLogger, InfoLog, ErrorLog, WarningLog
+import asyncio
 import random
-from typing import Union, Any, Coroutine
+import time
+from typing import Union, Any, Callable, Coroutine, Iterator, AsyncIterator
 from abc import abstractmethod, ABC
 
+SUMMARY_LINE_LENGTH = 200
+
+
+def summarize_turns(summary: str, turns: list[dict[str, str]]) -> str:
+    """Extractive summary: the beginning of every evicted turn, appended to the previous summary."""
+    lines = [summary] if summary else []
+    for el in turns:
+        first_line = el["content"].strip().split("\n", 1)[0]
+        lines.append(f"{el['role']}: {first_line[:SUMMARY_LINE_LENGTH]}")
+    return "\n".join(lines)
+
+
 class History:
-    def __init__(self, system_prompt: str = BASE_SYSTEM_TEXT):
-        self.history: list[dict[str, str]] = []
+    """
+    Messages of get_answer. With max_tokens > 0 it is a sliding window: once the messages cost more than max_tokens
+    the oldest turns are evicted and folded into a summary message (at most summary_tokens, the newest part is kept).
+    Pinned system messages are never evicted. The last turn always stays, even if it alone is over the window.
+    """
+
+    def __init__(self, system_prompt: str | None = BASE_SYSTEM_TEXT, max_tokens: int = 0, summary_tokens: int = 500,
+                 pin_system: bool = True, token_counter: TokenCounter | None = None,
+                 summarizer: Callable[[str, list[dict[str, str]]], str] = summarize_turns):
+        self.max_tokens = max_tokens
+        self.summary_tokens = summary_tokens
+        self.pin_system = pin_system
+        self.token_counter = token_counter if token_counter is not None else get_token_counter()
+        self.summarizer = summarizer
+
+        self.pinned: list[dict[str, str]] = []
+        self.turns: list[dict[str, str]] = []
+        self.summary = ""
+        self.evicted = 0
         if system_prompt is not None:
             self.add_to_history("system", system_prompt)
 
+    @property
+    def history(self) -> list[dict[str, str]]:
+        summary = [{"role": "system", "content": f"Summary of the earlier conversation:\n{self.summary}"}] if self.summary else []
+        return self.pinned + summary + self.turns
+
     def add_to_history(self, role: str, content: str):
-        self.history.append({
+        message = {
             "role": role,
             "content": content
-        })
+        }
+        if role == "system" and self.pin_system:
+            self.pinned.append(message)
+        else:
+            self.turns.append(message)
+        self._evict()
+
+    def _evict(self):
+        if self.max_tokens <= 0:
+            return
+
+        while len(self.turns) > 1 and self.token_counter.count_messages(self.history) > self.max_tokens:
+            evicted = [self.turns.pop(0)]
+            # a question goes together with its answer
+            if self.turns[0]["role"] == "assistant" and len(self.turns) > 1:
+                evicted.append(self.turns.pop(0))
+            self.summary = self.token_counter.tail(self.summarizer(self.summary, evicted), self.summary_tokens)
+            self.evicted += len(evicted)
 
 
 class ParentModel(ABC):
-    def __init__(self, api_key, history: History = History(), 
+    sampling_params: dict[str, Any] = {}
+    pool_provider: str | None = None
+
+    def __init__(self, api_key, history: History | None = None, 
                  models_list: list[str] = ["openai/gpt-oss-120b",  "llama-3.3-70b-versatile",  "openai/gpt-oss-safeguard-20b"],
-                 use_random: bool = True):
-        self.history = history
+                 use_random: bool = True, base_url: str | None = None):
         self.api_keys = api_key
+        self.base_url = base_url
 
         self.current_model_index = 0
         self.current_key_index = 0
@@ -31,28 +93,182 @@ class ParentModel(ABC):
         if use_random:
             random.shuffle(models_list)
         self.regen_models_name = models_list
+        # every model gets its own history, bounded to half of the context window of its first model
+        self.history = history if history is not None else History(max_tokens=self.token_counter.context_window // 2,
+                                                                   token_counter=self.token_counter)
+        self.logger = BaseLogger()
+        self.scheduler = RequestScheduler()
+        self.output_budget = OutputBudgetController()
+
+    @property
+    def current_model_name(self) -> str | None:
+        if not self.regen_models_name:
+            return None
+        return self.regen_models_name[self.current_model_index % len(self.regen_models_name)]
+
+    @property
+    def token_counter(self) -> TokenCounter:
+        return get_token_counter(self.current_model_name)
+
+    def _create_client(self) -> Any:
+        """Returns the backend client for the current api key (taken from ClientPool in real backends)."""
+        return None
+
+    @property
+    def client(self) -> Any:
+        return self._create_client()
+
+    def get_models_for_task(self, task: str | None = None) -> list[str]:
+        return self.regen_models_name
+
+    def get_request_params(self, params: dict[str, Any] | None = None) -> dict[str, Any]:
+        """sampling_params with the per request overrides (max_tokens, stop) of the output budget."""
+        return {**self.sampling_params, **(params or {})}
+
+    @staticmethod
+    def _check_finish(finish_reason: Any, answer: str | None) -> str | None:
+        if finish_reason == "length":
+            raise OutputTruncatedException(answer)
+        return answer
+
+    def _get_pool_provider(self, provider: str) -> str:
+        return provider if self.base_url is None else f"{provider}@{self.base_url}"
+
+    def _count_request(self, api_key: str, loop: asyncio.AbstractEventLoop | None = None):
+        """Counts the request in the ClientPool stats of the backend, before its client is taken from the pool."""
+        if self.pool_provider is not None:
+            ClientPool().count_request(self._get_pool_provider(self.pool_provider), api_key, loop)
+
+    def _get_messages(self, with_history: bool, prompt: list[dict[str, str]] | None) -> list[dict[str, str]]:
+        if with_history or prompt is None:
+            return self.history.history
+        return prompt
+
+    def _get_model_name(self) -> str:
+        if len(self.regen_models_name) <= 0:
+            self.logger.log(ErrorLog("No models available for use."))
+            raise ModelExhaustedException("No models available for use.")
+        return self.regen_models_name[self.current_model_index]
+
+    def _acquire(self) -> tuple[float, str]:
+        """Lets the scheduler pick the key / model pair for the next request, returns the wait before sending it."""
+        self._get_model_name()
+        wait, key_index, model_index = self.scheduler.acquire(self.api_keys, self.regen_models_name,
+                                                              self.current_key_index, self.current_model_index)
+        self.current_key_index, self.current_model_index = key_index, model_index
+        return wait, self.regen_models_name[model_index]
+
+    def _on_error(self, model_name: str, api_key: str, error: Exception, attempts: int):
+        """Reports the failure to the scheduler and moves to the next api key, and to the next model once every key has failed."""
+        delay = self.scheduler.record_failure(api_key, model_name, error)
+        self.logger.log(WarningLog(f"Model {model_name} failed with error: {str(error)}. Trying next model (blocked for {delay:.1f}s)..."))
+        if self.scheduler.is_exhausted(attempts):
+            self.logger.log(ErrorLog(f"Request failed {attempts} times, giving up."))
+            raise ModelExhaustedException(f"Request failed {attempts} times.") from error
+
+        self.current_key_index = 0 if self.current_key_index + 1 >= len(self.api_keys) else self.current_key_index + 1
+        if self.current_key_index == 0:
+            self.current_model_index = 0 if self.current_model_index + 1 >= len(self.regen_models_name) else self.current_model_index + 1
+
+    def _on_answer(self, model_name: str, result: str | None) -> str:
+        self.logger.log(InfoLog(f"Generated answer with model {model_name}."))
+        self.logger.log(InfoLog(f"Answer: {result}", level=2))
+        if result is None:
+            return ""
+
+        return result
 
     @abstractmethod
-    def generate_answer(self, with_history: bool = True, prompt: list[dict[str, str]] | None = None) -> Union[str, Coroutine[Any, Any, str]]:
+    def generate_answer(self, with_history: bool = True, prompt: list[dict[str, str]] | None = None,
+                        task: str | None = None) -> Union[str, Coroutine[Any, Any, str]]:
         return ""
     
     @abstractmethod
-    def get_answer_without_history(self, prompt: list[dict[str, str]]) -> Union[str, Coroutine[Any, Any, str]]:
+    def get_answer_without_history(self, prompt: list[dict[str, str]], task: str | None = None) -> Union[str, Coroutine[Any, Any, str]]:
+        """task (classify, order, compress, document, intro) lets a router pick the model tier, plain models ignore it."""
         return ""
     
     @abstractmethod
     def get_answer(self, prompt: str) -> Union[str, Coroutine[Any, Any, str]]:
         return ""
 
+    @abstractmethod
+    def stream_answer_without_history(self, prompt: list[dict[str, str]], task: str | None = None) -> Union[Iterator[str], AsyncIterator[str]]:
+        ...
+
 
 
 class Model(ParentModel):
 
-    def generate_answer(self, with_history: bool = True, prompt: list[dict[str, str]]  |  None = None) -> str:
+    def _complete(self, messages: list[dict[str, str]], model_name: str, params: dict[str, Any] | None = None) -> str | None:
         return "answer"
+
+    def generate_answer(self, with_history: bool = True, prompt: list[dict[str, str]]  |  None = None,
+                        task: str | None = None) -> str:
+        self.logger.log(InfoLog("Generating answer..."))
+        messages = self._get_messages(with_history, prompt)
+        params = self.output_budget.get_params(task, self.token_counter.count_messages(messages), self.sampling_params)
+
+        attempts = 0
+        while True:
+            wait, model_name = self._acquire()
+            if wait > 0:
+                time.sleep(wait)
+            api_key = self.api_keys[self.current_key_index]
+            attempts += 1
+            self._count_request(api_key)
+            try:
+                result = self._complete(messages, model_name, params)
+                self.scheduler.record_success(api_key, model_name)
+                break
+            except OutputTruncatedException as e:
+                self.scheduler.record_success(api_key, model_name)
+                params = self.output_budget.grow(params, self.sampling_params)
+                if params is None:
+                    result = e.answer
+                    break
+            except Exception as e:
+                self._on_error(model_name, api_key, e, attempts)
+
+        return self._on_answer(model_name, result)
     
-    def get_answer_without_history(self, prompt: list[dict[str, str]]) -> str:
-        return self.generate_answer(with_history=False, prompt=prompt)
+    def get_answer_without_history(self, prompt: list[dict[str, str]], task: str | None = None) -> str:
+        return self.generate_answer(with_history=False, prompt=prompt, task=task)
+
+    def _stream(self, messages: list[dict[str, str]], model_name: str, params: dict[str, Any] | None = None) -> Iterator[str]:
+        """Backends without streaming give the whole answer as one delta."""
+        yield self._complete(messages, model_name, params) or ""
+
+    def stream_answer_without_history(self, prompt: list[dict[str, str]], task: str | None = None) -> Iterator[str]:
+        """
+        Yields the answer as text deltas while it is generated. A request is retried only while nothing
+        has been yielded yet, a failure in the middle of the answer is raised to the consumer.
+        """
+        self.logger.log(InfoLog("Streaming answer..."))
+        params = self.output_budget.get_stream_params(task)
+        attempts = 0
+        while True:
+            wait, model_name = self._acquire()
+            if wait > 0:
+                time.sleep(wait)
+            api_key = self.api_keys[self.current_key_index]
+            attempts += 1
+            self._count_request(api_key)
+            result: list[str] = []
+            try:
+                for delta in self._stream(prompt, model_name, params):
+                    if delta:
+                        result.append(delta)
+                        yield delta
+                self.scheduler.record_success(api_key, model_name)
+                break
+            except Exception as e:
+                if result:
+                    self.scheduler.record_failure(api_key, model_name, e)
+                    raise
+                self._on_error(model_name, api_key, e, attempts)
+
+        self._on_answer(model_name, "".join(result))
 
     def get_answer(self, prompt: str) -> str:
         self.history.add_to_history("user", prompt)
@@ -62,11 +278,75 @@ class Model(ParentModel):
     
 class AsyncModel(ParentModel):
 
-    async def generate_answer(self, with_history: bool = True, prompt: list[dict[str, str]] | None = None) -> str:
+    async def _complete(self, messages: list[dict[str, str]], model_name: str, params: dict[str, Any] | None = None) -> str | None:
         return "answer"
+
+    async def generate_answer(self, with_history: bool = True, prompt: list[dict[str, str]] | None = None,
+                              task: str | None = None) -> str:
+        self.logger.log(InfoLog("Generating answer..."))
+        messages = self._get_messages(with_history, prompt)
+        params = self.output_budget.get_params(task, self.token_counter.count_messages(messages), self.sampling_params)
+
+        attempts = 0
+        while True:
+            wait, model_name = self._acquire()
+            key_index, model_index = self.current_key_index, self.current_model_index
+            if wait > 0:
+                await asyncio.sleep(wait)
+            # other requests may have moved the shared indexes while this one was waiting
+            self.current_key_index, self.current_model_index = key_index, model_index
+            api_key = self.api_keys[key_index]
+            attempts += 1
+            self._count_request(api_key, asyncio.get_running_loop())
+            try:
+                result = await self._complete(messages, model_name, params)
+                self.scheduler.record_success(api_key, model_name)
+                break
+            except OutputTruncatedException as e:
+                self.scheduler.record_success(api_key, model_name)
+                params = self.output_budget.grow(params, self.sampling_params)
+                if params is None:
+                    result = e.answer
+                    break
+            except Exception as e:
+                self._on_error(model_name, api_key, e, attempts)
+
+        return self._on_answer(model_name, result)
     
-    async def get_answer_without_history(self, prompt: list[dict[str, str]]) -> str:
-        return await self.generate_answer(with_history=False, prompt=prompt)
+    async def get_answer_without_history(self, prompt: list[dict[str, str]], task: str | None = None) -> str:
+        return await self.generate_answer(with_history=False, prompt=prompt, task=task)
+
+    async def _stream(self, messages: list[dict[str, str]], model_name: str, params: dict[str, Any] | None = None) -> AsyncIterator[str]:
+        yield await self._complete(messages, model_name, params) or ""
+
+    async def stream_answer_without_history(self, prompt: list[dict[str, str]], task: str | None = None) -> AsyncIterator[str]:
+        self.logger.log(InfoLog("Streaming answer..."))
+        params = self.output_budget.get_stream_params(task)
+        attempts = 0
+        while True:
+            wait, model_name = self._acquire()
+            key_index, model_index = self.current_key_index, self.current_model_index
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self.current_key_index, self.current_model_index = key_index, model_index
+            api_key = self.api_keys[key_index]
+            attempts += 1
+            self._count_request(api_key, asyncio.get_running_loop())
+            result: list[str] = []
+            try:
+                async for delta in self._stream(prompt, model_name, params):
+                    if delta:
+                        result.append(delta)
+                        yield delta
+                self.scheduler.record_success(api_key, model_name)
+                break
+            except Exception as e:
+                if result:
+                    self.scheduler.record_failure(api_key, model_name, e)
+                    raise
+                self._on_error(model_name, api_key, e, attempts)
+
+        self._on_answer(model_name, "".join(result))
 
     async def get_answer(self, prompt: str) -> str:
         self.history.add_to_history("user", prompt)
@@ -0,0 +1,160 @@
+import time
+from typing import Any, Iterator, AsyncIterator
+from .model import Model, AsyncModel, ParentModel
+from ...ui.logging import BaseLogger, InfoLog
+
+TASKS = ["classify", "order", "compress", "document", "intro"]
+DEFAULT_TIER = "default"
+
+
+class RoutingSettings:
+    enabled = False
+    tiers: dict[str, list[str]] = {}
+    tasks: dict[str, str] = {}
+
+    def load_settings(self, data: dict[str, Any]):
+        for key, el in data.items():
+            setattr(self, key, el)
+
+
+class TierStats:
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+
+    def add(self, seconds: float):
+        self.calls += 1
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def format(self) -> str:
+        average = self.seconds / self.calls if self.calls else 0.0
+        return f"{self.calls} calls, {self.seconds:.1f}s total, {average:.2f}s average, {self.max_seconds:.2f}s max"
+
+
+def log_tier_stats(stats: dict[str, TierStats]):
+    for tier, el in stats.items():
+        if el.calls:
+            BaseLogger().log(InfoLog(f"Model tier {tier}: {el.format()}"))
+
+
+class ModelRouter:
+    """
+    Maps pipeline tasks (classify, order, compress, document, intro) to model tiers. Tiers are listed
+    from the first to the last fallback: the model of a tier rotates through its own models and then
+    through the models of every tier after it. Tasks without a tier go to the default model.
+    Tier models are of the default model's class and share its api keys; a sync and an async router may share stats.
+    """
+
+    def __init__(self, settings: RoutingSettings, model: ParentModel, stats: dict[str, TierStats] | None = None):
+        self.tasks = settings.tasks
+        self.models: dict[str, ParentModel] = {}
+
+        tier_names = list(settings.tiers)
+        for i, tier in enumerate(tier_names):
+            models_list = list(dict.fromkeys(name for el in tier_names[i:] for name in settings.tiers[el]))
+            self.models[tier] = type(model)(model.api_keys, models_list=models_list, use_random=False, base_url=model.base_url) # type: ignore
+
+        for task, tier in self.tasks.items():
+            if task not in TASKS:
+                raise ValueError(f"Unknown task {task}, expected one of {', '.join(TASKS)}.")
+            if tier not in self.models:
+                raise ValueError(f"Task {task} is routed to unknown model tier {tier}.")
+
+        self.stats: dict[str, TierStats] = stats if stats is not None else {}
+        for tier in [*tier_names, DEFAULT_TIER]:
+            self.stats.setdefault(tier, TierStats())
+
+    def get_tier(self, task: str | None) -> str:
+        if task is None or task not in self.tasks:
+            return DEFAULT_TIER
+        return self.tasks[task]
+
+    def record(self, tier: str, seconds: float):
+        self.stats[tier].add(seconds)
+
+
+class RoutedModel(Model):
+    """Sends get_answer_without_history to the model of the task tier, everything else goes to the wrapped default model."""
+
+    def __init__(self, model: Model, router: ModelRouter):
+        self.model = model
+        self.router = router
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.model, name)
+
+    @property
+    def sampling_params(self) -> dict[str, Any]:  # type: ignore
+        return self.model.sampling_params
+
+    def _route(self, task: str | None) -> tuple[str, Model]:
+        tier = self.router.get_tier(task)
+        return tier, self.router.models.get(tier, self.model)  # type: ignore
+
+    def get_models_for_task(self, task: str | None = None) -> list[str]:
+        return self._route(task)[1].regen_models_name
+
+    def generate_answer(self, with_history: bool = True, prompt: list[dict[str, str]] | None = None,
+                        task: str | None = None) -> str:
+        return self.model.generate_answer(with_history, prompt, task)
+
+    def get_answer_without_history(self, prompt: list[dict[str, str]], task: str | None = None) -> str:
+        tier, model = self._route(task)
+        start = time.perf_counter()
+        answer = model.get_answer_without_history(prompt, task)
+        self.router.record(tier, time.perf_counter() - start)
+        return answer
+
+    def stream_answer_without_history(self, prompt: list[dict[str, str]], task: str | None = None) -> Iterator[str]:
+        tier, model = self._route(task)
+        start = time.perf_counter()
+        yield from model.stream_answer_without_history(prompt, task)
+        self.router.record(tier, time.perf_counter() - start)
+
+    def get_answer(self, prompt: str) -> str:
+        return self.model.get_answer(prompt)
+
+
+class AsyncRoutedModel(AsyncModel):
+    """Async twin of RoutedModel."""
+
+    def __init__(self, model: AsyncModel, router: ModelRouter):
+        self.model = model
+        self.router = router
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.model, name)
+
+    @property
+    def sampling_params(self) -> dict[str, Any]:  # type: ignore
+        return self.model.sampling_params
+
+    def _route(self, task: str | None) -> tuple[str, AsyncModel]:
+        tier = self.router.get_tier(task)
+        return tier, self.router.models.get(tier, self.model)  # type: ignore
+
+    def get_models_for_task(self, task: str | None = None) -> list[str]:
+        return self._route(task)[1].regen_models_name
+
+    async def generate_answer(self, with_history: bool = True, prompt: list[dict[str, str]] | None = None,
+                              task: str | None = None) -> str:
+        return await self.model.generate_answer(with_history, prompt, task)
+
+    async def get_answer_without_history(self, prompt: list[dict[str, str]], task: str | None = None) -> str:
+        tier, model = self._route(task)
+        start = time.perf_counter()
+        answer = await model.get_answer_without_history(prompt, task)
+        self.router.record(tier, time.perf_counter() - start)
+        return answer
+
+    async def stream_answer_without_history(self, prompt: list[dict[str, str]], task: str | None = None) -> AsyncIterator[str]:
+        tier, model = self._route(task)
+        start = time.perf_counter()
+        async for delta in model.stream_answer_without_history(prompt, task):
+            yield delta
+        self.router.record(tier, time.perf_counter() - start)
+
+    async def get_answer(self, prompt: str) -> str:
+        return await self.model.get_answer(prompt)
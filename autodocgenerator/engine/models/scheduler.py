@@ -0,0 +1,259 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any
+from ...ui.logging import BaseLogger, InfoLog, WarningLog
+
+KEY_STATUS_CODES = {401, 403, 429}
+
+
+class SchedulerSettings:
+    """
+    Proactive rate limits are opt-in: requests_per_minute 0 means no client side limit, the scheduler then
+    only reacts to failures (429 / Retry-After, backoff and circuit breakers).
+    """
+    enabled = True
+    key_requests_per_minute = 0
+    key_burst = 5
+    model_requests_per_minute = 0
+    model_burst = 5
+    backoff_base = 1.0
+    backoff_max = 60.0
+    max_retry_after = 300.0
+    breaker_failures = 3
+    breaker_cooldown = 60.0
+    max_attempts = 0
+
+    def load_settings(self, data: dict[str, Any]):
+        for key, el in data.items():
+            setattr(self, key, el)
+
+
+class TokenBucket:
+    """requests_per_minute <= 0 means no limit. Tokens may go negative: every taken token is a reservation."""
+
+    def __init__(self, requests_per_minute: float, burst: int):
+        self.rate = requests_per_minute / 60
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float):
+        if self.rate > 0:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def ready_at(self, now: float) -> float:
+        self._refill(now)
+        ready = now
+        if self.rate > 0 and self.tokens < 1:
+            ready = now + (1 - self.tokens) / self.rate
+        return max(ready, self.blocked_until)
+
+    def take(self, now: float):
+        self._refill(now)
+        if self.rate > 0:
+            self.tokens -= 1
+
+    def block(self, until: float):
+        self.blocked_until = max(self.blocked_until, until)
+
+
+class CircuitBreaker:
+    """
+    Opens after failures_to_open failures in a row and rejects the resource for cooldown seconds.
+    After the cooldown one request is let through (half open): a success closes it, a failure opens it again.
+    """
+
+    def __init__(self, failures_to_open: int, cooldown: float):
+        self.failures_to_open = max(1, failures_to_open)
+        self.cooldown = cooldown
+        self.failures = 0
+        self.open_until = 0.0
+
+    def record_success(self):
+        self.failures = 0
+        self.open_until = 0.0
+
+    def record_failure(self, now: float) -> bool:
+        """Returns True if the breaker has opened."""
+        self.failures += 1
+        if self.failures < self.failures_to_open:
+            return False
+        self.open_until = now + self.cooldown
+        return True
+
+
+class ResourceState:
+    """Rate limit, backoff and breaker state of one api key or one model."""
+
+    def __init__(self, requests_per_minute: float, burst: int, settings: SchedulerSettings):
+        self.bucket = TokenBucket(requests_per_minute, burst)
+        self.breaker = CircuitBreaker(settings.breaker_failures, settings.breaker_cooldown)
+
+    def ready_at(self, now: float) -> float:
+        return max(self.bucket.ready_at(now), self.breaker.open_until)
+
+
+class SchedulerStats:
+    def __init__(self):
+        self.requests = 0
+        self.failures = 0
+        self.rate_limited = 0
+        self.breaker_opens = 0
+        self.waited = 0.0
+
+    def format(self) -> str:
+        return (f"requests {self.requests}, failures {self.failures} ({self.rate_limited} rate limited), "
+                f"breakers opened {self.breaker_opens}, waited {self.waited:.1f}s")
+
+
+def get_status_code(error: Exception) -> int | None:
+    status_code = getattr(error, "status_code", None)
+    if status_code is None:
+        status_code = getattr(getattr(error, "response", None), "status_code", None)
+    return status_code if isinstance(status_code, int) else None
+
+
+def get_retry_after(error: Exception) -> float | None:
+    """Reads Retry-After (seconds or http date) or retry-after-ms from the error response, if the SDK kept it."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+
+    try:
+        retry_after_ms = headers.get("retry-after-ms")
+        if retry_after_ms is not None:
+            return max(0.0, float(retry_after_ms) / 1000)
+
+        retry_after = headers.get("retry-after")
+        if retry_after is None:
+            return None
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            date = parsedate_to_datetime(retry_after)
+            return max(0.0, (date - datetime.now(timezone.utc)).total_seconds())
+    except Exception:
+        return None
+
+
+class RequestScheduler:
+    """
+    Sits between the models and their clients. Keeps a token bucket and a circuit breaker per api key and per model,
+    picks the first (key, model) pair of the model rotation that can send right now (or the one that will be ready first),
+    and after a failure blocks the guilty key or model for Retry-After seconds or a jittered exponential backoff.
+    429 / 401 / 403 are blamed on the key, every other error on the model. Failures without Retry-After
+    count towards the circuit breaker of the blamed resource.
+    """
+
+    def __new__(cls):
+        if not hasattr(cls, 'instance'):
+            cls.instance = super(RequestScheduler, cls).__new__(cls)
+            cls.instance._init_scheduler()
+        return cls.instance
+
+    def _init_scheduler(self):
+        self._lock = threading.Lock()
+        self.logger = BaseLogger()
+        self.set_settings(SchedulerSettings())
+
+    def set_settings(self, settings: SchedulerSettings):
+        with self._lock:
+            self.settings = settings
+            self.keys: dict[str, ResourceState] = {}
+            self.models: dict[str, ResourceState] = {}
+            self.stats = SchedulerStats()
+
+    def _get_key(self, api_key: str) -> ResourceState:
+        if api_key not in self.keys:
+            self.keys[api_key] = ResourceState(self.settings.key_requests_per_minute, self.settings.key_burst, self.settings)
+        return self.keys[api_key]
+
+    def _get_model(self, model_name: str) -> ResourceState:
+        if model_name not in self.models:
+            self.models[model_name] = ResourceState(self.settings.model_requests_per_minute, self.settings.model_burst, self.settings)
+        return self.models[model_name]
+
+    @staticmethod
+    def rotation(api_keys: list[str], models: list[str], key_index: int, model_index: int):
+        """(key index, model index) pairs in the order the model rotates through them, starting with the current pair."""
+        for _ in range(len(api_keys) * len(models)):
+            yield key_index, model_index
+            key_index = 0 if key_index + 1 >= len(api_keys) else key_index + 1
+            if key_index == 0:
+                model_index = 0 if model_index + 1 >= len(models) else model_index + 1
+
+    def backoff(self, failures: int) -> float:
+        return random.uniform(0, min(self.settings.backoff_max, self.settings.backoff_base * 2 ** max(0, failures - 1)))
+
+    def acquire(self, api_keys: list[str], models: list[str], key_index: int, model_index: int) -> tuple[float, int, int]:
+        """Reserves a request and returns (seconds to wait before sending it, key index, model index)."""
+        if not self.settings.enabled or not api_keys or not models:
+            return 0.0, key_index, model_index
+
+        with self._lock:
+            now = time.monotonic()
+            best: tuple[float, int, int] | None = None
+            for i, j in self.rotation(api_keys, models, key_index, model_index):
+                ready = max(self._get_key(api_keys[i]).ready_at(now), self._get_model(models[j]).ready_at(now))
+                if best is None or ready < best[0]:
+                    best = (ready, i, j)
+                if ready <= now:
+                    break
+
+            ready, key_index, model_index = best  # type: ignore
+            self._get_key(api_keys[key_index]).bucket.take(now)
+            self._get_model(models[model_index]).bucket.take(now)
+
+            wait = max(0.0, ready - now)
+            self.stats.requests += 1
+            self.stats.waited += wait
+        return wait, key_index, model_index
+
+    def record_success(self, api_key: str, model_name: str):
+        if not self.settings.enabled:
+            return
+        with self._lock:
+            self._get_key(api_key).breaker.record_success()
+            self._get_model(model_name).breaker.record_success()
+
+    def record_failure(self, api_key: str, model_name: str, error: Exception) -> float:
+        """Blocks the key or the model the error is blamed on and returns for how many seconds."""
+        if not self.settings.enabled:
+            return 0.0
+
+        status_code = get_status_code(error)
+        retry_after = get_retry_after(error)
+        blame_key = status_code in KEY_STATUS_CODES
+        with self._lock:
+            now = time.monotonic()
+            resource = self._get_key(api_key) if blame_key else self._get_model(model_name)
+            opened = False
+            if retry_after is not None:
+                # the server said when to come back, it is flow control and not a broken resource
+                delay = min(retry_after, self.settings.max_retry_after)
+            else:
+                opened = resource.breaker.record_failure(now)
+                delay = self.backoff(resource.breaker.failures)
+            resource.bucket.block(now + delay)
+
+            self.stats.failures += 1
+            if status_code == 429:
+                self.stats.rate_limited += 1
+            if opened:
+                self.stats.breaker_opens += 1
+
+        if opened:
+            name = f"key ...{api_key[-4:]}" if blame_key else f"model {model_name}"
+            self.logger.log(WarningLog(f"Circuit breaker opened for {name} for {self.settings.breaker_cooldown}s."))
+        return delay
+
+    def is_exhausted(self, attempts: int) -> bool:
+        return self.settings.max_attempts > 0 and attempts >= self.settings.max_attempts
+
+    def log_stats(self):
+        self.logger.log(InfoLog(f"Request scheduler: {self.stats.format()}"))
@@ -0,0 +1,162 @@
+import hashlib
+import math
+import re
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+TOKEN_PIECE_PATTERN = re.compile(r"[^\W\d]+|\d+|\n[ \t]*|[ \t]+|[^\w\s]+")
+NON_ASCII_LETTERS_PER_TOKEN = 2.0
+
+
+class ModelCalibration:
+    """
+    Offline calibration of the heuristic counter for one model family.
+    letters_per_token: average length of a BPE piece inside a word,
+    scale: correction applied to the whole estimate,
+    context_window: input + output tokens the model accepts.
+    """
+
+    def __init__(self, letters_per_token: float, scale: float, context_window: int):
+        self.letters_per_token = letters_per_token
+        self.scale = scale
+        self.context_window = context_window
+
+
+DEFAULT_CALIBRATION = ModelCalibration(letters_per_token=4.0, scale=1.1, context_window=8192)
+
+MODEL_CALIBRATIONS: dict[str, ModelCalibration] = {
+    "gpt-4o": ModelCalibration(letters_per_token=4.4, scale=1.0, context_window=128_000),
+    "gpt-4.1": ModelCalibration(letters_per_token=4.4, scale=1.0, context_window=1_047_576),
+    "gpt-5": ModelCalibration(letters_per_token=4.4, scale=1.0, context_window=400_000),
+    "gpt-oss": ModelCalibration(letters_per_token=4.4, scale=1.0, context_window=131_072),
+    "llama-3": ModelCalibration(letters_per_token=4.2, scale=1.05, context_window=131_072),
+    "deepseek": ModelCalibration(letters_per_token=3.8, scale=1.1, context_window=128_000),
+}
+
+
+def normalize_model_name(model_name: str) -> str:
+    return model_name.split("/")[-1].lower()
+
+
+def get_calibration(model_name: str | None) -> ModelCalibration:
+    if not model_name:
+        return DEFAULT_CALIBRATION
+
+    name = normalize_model_name(model_name)
+    matches = [key for key in MODEL_CALIBRATIONS if name.startswith(key)]
+    if not matches:
+        return DEFAULT_CALIBRATION
+    return MODEL_CALIBRATIONS[max(matches, key=len)]
+
+
+def register_calibration(model_prefix: str, calibration: ModelCalibration):
+    MODEL_CALIBRATIONS[normalize_model_name(model_prefix)] = calibration
+    _counters.clear()
+
+
+class TokenCounter(ABC):
+    """Counts tokens without network access, counts are memoized by content hash."""
+
+    MIN_CACHED_LENGTH = 64
+
+    def __init__(self, context_window: int = DEFAULT_CALIBRATION.context_window, cache_size: int = 65_536):
+        self.context_window = context_window
+        self.cache_size = cache_size
+        self._cache: OrderedDict[bytes, int] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @abstractmethod
+    def _count(self, text: str) -> int:
+        ...
+
+    def count(self, text: str) -> int:
+        if len(text) < self.MIN_CACHED_LENGTH:
+            return self._count(text)
+
+        key = hashlib.blake2b(text.encode("utf-8", errors="ignore"), digest_size=16).digest()
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key]
+
+        result = self._count(text)
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def count_messages(self, messages: list[dict[str, str]]) -> int:
+        return sum(self.count(message["content"]) + 4 for message in messages) + 2
+
+    def head(self, text: str, max_tokens: int) -> str:
+        """Longest prefix made of whole lines (or a cut line) that fits into max_tokens."""
+        lines = text.splitlines(keepends=True)
+        total = 0
+        for i, line in enumerate(lines):
+            line_tokens = self.count(line)
+            if total + line_tokens > max_tokens:
+                rest = max_tokens - total
+                cut = line[:int(rest * len(line) / line_tokens)] if rest > 0 else ""
+                return "".join(lines[:i]) + cut
+            total += line_tokens
+        return text
+
+    def tail(self, text: str, max_tokens: int) -> str:
+        """Longest suffix made of whole lines (or a cut line) that fits into max_tokens."""
+        lines = text.splitlines(keepends=True)
+        total = 0
+        for i in range(len(lines) - 1, -1, -1):
+            line_tokens = self.count(lines[i])
+            if total + line_tokens > max_tokens:
+                rest = max_tokens - total
+                cut = lines[i][len(lines[i]) - int(rest * len(lines[i]) / line_tokens):] if rest > 0 else ""
+                return cut + "".join(lines[i + 1:])
+            total += line_tokens
+        return text
+
+
+class HeuristicTokenCounter(TokenCounter):
+    """
+    BPE-like estimate: identifier runs cost ceil(len / letters_per_token) tokens (non ascii letters cost more),
+    digit runs one token per 3 digits, symbol runs one token per 2 symbols, a newline with its indentation
+    one token and a single space between words is merged into the next word.
+    """
+
+    def __init__(self, calibration: ModelCalibration = DEFAULT_CALIBRATION, cache_size: int = 65_536):
+        super().__init__(calibration.context_window, cache_size)
+        self.calibration = calibration
+
+    def _count(self, text: str) -> int:
+        letters_per_token = self.calibration.letters_per_token
+        total = 0
+        for piece in TOKEN_PIECE_PATTERN.findall(text):
+            first = piece[0]
+            if first.isalpha() or first == "_":
+                total += math.ceil(len(piece) / (letters_per_token if piece.isascii() else NON_ASCII_LETTERS_PER_TOKEN))
+            elif first.isdigit():
+                total += math.ceil(len(piece) / 3)
+            elif first == "\n":
+                total += 1
+            elif first == " " or first == "\t":
+                total += 0 if piece == " " else 1
+            else:
+                total += math.ceil(len(piece) / 2)
+        return math.ceil(total * self.calibration.scale)
+
+
+_counters: dict[int, TokenCounter] = {}
+
+
+def get_token_counter(model_name: str | None = None) -> TokenCounter:
+    """Shared counter per calibration, so every stage reuses the same memoized counts."""
+    calibration = get_calibration(model_name)
+    key = id(calibration)
+    if key not in _counters:
+        _counters[key] = HeuristicTokenCounter(calibration)
+    return _counters[key]
@@ -1,11 +1,48 @@
 from abc import ABC, abstractmethod
+import asyncio
+from typing import Any, Iterator, AsyncIterator
 from ..engine.models.model import Model, AsyncModel
+from ..engine.models.batcher import PromptBatcher
 from ..ui.progress_base import BaseProgress
 from ..ui.logging import BaseLogger, InfoLog, ErrorLog, WarningLog
 from ..schema.doc_schema import DocContent, DocHeadSchema
-from ..postprocessor.sorting import split_text_by_anchors
+from ..postprocessor.sorting import split_text_by_anchors, AnchorStreamParser
+
+class SyncModelAdapter:
+    """
+    Sync face of an AsyncModel for modules that only implement generate. It is used from a worker thread:
+    every call is run on the event loop of the caller and the thread waits for its result.
+    """
+
+    def __init__(self, model: AsyncModel, loop: asyncio.AbstractEventLoop):
+        self.model = model
+        self.loop = loop
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.model, name)
+
+    def _run(self, coroutine) -> Any:
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def generate_answer(self, with_history: bool = True, prompt: list[dict[str, str]] | None = None,
+                        task: str | None = None) -> str:
+        return self._run(self.model.generate_answer(with_history, prompt, task))
+
+    def get_answer_without_history(self, prompt: list[dict[str, str]], task: str | None = None) -> str:
+        return self._run(self.model.get_answer_without_history(prompt, task))
+
+    def stream_answer_without_history(self, prompt: list[dict[str, str]], task: str | None = None) -> Iterator[str]:
+        async def collect() -> str:
+            return "".join([delta async for delta in self.model.stream_answer_without_history(prompt, task)])
+        yield self._run(collect())
+
+    def get_answer(self, prompt: str) -> str:
+        return self._run(self.model.get_answer(prompt))
+
 
 class BaseModule(ABC):
+    task = "document"
+
     def __init__(self):
         pass
     
@@ -13,6 +50,21 @@ class BaseModule(ABC):
     def generate(self, info: dict, model: Model):
         ...
 
+    async def async_generate(self, info: dict, model: AsyncModel):
+        """Modules without an async implementation run their sync generate in a worker thread, with a sync adapter of the model."""
+        return await asyncio.to_thread(self.generate, info, SyncModelAdapter(model, asyncio.get_running_loop())) # type: ignore
+
+    def stream(self, info: dict, model: Model) -> Iterator[str]:
+        """Modules without streaming give their whole result as one delta."""
+        yield self.generate(info, model)
+
+    async def async_stream(self, info: dict, model: AsyncModel) -> AsyncIterator[str]:
+        yield await self.async_generate(info, model)
+
+    def get_batch_prompt(self, info: dict) -> list[dict[str, str]] | None:
+        """Modules made of one small request return its prompt, so DocFactory can batch it with others."""
+        return None
+
 
 class DocFactory:
     def __init__(self, *modules, with_splited: bool = True):
@@ -20,23 +72,115 @@ class DocFactory:
         self.logger = BaseLogger()
         self.with_splited = with_splited
 
-    def generate_doc(self, info: dict, model: Model, progress: BaseProgress) -> DocHeadSchema:
+    def add_module_result(self, doc_head: DocHeadSchema, i: int, module: BaseModule, module_result: str,
+                          splited_result: dict[str, str] | None = None):
+        if self.with_splited:
+            if splited_result is None:
+                splited_result = split_text_by_anchors(module_result)
+            for el in splited_result:
+                doc_head.add_parts(el, DocContent(content=splited_result[el]))
+        else:
+            task_name = f"{module.__class__.__name__}_{i}"
+            doc_head.add_parts(task_name, DocContent(content=module_result))
+
+        self.logger.log(InfoLog(f"Module {module.__class__.__name__} generated its part of the documentation."))
+        self.logger.log(InfoLog(f"Module Output: {module_result}", level=2))
+
+    def log_sections(self, module: BaseModule, sections: list[tuple[str, str]]):
+        for link, _ in sections:
+            self.logger.log(InfoLog(f"Module {module.__class__.__name__} finished section {link}."))
+
+    def read_stream(self, module: BaseModule, deltas: Iterator[str]) -> tuple[str, dict[str, str]]:
+        """Sections are cut out of the answer while it is still arriving."""
+        parser = AnchorStreamParser()
+        result = []
+        for delta in deltas:
+            result.append(delta)
+            self.log_sections(module, parser.feed(delta))
+        self.log_sections(module, parser.finish())
+        return "".join(result), parser.sections
+
+    async def async_read_stream(self, module: BaseModule, deltas: AsyncIterator[str]) -> tuple[str, dict[str, str]]:
+        parser = AnchorStreamParser()
+        result = []
+        async for delta in deltas:
+            result.append(delta)
+            self.log_sections(module, parser.feed(delta))
+        self.log_sections(module, parser.finish())
+        return "".join(result), parser.sections
+
+    def get_batch_prompts(self, info: dict) -> dict[int, list[dict[str, str]]]:
+        batch_prompts = {}
+        for i, module in enumerate(self.modules):
+            prompt = module.get_batch_prompt(info)
+            if prompt is not None:
+                batch_prompts[i] = prompt
+        return batch_prompts if len(batch_prompts) > 1 else {}
+
+    def group_by_task(self, batch_prompts: dict[int, list[dict[str, str]]]) -> dict[str, list[int]]:
+        """Prompts of different tasks may be routed to different models, only prompts of one task share a request."""
+        groups: dict[str, list[int]] = {}
+        for i in batch_prompts:
+            groups.setdefault(self.modules[i].task, []).append(i)
+        return groups
+
+    def generate_doc(self, info: dict, model: Model, progress: BaseProgress, stream: bool = False,
+                     batcher: PromptBatcher | None = None) -> DocHeadSchema:
         doc_head = DocHeadSchema()
         progress.create_new_subtask("Generate parts", len(self.modules))
+
+        batched: dict[int, str] = {}
+        batch_prompts = self.get_batch_prompts(info) if batcher is not None else {}
+        for task, group in self.group_by_task(batch_prompts).items():
+            batched.update(zip(group, batcher.ask_many([batch_prompts[i] for i in group], model, task))) # type: ignore
+
         for i, module in enumerate(self.modules):
-            module_result = module.generate(info, model)
-            if self.with_splited:
-                splited_result = split_text_by_anchors(module_result)
-                for el in splited_result:
-                    doc_head.add_parts(el, DocContent(content=splited_result[el]))
+            if i in batched:
+                self.add_module_result(doc_head, i, module, batched[i])
+            elif stream:
+                module_result, splited_result = self.read_stream(module, module.stream(info, model))
+                self.add_module_result(doc_head, i, module, module_result, splited_result)
             else:
-                task_name = f"{module.__class__.__name__}_{i}"
-                doc_head.add_parts(task_name, DocContent(content=module_result))
-
-            self.logger.log(InfoLog(f"Module {module.__class__.__name__} generated its part of the documentation."))
-            self.logger.log(InfoLog(f"Module Output: {module_result}", level=2))
+                module_result = module.generate(info, model)
+                self.add_module_result(doc_head, i, module, module_result)
             progress.update_task()
         progress.remove_subtask()
 
         return doc_head
 
+    async def async_generate_doc(self, info: dict, model: AsyncModel, progress: BaseProgress, stream: bool = False,
+                                 batcher: PromptBatcher | None = None) -> DocHeadSchema:
+        """Modules run concurrently, their parts are added in module order."""
+        doc_head = DocHeadSchema()
+        progress.create_new_subtask("Generate parts", len(self.modules))
+
+        batch_prompts = self.get_batch_prompts(info) if batcher is not None else {}
+
+        async def run_batch(task: str, group: list[int]) -> dict[int, str]:
+            results = await batcher.async_ask_many([batch_prompts[i] for i in group], model, task) # type: ignore
+            for _ in results:
+                progress.update_task()
+            return dict(zip(group, results))
+
+        async def run_module(module: BaseModule) -> tuple[str, dict[str, str] | None]:
+            if stream:
+                result = await self.async_read_stream(module, module.async_stream(info, model))
+            else:
+                result = await module.async_generate(info, model), None
+            progress.update_task()
+            return result
+
+        others = [i for i in range(len(self.modules)) if i not in batch_prompts]
+        groups = self.group_by_task(batch_prompts)
+        results = await asyncio.gather(*[run_batch(task, group) for task, group in groups.items()],
+                                       *[run_module(self.modules[i]) for i in others])
+        module_results: dict[int, tuple[str, dict[str, str] | None]] = dict(zip(others, results[len(groups):]))
+        for batched in results[:len(groups)]:
+            module_results.update({i: (result, None) for i, result in batched.items()}) # type: ignore
+
+        for i, module in enumerate(self.modules):
+            module_result, splited_result = module_results[i]
+            self.add_module_result(doc_head, i, module, module_result, splited_result)
+        progress.remove_subtask()
+
+        return doc_head
@@ -1,6 +1,6 @@
 from ..base_factory import BaseModule
-from ...engine.models.model import Model
-from ...postprocessor.custom_intro import generete_custom_discription, generete_custom_discription_without
+from ...engine.models.model import Model, AsyncModel
+from ...postprocessor.custom_intro import generete_custom_discription, generete_custom_discription_without, async_generete_custom_discription, async_generete_custom_discription_without, get_custom_discription_without_prompt
 from ...preprocessor.spliter import split_data
 
 class CustomModule(BaseModule):
@@ -10,7 +10,11 @@ class CustomModule(BaseModule):
         self.discription = discription  
 
     def generate(self, info: dict, model: Model):
-        result = generete_custom_discription(split_data(info.get("code_mix"), max_symbols=5000), model, self.discription, info.get("language"))
+        result = generete_custom_discription(split_data(info.get("code_mix"), max_symbols=5000, token_counter=model.token_counter), model, self.discription, info.get("language"))
+        return result
+
+    async def async_generate(self, info: dict, model: AsyncModel):
+        result = await async_generete_custom_discription(split_data(info.get("code_mix"), max_symbols=5000, token_counter=model.token_counter), model, self.discription, info.get("language"))
         return result
     
 class CustomModuleWithOutContext(BaseModule):
@@ -21,4 +25,17 @@ class CustomModuleWithOutContext(BaseModule):
 
     def generate(self, info: dict, model: Model):
         result = generete_custom_discription_without(model, self.discription, info.get("language"))
-        return result
\ No newline at end of file
+        return result
+
+    async def async_generate(self, info: dict, model: AsyncModel):
+        result = await async_generete_custom_discription_without(model, self.discription, info.get("language"))
+        return result
+
+    def stream(self, info: dict, model: Model):
+        return model.stream_answer_without_history(get_custom_discription_without_prompt(self.discription, info.get("language")), task=self.task)
+
+    def async_stream(self, info: dict, model: AsyncModel):
+        return model.stream_answer_without_history(get_custom_discription_without_prompt(self.discription, info.get("language")), task=self.task)
+
+    def get_batch_prompt(self, info: dict) -> list[dict[str, str]]:
+        return get_custom_discription_without_prompt(self.discription, info.get("language"))
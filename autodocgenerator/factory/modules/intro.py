@@ -1,17 +1,51 @@
-from ...engine.models.model import Model
+from ...engine.models.model import Model, AsyncModel
 from ..base_factory import BaseModule
-from ...postprocessor.custom_intro import get_all_html_links, get_links_intro, get_introdaction
+from ...postprocessor.custom_intro import get_all_html_links, get_links_intro, get_introdaction, async_get_links_intro, async_get_introdaction, get_links_intro_prompt, get_introdaction_prompt
 
 
 class IntroLinks(BaseModule):
+    task = "intro"
+
     def generate(self, info: dict, model: Model):
         links = get_all_html_links(info.get("full_data"))
         intro_links = get_links_intro(links, model, info.get("language"))
 
         return intro_links
 
+    async def async_generate(self, info: dict, model: AsyncModel):
+        links = get_all_html_links(info.get("full_data"))
+        intro_links = await async_get_links_intro(links, model, info.get("language"))
+
+        return intro_links
+
+    def stream(self, info: dict, model: Model):
+        links = get_all_html_links(info.get("full_data"))
+        return model.stream_answer_without_history(get_links_intro_prompt(links, info.get("language")), task=self.task)
+
+    def async_stream(self, info: dict, model: AsyncModel):
+        links = get_all_html_links(info.get("full_data"))
+        return model.stream_answer_without_history(get_links_intro_prompt(links, info.get("language")), task=self.task)
+
+    def get_batch_prompt(self, info: dict) -> list[dict[str, str]]:
+        return get_links_intro_prompt(get_all_html_links(info.get("full_data")), info.get("language"))
+
 
 class IntroText(BaseModule):
+    task = "intro"
+
     def generate(self, info: dict, model: Model):
         intro = get_introdaction(info.get("global_info"), model, info.get("language"))
         return intro
+
+    async def async_generate(self, info: dict, model: AsyncModel):
+        intro = await async_get_introdaction(info.get("global_info"), model, info.get("language"))
+        return intro
+
+    def stream(self, info: dict, model: Model):
+        return model.stream_answer_without_history(get_introdaction_prompt(info.get("global_info"), info.get("language")), task=self.task)
+
+    def async_stream(self, info: dict, model: AsyncModel):
+        return model.stream_answer_without_history(get_introdaction_prompt(info.get("global_info"), info.get("language")), task=self.task)
+
+    def get_batch_prompt(self, info: dict) -> list[dict[str, str]]:
+        return get_introdaction_prompt(info.get("global_info"), info.get("language"))
@@ -1,17 +1,31 @@
-from .preprocessor.spliter import split_data, gen_doc_parts
-from .preprocessor.compressor import compress_to_one
-from .engine.models.model import Model
+from .preprocessor.spliter import split_data, gen_doc_parts, async_gen_doc_parts
+from .preprocessor.compressor import compress_to_one, async_compress_to_one
+from .engine.models.model import Model, AsyncModel
+from .engine.models.client_pool import ClientPool, close_async_clients_after
+from .engine.models.scheduler import RequestScheduler
+from .engine.models.budget import OutputBudgetController
+from .engine.models.cached_model import ResponseCache, CachedModel, AsyncCachedModel
+from .engine.models.batcher import PromptBatcher
+from .engine.models.router import ModelRouter, RoutedModel, AsyncRoutedModel, TierStats, log_tier_stats
+from .engine.models.hedging import HedgedModel, AsyncHedgedModel, HedgeStats, log_hedge_stats
+import asyncio
 import os
 from .preprocessor.code_mix import CodeMix
+from .preprocessor.code_mix_file import CodeMixFile
+from .preprocessor.snapshot_cache import SnapshotCache
+from .preprocessor.admission import AdmissionPolicy
+from .preprocessor.doc_part_cache import DocPartCache
+from .preprocessor.merkle_compressor import MerkleCompressor, split_leaves
+from .preprocessor.compress_planner import CompressPlanner, adaptive_compress_to_one, async_adaptive_compress_to_one
 from .factory.base_factory import DocFactory
 from .ui.progress_base import BaseProgress
 from .ui.logging import BaseLogger, InfoLog, ErrorLog, WarningLog, FileLoggerTemplate
-from .postprocessor.sorting import get_order, split_text_by_anchors
+from .postprocessor.sorting import get_order, async_get_order, split_text_by_anchors, AnchorStreamParser
 from .config.config import Config
 from .schema.doc_schema import DocContent, DocHeadSchema, DocInfoSchema
 from .schema.cache_settings import CacheSettings, CheckGitStatusResultSchema
-from .postprocessor.embedding import Embedding
-from .preprocessor.checker import have_to_change
+from .postprocessor.embedding import Embedding, AsyncEmbedding
+from .preprocessor.checker import have_to_change, async_have_to_change
 
 import json
 
@@ -24,6 +38,7 @@ class Manager:
         "logs": "report.txt",
         "output_doc": "output_doc.md",
         "info": "info.json",
+        "doc_parts_stream": "doc_parts_stream.md",
         ".auto_doc_cache_file": ".auto_doc_cache_file.json"
     }
 
@@ -32,16 +47,28 @@ class Manager:
                  config: Config, 
                  llm_model: Model,
                  embedding_model: Embedding,
-                 progress_bar: BaseProgress = BaseProgress()):
+                 progress_bar: BaseProgress = BaseProgress(),
+                 async_llm_model: AsyncModel | None = None):
         
     
         self.doc_info = DocInfoSchema()
+        self.code_mix_file: CodeMixFile | None = None
+        self.changed_files: dict[str, str] = {}
         self.config = config
 
         self.project_directory = project_directory
         self.progress_bar = progress_bar
 
-        self.llm_model = llm_model
+        self.response_cache = self.get_response_cache()
+        self.batcher = self.get_batcher()
+        self.tier_stats: dict[str, TierStats] = {}
+        self.hedge_stats = HedgeStats()
+        self.llm_model = self.wrap_model(llm_model)
+        # AsyncManager passes one model as both, wrap it once so the router, hedges and cache share their stats
+        if async_llm_model is llm_model:
+            self.async_llm_model = self.llm_model
+        else:
+            self.async_llm_model = self.wrap_model(async_llm_model) if async_llm_model is not None else None
         self.embedding_model = embedding_model
 
         self.logger = BaseLogger()
@@ -50,6 +77,42 @@ class Manager:
         self.init_folder_system(self.project_directory)
 
     
+    def get_response_cache(self) -> ResponseCache | None:
+        if not self.config.pbc.use_response_cache:
+            return None
+        return ResponseCache(os.path.join(self.project_directory, self.CACHE_FOLDER_NAME, ResponseCache.FILE_NAME),
+                             max_entries=self.config.pbc.response_cache_size, ttl=self.config.pbc.response_cache_ttl)
+
+    def get_batcher(self) -> PromptBatcher | None:
+        if not self.config.pbc.batch_small_prompts:
+            return None
+        return PromptBatcher(self.config.pbc.max_batch_prompts, self.config.pbc.max_batch_tokens)
+
+    def run_async(self, coro):
+        """asyncio.run for the concurrent stages, the async clients of the pool are closed before its loop ends."""
+        return asyncio.run(close_async_clients_after(coro))
+
+    def hedge_model(self, model):
+        if not self.config.pbc.hedge_requests:
+            return model
+        pbc = self.config.pbc
+        hedged_class = AsyncHedgedModel if isinstance(model, AsyncModel) else HedgedModel
+        return hedged_class(model, self.hedge_stats, pbc.hedge_percentile, pbc.hedge_min_samples, pbc.hedge_window)
+
+    def wrap_model(self, model):
+        if self.config.model_routing.enabled:
+            router = ModelRouter(self.config.model_routing, model, self.tier_stats)
+            router.models = {tier: self.hedge_model(el) for tier, el in router.models.items()}
+            model = self.hedge_model(model)
+            model = AsyncRoutedModel(model, router) if isinstance(model, AsyncModel) else RoutedModel(model, router)
+        else:
+            model = self.hedge_model(model)
+        if self.response_cache is None:
+            return model
+        if isinstance(model, AsyncModel):
+            return AsyncCachedModel(model, self.response_cache)
+        return CachedModel(model, self.response_cache)
+
     def init_folder_system(self, project_directory):
         cache_path = os.path.join(project_directory, self.CACHE_FOLDER_NAME)
 
@@ -78,49 +141,182 @@ class Manager:
 
     def generate_code_file(self):
         self.logger.log(InfoLog("Starting code mix generation..."))
-        cm = CodeMix(self.project_directory, self.config.ignore_files)
-        code_mix = cm.build_repo_content()
+        snapshot_cache = None
+        if self.config.pbc.use_snapshot_cache:
+            snapshot_cache = SnapshotCache(os.path.join(self.project_directory, self.CACHE_FOLDER_NAME))
+
+        admission = None
+        if self.config.admission_settings.enabled:
+            admission = AdmissionPolicy(self.config.admission_settings)
+
+        cm = CodeMix(self.project_directory, self.config.get_ignore_matcher(),
+                     snapshot_cache=snapshot_cache, read_workers=self.config.pbc.read_workers,
+                     admission=admission)
+        if self.config.pbc.streaming_code_mix:
+            self.code_mix_file = cm.write_repo_content(self.get_file_path("code_mix"))
+            self.doc_info.code_mix = ""
+            self.logger.log(InfoLog(f"Code mix streamed to {self.code_mix_file.file_path} ({self.code_mix_file.size} bytes)."))
+        else:
+            self.doc_info.code_mix = cm.build_repo_content()
+
+        if snapshot_cache is not None:
+            snapshot_cache.save()
+            self.changed_files = snapshot_cache.changes
+            self.logger.log(InfoLog(f"Changed files since last snapshot: {snapshot_cache.changed_files}", level=1))
 
         self.logger.log(InfoLog("Code mix generation completed."))
-        self.doc_info.code_mix = code_mix
         self.progress_bar.update_task()
 
-    def generate_global_info(self, compress_power: int = 4, max_symbols: int = 10000, is_reusable: bool = False):
-        if is_reusable:
-            if self.cache_settings.doc.global_info != "":
-                self.doc_info.global_info = self.cache_settings.doc.global_info
-                self.progress_bar.update_task()
-
-                return
-
-        full_code_mix = self.doc_info.code_mix
-        data = split_data(full_code_mix, max_symbols)
-
-        global_result = compress_to_one(data, self.llm_model, self.config.get_project_settings(), compress_power=compress_power, progress_bar=self.progress_bar)
+    def get_code_mix(self) -> str | CodeMixFile:
+        if self.code_mix_file is not None:
+            return self.code_mix_file
+        return self.doc_info.code_mix
+
+    def generate_global_info(self, compress_power: int = 4, max_symbols: int = 10000, is_reusable: bool = False,
+                             concurrent: bool = False, max_concurrency: int = 4):
+        if self.reuse_global_info(is_reusable):
+            return
+
+        full_code_mix = self.get_code_mix()
+        if concurrent and self.async_llm_model is None:
+            self.logger.log(WarningLog("Concurrent global info requested but no async model is set, falling back to synchronous mode."))
+            concurrent = False
+
+        if self.config.pbc.incremental_global_info:
+            global_result = self.generate_incremental_global_info(full_code_mix, compress_power, max_symbols, concurrent, max_concurrency)
+        elif self.config.pbc.adaptive_compression:
+            data = split_data(full_code_mix, max_symbols, self.llm_model.token_counter)
+            planner = self.get_compress_planner()
+            self.logger.log(InfoLog(planner.report([planner.token_counter.count(el) for el in data], compress_power)))
+            if concurrent:
+                global_result = self.run_async(async_adaptive_compress_to_one(data, self.async_llm_model, self.config.get_project_settings(),
+                                                                              planner, progress_bar=self.progress_bar,
+                                                                              max_concurrency=max_concurrency))
+            else:
+                global_result = adaptive_compress_to_one(data, self.llm_model, self.config.get_project_settings(), planner,
+                                                         progress_bar=self.progress_bar)
+        elif concurrent:
+            data = split_data(full_code_mix, max_symbols, self.llm_model.token_counter)
+            global_result = self.run_async(async_compress_to_one(data, self.async_llm_model, self.config.get_project_settings(),
+                                                                 compress_power=compress_power, progress_bar=self.progress_bar,
+                                                                 max_concurrency=max_concurrency))
+        else:
+            data = split_data(full_code_mix, max_symbols, self.llm_model.token_counter)
+            global_result = compress_to_one(data, self.llm_model, self.config.get_project_settings(), compress_power=compress_power, progress_bar=self.progress_bar)
         self.doc_info.global_info = global_result
 
         self.progress_bar.update_task()
 
-    def generete_doc_parts(self, max_symbols=5_000, with_global_file: bool = False):
-        full_code_mix = self.doc_info.code_mix
+    def reuse_global_info(self, is_reusable: bool) -> bool:
+        if is_reusable and self.cache_settings.doc.global_info != "":
+            self.doc_info.global_info = self.cache_settings.doc.global_info
+            self.progress_bar.update_task()
+            return True
+        return False
+
+    def get_compress_planner(self) -> CompressPlanner:
+        return CompressPlanner(self.llm_model.token_counter, self.config.get_project_settings(), self.llm_model,
+                               target_tokens=self.config.pbc.global_info_target_tokens,
+                               max_power=self.config.pbc.max_compress_power,
+                               max_input_tokens=self.config.pbc.max_compress_input_tokens)
+
+    def plan_global_info(self, compress_power: int = 4, max_symbols: int = 10000) -> str:
+        """Dry run: returns the planned compression tree without sending any request."""
+        data = split_data(self.get_code_mix(), max_symbols, self.llm_model.token_counter)
+        planner = self.get_compress_planner()
+        report = planner.report([planner.token_counter.count(el) for el in data], compress_power)
+        self.logger.log(InfoLog(report))
+        return report
+
+    def generate_incremental_global_info(self, full_code_mix: str | CodeMixFile, compress_power: int, max_symbols: int,
+                                         concurrent: bool, max_concurrency: int) -> str:
+        merkle_compressor = MerkleCompressor(os.path.join(self.project_directory, self.CACHE_FOLDER_NAME, MerkleCompressor.FILE_NAME))
+        leaves = split_leaves(full_code_mix, max_symbols, self.llm_model.token_counter)
+
+        if concurrent:
+            global_result = self.run_async(merkle_compressor.async_compress_to_one(leaves, self.async_llm_model, self.config.get_project_settings(),
+                                                                                   compress_power=compress_power, progress_bar=self.progress_bar,
+                                                                                   max_concurrency=max_concurrency))
+        else:
+            global_result = merkle_compressor.compress_to_one(leaves, self.llm_model, self.config.get_project_settings(),
+                                                              compress_power=compress_power, progress_bar=self.progress_bar)
+
+        merkle_compressor.save()
+        return global_result
+
+    def generete_doc_parts(self, max_symbols=5_000, with_global_file: bool = False, structural_chunking: bool = False,
+                           concurrent: bool = False, max_concurrency: int = 4):
+        full_code_mix = self.get_code_mix()
         global_file = self.doc_info.global_info if with_global_file else None
 
-        self.logger.log(InfoLog("Starting synchronous documentation generation by parts..."))
-        result = gen_doc_parts(full_code_mix,
-                                max_symbols, self.llm_model, self.config.get_project_settings(),
-                                self.config.language, self.progress_bar, global_info=global_file)
+        if concurrent and self.async_llm_model is None:
+            self.logger.log(WarningLog("Concurrent doc parts requested but no async model is set, falling back to synchronous mode."))
+            concurrent = False
+
+        doc_cache = self.get_doc_cache()
+        if concurrent:
+            self.logger.log(InfoLog("Starting concurrent documentation generation by parts..."))
+            result = self.run_async(async_gen_doc_parts(full_code_mix,
+                                                        max_symbols, self.async_llm_model, self.config.get_project_settings(),
+                                                        self.config.language, self.progress_bar, global_info=global_file,
+                                                        structural=structural_chunking, max_concurrency=max_concurrency,
+                                                        doc_cache=doc_cache, prompt_budget=self.config.pbc.prompt_token_budget))
+        elif self.config.pbc.stream_answers:
+            self.logger.log(InfoLog("Starting streamed documentation generation by parts..."))
+            result = self.stream_doc_parts(full_code_mix, max_symbols, global_file, structural_chunking, doc_cache)
+        else:
+            self.logger.log(InfoLog("Starting synchronous documentation generation by parts..."))
+            result = gen_doc_parts(full_code_mix,
+                                    max_symbols, self.llm_model, self.config.get_project_settings(),
+                                    self.config.language, self.progress_bar, global_info=global_file,
+                                    structural=structural_chunking, doc_cache=doc_cache,
+                                    prompt_budget=self.config.pbc.prompt_token_budget)
+
+        self.add_doc_parts(result, doc_cache)
+
+    def stream_doc_parts(self, full_code_mix, max_symbols: int, global_file: str | None, structural_chunking: bool,
+                         doc_cache: DocPartCache | None) -> str:
+        """Answers are written to doc_parts_stream.md as they arrive and finished sections are reported right away."""
+        parser = AnchorStreamParser()
+        with open(self.get_file_path("doc_parts_stream"), "w", encoding="utf-8") as file:
+            def on_delta(delta: str):
+                file.write(delta)
+                file.flush()
+                for link, _ in parser.feed(delta):
+                    self.logger.log(InfoLog(f"Documentation section {link} is ready."))
+
+            result = gen_doc_parts(full_code_mix,
+                                   max_symbols, self.llm_model, self.config.get_project_settings(),
+                                   self.config.language, self.progress_bar, global_info=global_file,
+                                   structural=structural_chunking, doc_cache=doc_cache, on_delta=on_delta,
+                                   prompt_budget=self.config.pbc.prompt_token_budget)
+
+        for link, _ in parser.finish():
+            self.logger.log(InfoLog(f"Documentation section {link} is ready."))
+        return result
+
+    def get_doc_cache(self) -> DocPartCache | None:
+        if not self.config.pbc.use_doc_part_cache:
+            return None
+        return DocPartCache(os.path.join(self.project_directory, self.CACHE_FOLDER_NAME, DocPartCache.FILE_NAME),
+                            max_entries=self.config.pbc.doc_part_cache_size)
+
+    def add_doc_parts(self, result: str, doc_cache: DocPartCache | None = None):
+        if doc_cache is not None:
+            doc_cache.save()
+            doc_cache.log_stats()
         
-        result = split_text_by_anchors(result)
+        splited_result = split_text_by_anchors(result)
         
-        for el in result:
-            self.doc_info.doc.add_parts(el, DocContent(content=result[el]))
+        for el in splited_result:
+            self.doc_info.doc.add_parts(el, DocContent(content=splited_result[el]))
 
         self.logger.log(InfoLog("Documentation generation by parts completed."))
         self.progress_bar.update_task()
 
-    def factory_generate_doc(self, doc_factory: DocFactory, to_start: bool = False): 
+    def get_factory_info(self, doc_factory: DocFactory) -> dict:
         curr_doc = self.doc_info.doc.get_full_doc()
-        code_mix = self.doc_info.code_mix
+        code_mix = self.get_code_mix()
         global_info = self.doc_info.global_info
 
 
@@ -135,8 +331,15 @@ class Manager:
                                 {" ".join([type(module).__name__ for module in doc_factory.modules])} \n
                                 Input params: {" ".join([f"{key}" for key, value in info.items()])}
                                 """))
+        return info
+
+    def factory_generate_doc(self, doc_factory: DocFactory, to_start: bool = False): 
+        info = self.get_factory_info(doc_factory)
+        result = doc_factory.generate_doc(info, self.llm_model, self.progress_bar, stream=self.config.pbc.stream_answers,
+                                          batcher=self.batcher)
+        self.add_factory_result(result, to_start)
 
-        result = doc_factory.generate_doc(info, self.llm_model, self.progress_bar)
+    def add_factory_result(self, result: DocHeadSchema, to_start: bool = False):
         self.logger.log(InfoLog("Factory documentation generation completed."))
         if to_start:
             self.doc_info.doc = result + self.doc_info.doc
@@ -165,9 +368,105 @@ class Manager:
         self.doc_info = DocInfoSchema.model_validate_json(self.read_file_by_file_key(".auto_doc_cache_file", is_outside=True))
 
     def save(self) -> None:
+        ClientPool().log_stats()
+        RequestScheduler().log_stats()
+        OutputBudgetController().log_stats()
+        if self.response_cache is not None:
+            self.response_cache.save()
+            self.response_cache.log_stats()
+        if self.batcher is not None:
+            self.batcher.log_stats()
+        log_tier_stats(self.tier_stats)
+        log_hedge_stats(self.hedge_stats)
         with open(self.get_file_path("output_doc"), "w", encoding="utf-8") as file:
             file.write(self.doc_info.doc.get_full_doc())
 
         self.cache_settings.doc = self.doc_info
         with open(self.get_file_path(".auto_doc_cache_file", is_outside=True), "w", encoding="utf-8") as file:
-            file.write(self.cache_settings.model_dump_json())
\ No newline at end of file
+            file.write(self.cache_settings.model_dump_json())
+
+
+class AsyncManager(Manager):
+    """
+    Same pipeline as Manager, but every stage that talks to a model awaits an AsyncModel / AsyncEmbedding,
+    so all requests of a stage share one event loop. max_concurrency limits requests in flight per stage.
+    """
+
+    def __init__(self, project_directory: str, 
+                 config: Config, 
+                 llm_model: AsyncModel,
+                 embedding_model: AsyncEmbedding,
+                 progress_bar: BaseProgress = BaseProgress(),
+                 max_concurrency: int = 16):
+        super().__init__(project_directory, config, llm_model, embedding_model, progress_bar, async_llm_model=llm_model) # type: ignore
+        self.max_concurrency = max_concurrency
+
+    async def close(self):
+        """Closes the async clients of the pool bound to the running event loop, await it at the end of the run."""
+        await ClientPool().aclose_async()
+
+    async def generate_code_file(self):
+        await asyncio.to_thread(super().generate_code_file)
+
+    async def generate_global_info(self, compress_power: int = 4, max_symbols: int = 10000, is_reusable: bool = False):
+        if self.reuse_global_info(is_reusable):
+            return
+
+        full_code_mix = self.get_code_mix()
+        project_settings = self.config.get_project_settings()
+        if self.config.pbc.incremental_global_info:
+            merkle_compressor = MerkleCompressor(os.path.join(self.project_directory, self.CACHE_FOLDER_NAME, MerkleCompressor.FILE_NAME))
+            leaves = split_leaves(full_code_mix, max_symbols, self.llm_model.token_counter)
+            global_result = await merkle_compressor.async_compress_to_one(leaves, self.llm_model, project_settings, # type: ignore
+                                                                          compress_power=compress_power, progress_bar=self.progress_bar,
+                                                                          max_concurrency=self.max_concurrency)
+            merkle_compressor.save()
+        elif self.config.pbc.adaptive_compression:
+            data = split_data(full_code_mix, max_symbols, self.llm_model.token_counter)
+            planner = self.get_compress_planner()
+            self.logger.log(InfoLog(planner.report([planner.token_counter.count(el) for el in data], compress_power)))
+            global_result = await async_adaptive_compress_to_one(data, self.llm_model, project_settings, planner, # type: ignore
+                                                                 progress_bar=self.progress_bar, max_concurrency=self.max_concurrency)
+        else:
+            data = split_data(full_code_mix, max_symbols, self.llm_model.token_counter)
+            global_result = await async_compress_to_one(data, self.llm_model, project_settings, compress_power=compress_power, # type: ignore
+                                                        progress_bar=self.progress_bar, max_concurrency=self.max_concurrency)
+
+        self.doc_info.global_info = global_result
+        self.progress_bar.update_task()
+
+    async def generete_doc_parts(self, max_symbols=5_000, with_global_file: bool = False, structural_chunking: bool = False):
+        full_code_mix = self.get_code_mix()
+        global_file = self.doc_info.global_info if with_global_file else None
+        doc_cache = self.get_doc_cache()
+
+        self.logger.log(InfoLog("Starting asynchronous documentation generation by parts..."))
+        result = await async_gen_doc_parts(full_code_mix,
+                                           max_symbols, self.llm_model, self.config.get_project_settings(), # type: ignore
+                                           self.config.language, self.progress_bar, global_info=global_file,
+                                           structural=structural_chunking, max_concurrency=self.max_concurrency,
+                                           doc_cache=doc_cache, prompt_budget=self.config.pbc.prompt_token_budget)
+        self.add_doc_parts(result, doc_cache)
+
+    async def factory_generate_doc(self, doc_factory: DocFactory, to_start: bool = False):
+        info = self.get_factory_info(doc_factory)
+        result = await doc_factory.async_generate_doc(info, self.llm_model, self.progress_bar, # type: ignore
+                                                      stream=self.config.pbc.stream_answers, batcher=self.batcher)
+        self.add_factory_result(result, to_start)
+
+    async def check_sense_changes(self, changes: list[dict[str, str]]) -> CheckGitStatusResultSchema:
+        result = await async_have_to_change(self.llm_model, changes, self.cache_settings.doc.global_info) # type: ignore
+        return result
+
+    async def create_embedding_layer(self) -> None:
+        semaphore = asyncio.Semaphore(max(1, self.max_concurrency))
+
+        async def init_embedding(part: DocContent):
+            async with semaphore:
+                await part.async_init_embedding(self.embedding_model) # type: ignore
+
+        await asyncio.gather(*[init_embedding(part) for part in self.doc_info.doc.parts.values()])
+
+    async def order_doc(self):
+        result = await async_get_order(self.llm_model, self.doc_info.doc.content_orders) # type: ignore
+        self.doc_info.doc.content_orders = result
@@ -1,5 +1,5 @@
 from ..engine.models.gpt_model import GPTModel
-from ..engine.models.model import Model 
+from ..engine.models.model import Model, AsyncModel
 from ..engine.config.config import BASE_INTRODACTION_CREATE_LINKS, BASE_INTRO_CREATE, BASE_CUSTOM_DISCRIPTIONS
 from ..ui.logging import InfoLog, BaseLogger
 import re
@@ -25,10 +25,8 @@ def get_all_html_links(data: str) -> list[str]:
     logger.log(InfoLog(f"Links: {links}", level=1))
     return links
 
-def get_links_intro(links: list[str], model: Model, language: str = "en"):
-    logger = BaseLogger()
-
-    prompt = [
+def get_links_intro_prompt(links: list[str], language: str = "en") -> list[dict[str, str]]:
+    return [
         {
             "role": "system",
             "content": f"For the following task use language {language}"
@@ -42,14 +40,25 @@ def get_links_intro(links: list[str], model: Model, language: str = "en"):
             "content": str(links)
         }
     ]
+
+def get_links_intro(links: list[str], model: Model, language: str = "en"):
+    logger = BaseLogger()
     logger.log(InfoLog("Generating introduction with links..."))
-    intro_links = model.get_answer_without_history(prompt=prompt)
+    intro_links = model.get_answer_without_history(prompt=get_links_intro_prompt(links, language), task="intro")
     logger.log(InfoLog("Introduction with links generated."))
     logger.log(InfoLog(f"Introduction Links: {intro_links}", level=1))
     return intro_links
 
-def get_introdaction(global_data: str, model: Model, language: str = "en") -> str:
-    prompt = [
+async def async_get_links_intro(links: list[str], model: AsyncModel, language: str = "en"):
+    logger = BaseLogger()
+    logger.log(InfoLog("Generating introduction with links..."))
+    intro_links = await model.get_answer_without_history(prompt=get_links_intro_prompt(links, language), task="intro")
+    logger.log(InfoLog("Introduction with links generated."))
+    logger.log(InfoLog(f"Introduction Links: {intro_links}", level=1))
+    return intro_links
+
+def get_introdaction_prompt(global_data: str, language: str = "en") -> list[dict[str, str]]:
+    return [
         {
             "role": "system",
             "content": f"For the following task use language {language}"
@@ -64,45 +73,63 @@ def get_introdaction(global_data: str, model: Model, language: str = "en") -> st
         }
     ]
 
-    intro = model.get_answer_without_history(prompt=prompt)
+def get_introdaction(global_data: str, model: Model, language: str = "en") -> str:
+    intro = model.get_answer_without_history(prompt=get_introdaction_prompt(global_data, language), task="intro")
+
+    return intro
+
+async def async_get_introdaction(global_data: str, model: AsyncModel, language: str = "en") -> str:
+    intro = await model.get_answer_without_history(prompt=get_introdaction_prompt(global_data, language), task="intro")
 
     return intro
 
+def get_custom_discription_prompt(sp_data: str, custom_description: str, language: str = "en") -> list[dict[str, str]]:
+    return [
+        {
+            "role": "system",
+            "content": f"For the following task use language {language}"
+        },
+        {
+            "role": "system",
+            "content": f"Act as a precise Technical Analyst. You will be provided with specific code or documentation. Your task is to describe or extract information based ONLY on the provided context"
+        },
+        {
+            "role": "system",
+            "content": f"### Context: {sp_data}"
+        },
+        {
+            "role": "system",
+            "content": BASE_CUSTOM_DISCRIPTIONS
+        },
+        {
+            "role": "user",
+            "content": f"### Task to discribe: {custom_description}"
+        }
+    ]
+
+def have_info(result: str) -> bool:
+    return (result.find("!noinfo") == -1 and result.find("No information found") == -1) or result.find("!noinfo") > 30
+
 def generete_custom_discription(splited_data: str, model: Model, custom_description: str, language: str = "en") -> str:
 
     for sp_data in splited_data:
+        result = model.get_answer_without_history(prompt=get_custom_discription_prompt(sp_data, custom_description, language), task="document")
+        if have_info(result):
+            break
+        result = ""
+    return result
+
+async def async_generete_custom_discription(splited_data: str, model: AsyncModel, custom_description: str, language: str = "en") -> str:
 
-        prompt = [
-            {
-                "role": "system",
-                "content": f"For the following task use language {language}"
-            },
-            {
-                "role": "system",
-                "content": f"Act as a precise Technical Analyst. You will be provided with specific code or documentation. Your task is to describe or extract information based ONLY on the provided context"
-            },
-            {
-                "role": "system",
-                "content": f"### Context: {sp_data}"
-            },
-            {
-                "role": "system",
-                "content": BASE_CUSTOM_DISCRIPTIONS
-            },
-            {
-                "role": "user",
-                "content": f"### Task to discribe: {custom_description}"
-            }
-        ]
-
-        result = model.get_answer_without_history(prompt=prompt)
-        if (result.find("!noinfo") == -1 and result.find("No information found") == -1) or result.find("!noinfo") > 30:
+    for sp_data in splited_data:
+        result = await model.get_answer_without_history(prompt=get_custom_discription_prompt(sp_data, custom_description, language), task="document")
+        if have_info(result):
             break
         result = ""
     return result
 
-def generete_custom_discription_without(model: Model, custom_description: str, language: str = "en") -> str:
-    prompt = [
+def get_custom_discription_without_prompt(custom_description: str, language: str = "en") -> list[dict[str, str]]:
+    return [
          {
             "role": "system",
             "content": f"For the following task use language {language}"
@@ -127,6 +154,11 @@ This tag must appear ONLY ONCE at the very beginning. Never repeat it or use oth
         }
     ]
 
-    result = model.get_answer_without_history(prompt=prompt)
+def generete_custom_discription_without(model: Model, custom_description: str, language: str = "en") -> str:
+    result = model.get_answer_without_history(prompt=get_custom_discription_without_prompt(custom_description, language), task="document")
+    return result
+
+async def async_generete_custom_discription_without(model: AsyncModel, custom_description: str, language: str = "en") -> str:
+    result = await model.get_answer_without_history(prompt=get_custom_discription_without_prompt(custom_description, language), task="document")
     return result
 
@@ -1,5 +1,5 @@
 import re
-from ..engine.models.model import Model
+from ..engine.models.model import Model, AsyncModel
 from ..ui.logging import BaseLogger, InfoLog, WarningLog, ErrorLog
 
 def extract_links_from_start(chunks) -> tuple[list[str], bool]:
@@ -43,13 +43,50 @@ def split_text_by_anchors(text: str) -> dict[str, str]:
     return result
 
 
-def get_order(model: Model, chanks: list[str]) -> list:
-    logger = BaseLogger()
-    logger.log(InfoLog("Start ordering"))
-    logger.log(InfoLog(f"chanks name: {chanks}", level=1))
-
-
-    prompt = [ #TODO tranport promt to prompts
+class AnchorStreamParser:
+    """
+    Incremental split_text_by_anchors: feed the answer as it arrives and get every (link, section) pair
+    as soon as the next anchor starts. Text in front of the first anchor is dropped.
+    """
+
+    ANCHOR_PATTERN = re.compile(r'<a name=["\']?[^"\'>\s]{6,200}["\']?></a>')
+    MAX_ANCHOR_LENGTH = 256
+
+    def __init__(self):
+        self.text = ""
+        self.section_start = 0
+        self.scan_from = 0
+        self.sections: dict[str, str] = {}
+
+    def _add_section(self, chunk: str, ready: list[tuple[str, str]]):
+        chunk = chunk.strip()
+        links, have_to_del_first = extract_links_from_start([chunk])
+        if not chunk or have_to_del_first:
+            return
+        self.sections[links[0]] = chunk
+        ready.append((links[0], chunk))
+
+    def feed(self, delta: str) -> list[tuple[str, str]]:
+        self.text += delta
+        ready: list[tuple[str, str]] = []
+        for match in self.ANCHOR_PATTERN.finditer(self.text, self.scan_from):
+            if match.start() > self.section_start:
+                self._add_section(self.text[self.section_start:match.start()], ready)
+            self.section_start = match.start()
+
+        # an anchor that is still arriving can only start in the last MAX_ANCHOR_LENGTH symbols
+        self.scan_from = max(self.section_start + 1, len(self.text) - self.MAX_ANCHOR_LENGTH)
+        return ready
+
+    def finish(self) -> list[tuple[str, str]]:
+        ready: list[tuple[str, str]] = []
+        self._add_section(self.text[self.section_start:], ready)
+        self.section_start = len(self.text)
+        return ready
+
+
+def get_order_prompt(chanks: list[str]) -> list[dict[str, str]]:
+    return [ #TODO tranport promt to prompts
         {
             "role": "user",
             "content": f"""Sort the following titles semantically (group related topics together). 
@@ -62,15 +99,32 @@ def get_order(model: Model, chanks: list[str]) -> list:
             """
         }
     ]
-    result = model.get_answer_without_history(prompt)
-    new_result = list(map(lambda x: x.strip(), result.split(",")))
-    logger.log(InfoLog(f"End ordering result list {new_result}"))
 
-    
-        
+
+def parse_order(result: str) -> list:
+    new_result = list(map(lambda x: x.strip(), result.split(",")))
+    BaseLogger().log(InfoLog(f"End ordering result list {new_result}"))
     return new_result
 
 
+def get_order(model: Model, chanks: list[str]) -> list:
+    logger = BaseLogger()
+    logger.log(InfoLog("Start ordering"))
+    logger.log(InfoLog(f"chanks name: {chanks}", level=1))
+
+    result = model.get_answer_without_history(get_order_prompt(chanks), task="order")
+    return parse_order(result)
+
+
+async def async_get_order(model: AsyncModel, chanks: list[str]) -> list:
+    logger = BaseLogger()
+    logger.log(InfoLog("Start ordering"))
+    logger.log(InfoLog(f"chanks name: {chanks}", level=1))
+
+    result = await model.get_answer_without_history(get_order_prompt(chanks), task="order")
+    return parse_order(result)
+
+
 if __name__ == "__main__":
     with open(r"C:\Users\huina\Python Projects\Impotant projects\AutoDocGenerateGimini\README.md", "r", encoding="utf-8") as file:
         data = file.read()
@@ -0,0 +1,122 @@
+import fnmatch
+import threading
+from typing import Any
+
+TEXT_CONTROL_BYTES = {7, 8, 9, 10, 12, 13, 27}
+COMMENT_PREFIXES = ("#", "//", "/*", "*", "--", ";", "%", "<!--", "<?", '"""', "'''")
+BLOCK_COMMENTS = {"/*": "*/", "<!--": "-->", '"""': '"""', "'''": "'''"}
+
+
+def get_header(text: str, max_lines: int) -> str:
+    """
+    Lowercased comment header of a file: the comment lines, block comments and docstrings before its first
+    line of code, looked for in the first max_lines lines.
+    """
+    header: list[str] = []
+    closing: str | None = None
+    for line in text.split("\n", max_lines)[:max_lines]:
+        stripped = line.strip()
+        if closing is not None:
+            header.append(stripped)
+            if closing in stripped:
+                closing = None
+            continue
+        if not stripped:
+            continue
+        if not stripped.startswith(COMMENT_PREFIXES):
+            break
+        header.append(stripped)
+        for opening, end in BLOCK_COMMENTS.items():
+            if stripped.startswith(opening) and end not in stripped[len(opening):]:
+                closing = end
+                break
+    return "\n".join(header).lower()
+
+
+class AdmissionSettings:
+    enabled = False
+    sniff_bytes = 8192
+    max_binary_ratio = 0.3
+    max_file_bytes = 1_000_000
+    max_total_bytes = 0
+    detect_generated = True
+    max_avg_line_length = 300
+    max_line_length = 5000
+    header_lines = 30
+    generated_markers = ["@generated", "do not edit", "code generated by", "autogenerated", "auto-generated",
+                         "this file is automatically generated"]
+    generated_file_names = ["*.min.js", "*.min.css", "*.map", "*.lock", "package-lock.json", "pnpm-lock.yaml",
+                            "yarn.lock", "poetry.lock", "Cargo.lock", "composer.lock", "Gemfile.lock", "go.sum"]
+
+    def load_settings(self, data: dict[str, Any]):
+        for key, el in data.items():
+            setattr(self, key, el)
+
+
+class FileRejected(Exception):
+    """Raised when a file does not pass the admission policy, the message is the reason."""
+    ...
+
+
+class AdmissionPolicy:
+    """
+    Cheap checks that decide if a file is worth sending to the model:
+    size caps, binary sniffing of the first bytes and generated/minified file heuristics.
+    Every rejection is remembered in self.skipped together with its reason.
+    """
+
+    def __init__(self, settings: AdmissionSettings):
+        self.settings = settings
+        self.total_bytes = 0
+        self.skipped: list[tuple[str, str]] = []
+        self._lock = threading.Lock()
+
+    def reject(self, path: str, reason: str):
+        with self._lock:
+            self.skipped.append((path, reason))
+        raise FileRejected(reason)
+
+    def check_name(self, path: str, name: str):
+        if not self.settings.detect_generated:
+            return
+        for pattern in self.settings.generated_file_names:
+            if fnmatch.fnmatch(name, pattern):
+                self.reject(path, f"generated file name ({pattern})")
+
+    def check_size(self, path: str, size: int):
+        if self.settings.max_file_bytes and size > self.settings.max_file_bytes:
+            self.reject(path, f"file size {size} bytes exceeds max_file_bytes {self.settings.max_file_bytes}")
+
+    def check_head(self, path: str, head: bytes):
+        sample = head[:self.settings.sniff_bytes]
+        if not sample:
+            return
+        if b"\x00" in sample:
+            self.reject(path, "binary content (NUL byte)")
+
+        non_text = sum(1 for byte in sample if byte < 32 and byte not in TEXT_CONTROL_BYTES)
+        if non_text / len(sample) > self.settings.max_binary_ratio:
+            self.reject(path, f"binary content ({non_text} control bytes in first {len(sample)})")
+
+    def check_text(self, path: str, text: str):
+        if not self.settings.detect_generated or not text:
+            return
+
+        header = get_header(text, self.settings.header_lines)
+        for marker in self.settings.generated_markers:
+            if marker in header:
+                self.reject(path, f"generated file header ({marker!r})")
+
+        lines = text.count("\n") + 1
+        longest = max(len(line) for line in text.split("\n")) if len(text) > self.settings.max_line_length else len(text)
+        if longest > self.settings.max_line_length:
+            self.reject(path, f"minified file (line of {longest} chars)")
+
+        if len(text) / lines > self.settings.max_avg_line_length:
+            self.reject(path, f"minified file (average line length {len(text) // lines} chars)")
+
+    def check_total(self, path: str, size: int):
+        """Must be called in output order so the total budget cut is deterministic."""
+        if self.settings.max_total_bytes and self.total_bytes + size > self.settings.max_total_bytes:
+            self.reject(path, f"total budget of {self.settings.max_total_bytes} bytes exhausted")
+        self.total_bytes += size
@@ -1,4 +1,4 @@
-from ..engine.models.model import ParentModel, Model
+from ..engine.models.model import ParentModel, Model, AsyncModel
 from ..engine.config.config import BASE_CHANGES_CHECK_PROMPT
 from ..schema.cache_settings import CheckGitStatusResultSchema
 
@@ -10,8 +10,8 @@ def parse_answer(answer: str) -> CheckGitStatusResultSchema:
 
     return CheckGitStatusResultSchema(need_to_remake=change_doc, remake_gl_file=change_global)
 
-def have_to_change(model: Model, diff: list[dict[str, str]], global_info: str | None = None) -> CheckGitStatusResultSchema:
-    prompt: list[dict[str, str]] = [
+def get_changes_prompt(diff: list[dict[str, str]], global_info: str | None = None) -> list[dict[str, str]]:
+    return [
         {
             "role": "system",
             "content": BASE_CHANGES_CHECK_PROMPT
@@ -26,6 +26,12 @@ def have_to_change(model: Model, diff: list[dict[str, str]], global_info: str |
         }
     ]
 
-    answer = model.get_answer_without_history(prompt)
+def have_to_change(model: Model, diff: list[dict[str, str]], global_info: str | None = None) -> CheckGitStatusResultSchema:
+    answer = model.get_answer_without_history(get_changes_prompt(diff, global_info), task="classify")
+
+    return parse_answer(answer)
+
+async def async_have_to_change(model: AsyncModel, diff: list[dict[str, str]], global_info: str | None = None) -> CheckGitStatusResultSchema:
+    answer = await model.get_answer_without_history(get_changes_prompt(diff, global_info), task="classify")
 
-    return parse_answer(answer)
\ No newline at end of file
+    return parse_answer(answer)
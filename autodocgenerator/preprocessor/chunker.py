@@ -0,0 +1,146 @@
+import re
+from typing import Callable, Iterator
+from .code_mix_file import CodeMixFile
+from ..engine.tokenizer import TokenCounter
+
+CHARS_PER_TOKEN = 4
+FILE_END_TAG = "</file>"
+FILE_PATH_PATTERN = re.compile(r'<file path="(.*?)">')
+
+
+def tokens_for_chars(chars: int) -> int:
+    return (chars + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def estimate_tokens(text: str) -> int:
+    return tokens_for_chars(len(text))
+
+
+def iter_segments(data: str | CodeMixFile) -> Iterator[str]:
+    """Splits a code mix after every </file> tag, the concatenation of the segments is the code mix itself."""
+    if isinstance(data, CodeMixFile):
+        yield from data.iter_segments()
+        return
+
+    start = 0
+    while start < len(data):
+        end = data.find(FILE_END_TAG, start)
+        end = len(data) if end == -1 else end + len(FILE_END_TAG)
+        yield data[start:end]
+        start = end
+
+
+class Chunk:
+    def __init__(self, start: int):
+        self.parts: list[str] = []
+        self.files: list[str] = []
+        self.file_ranges: dict[str, tuple[int, int]] = {}
+        self.byte_range: tuple[int, int] = (start, start)
+        self.tokens = 0
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    def add(self, text: str, tokens: int, size: int, file_path: str | None):
+        start = self.byte_range[1]
+        self.parts.append(text)
+        self.tokens += tokens
+        self.byte_range = (self.byte_range[0], start + size)
+
+        if file_path is not None:
+            if file_path not in self.file_ranges:
+                self.files.append(file_path)
+                self.file_ranges[file_path] = (start, start + size)
+            else:
+                self.file_ranges[file_path] = (self.file_ranges[file_path][0], start + size)
+
+
+class Chunker:
+    """
+    Linear, token budgeted replacement for the old split_data loop.
+    Whole files are packed into chunks of at most max_tokens estimated tokens,
+    files that do not fit into one chunk are split on line boundaries.
+    Chunk texts are exact slices of the input, so joining them gives the code mix back.
+    Without a token_counter tokens are estimated as chars / CHARS_PER_TOKEN.
+    If boundary(file_path) is true the chunk is closed after that file, which keeps
+    chunk borders stable when files before it change size.
+    """
+
+    def __init__(self, max_tokens: int, token_counter: TokenCounter | None = None,
+                 boundary: Callable[[str], bool] | None = None):
+        self.max_tokens = max(1, max_tokens)
+        self.token_counter = token_counter
+        self.boundary = boundary
+
+    def count_tokens(self, text: str) -> int:
+        if self.token_counter is None:
+            return estimate_tokens(text)
+        return self.token_counter.count(text)
+
+    def split_line(self, line: str, line_tokens: int) -> Iterator[tuple[str, int]]:
+        max_chars = max(1, len(line) * self.max_tokens // max(1, line_tokens))
+        start = 0
+        while start < len(line):
+            size = max_chars
+            part = line[start:start + size]
+            part_tokens = self.count_tokens(part)
+            while part_tokens > self.max_tokens and size > 1:
+                size //= 2
+                part = line[start:start + size]
+                part_tokens = self.count_tokens(part)
+            yield part, part_tokens
+            start += size
+
+    def split_by_lines(self, segment: str) -> Iterator[tuple[str, int]]:
+        piece: list[str] = []
+        piece_tokens = 0
+
+        for line in segment.splitlines(keepends=True):
+            line_tokens = self.count_tokens(line)
+            if line_tokens > self.max_tokens:
+                if piece:
+                    yield "".join(piece), piece_tokens
+                    piece, piece_tokens = [], 0
+                yield from self.split_line(line, line_tokens)
+                continue
+
+            if piece and piece_tokens + line_tokens > self.max_tokens:
+                yield "".join(piece), piece_tokens
+                piece, piece_tokens = [], 0
+
+            piece.append(line)
+            piece_tokens += line_tokens
+
+        if piece:
+            yield "".join(piece), piece_tokens
+
+    def iter_chunks(self, data: str | CodeMixFile) -> Iterator[Chunk]:
+        offset = 0
+        current = Chunk(offset)
+
+        for segment in iter_segments(data):
+            match = FILE_PATH_PATTERN.search(segment)
+            file_path = match.group(1) if match else None
+
+            segment_tokens = self.count_tokens(segment)
+            pieces = [(segment, segment_tokens)] if segment_tokens <= self.max_tokens else self.split_by_lines(segment)
+
+            for piece, piece_tokens in pieces:
+                if current.parts and current.tokens + piece_tokens > self.max_tokens:
+                    yield current
+                    current = Chunk(offset)
+
+                size = len(piece.encode("utf-8"))
+                current.add(piece, piece_tokens, size, file_path)
+                offset += size
+
+            if self.boundary is not None and file_path is not None and current.parts and self.boundary(file_path):
+                yield current
+                current = Chunk(offset)
+
+        if current.parts:
+            yield current
+
+    def split(self, data: str | CodeMixFile) -> list[Chunk]:
+        return list(self.iter_chunks(data))
@@ -1,52 +1,145 @@
 import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-import fnmatch
+from typing import Iterator
 from ..ui.logging import InfoLog, BaseLogger
+from .repo_walker import RepoWalker, RepoEntry
+from .ignore_matcher import IgnoreMatcher
+from .code_mix_file import CodeMixFile
+from .snapshot_cache import SnapshotCache, decode_text
+from .admission import AdmissionPolicy, FileRejected
 
 class CodeMix:
-    def __init__(self, root_dir=".", ignore_patterns=None):
+    def __init__(self, root_dir=".", ignore_patterns: list[str] | IgnoreMatcher | None = None,
+                 snapshot_cache: SnapshotCache | None = None, read_workers: int = 1,
+                 admission: AdmissionPolicy | None = None):
         self.root_dir = Path(root_dir).resolve()
-        self.ignore_patterns = ignore_patterns or []
+        self.snapshot_cache = snapshot_cache
+        self.admission = admission
+        self.read_workers = max(1, read_workers)
+        if isinstance(ignore_patterns, IgnoreMatcher):
+            self.ignore_matcher = ignore_patterns
+        else:
+            self.ignore_matcher = IgnoreMatcher(ignore_patterns or [])
+        self.ignore_patterns = self.ignore_matcher.patterns
         self.logger = BaseLogger()
 
     def should_ignore(self, path: str) -> bool:
         relative_path = path.relative_to(self.root_dir) # type: ignore
-        path_str = str(relative_path)
-        
-        for pattern in self.ignore_patterns:
-            if fnmatch.fnmatch(path_str, pattern) or \
-               fnmatch.fnmatch(os.path.basename(path_str), pattern) or \
-               any(fnmatch.fnmatch(p, pattern) for p in path.parts): # type: ignore
-                return True
-        return False
+        return self.ignore_matcher.is_ignored(relative_path.as_posix(), path.is_dir()) # type: ignore
 
-    def build_repo_content(self):
-        content = []
-        content.append("Repository Structure:")
-        
-        for path in sorted(self.root_dir.rglob("*")):
-            if self.should_ignore(path):
-                self.logger.log(InfoLog(f"Ignored: {path}", level=1))
-                continue
-            
-            depth = len(path.relative_to(self.root_dir).parts)
-            indent = "  " * (depth - 1)
-            name = f"{path.name}/" if path.is_dir() else path.name
-            content.append(f"{indent}{name}")
-        
-        content.append("\n" + "="*20 + "\n")
-
-        for path in sorted(self.root_dir.rglob("*")):
-            if path.is_file() and not self.should_ignore(path):
+    def should_ignore_entry(self, entry: RepoEntry) -> bool:
+        return self.ignore_matcher.match(entry.posix_path, entry.is_dir)
+
+    def read_entry(self, entry: RepoEntry) -> str:
+        if self.admission is None:
+            if self.snapshot_cache is not None:
+                return self.snapshot_cache.read_text(entry.path, entry.posix_path)
+            return Path(entry.path).read_text(encoding="utf-8", errors="ignore")
+
+        self.admission.check_name(entry.posix_path, entry.name)
+        self.admission.check_size(entry.posix_path, os.path.getsize(entry.path))
+
+        if self.snapshot_cache is not None:
+            raw = self.snapshot_cache.read_bytes(entry.path, entry.posix_path)
+            self.admission.check_head(entry.posix_path, raw)
+        else:
+            with open(entry.path, "rb") as file:
+                raw = file.read(self.admission.settings.sniff_bytes)
+                self.admission.check_head(entry.posix_path, raw)
+                raw += file.read()
+
+        entry.size = len(raw)
+        text = decode_text(raw)
+        self.admission.check_text(entry.posix_path, text)
+        return text
+
+    def _safe_read_entry(self, entry: RepoEntry) -> tuple[str | None, Exception | None]:
+        try:
+            return self.read_entry(entry), None
+        except Exception as e:
+            return None, e
+
+    def iter_read_results(self, files: list[RepoEntry]) -> Iterator[tuple[RepoEntry, str | None, Exception | None]]:
+        """
+        Reads files in the given order. With read_workers > 1 reading is done in a thread pool,
+        at most read_workers * 4 files are in flight and results are still yielded in input order.
+        """
+        if self.read_workers == 1:
+            for entry in files:
+                yield entry, *self._safe_read_entry(entry)
+            return
+
+        window = self.read_workers * 4
+        with ThreadPoolExecutor(max_workers=self.read_workers) as executor:
+            pending: deque[tuple[RepoEntry, Future]] = deque()
+            for entry in files:
+                pending.append((entry, executor.submit(self._safe_read_entry, entry)))
+                if len(pending) >= window:
+                    done_entry, future = pending.popleft()
+                    yield done_entry, *future.result()
+
+            while pending:
+                done_entry, future = pending.popleft()
+                yield done_entry, *future.result()
+
+    def iter_repo_content(self) -> Iterator[str]:
+        structure = ["Repository Structure:"]
+
+        files: list[RepoEntry] = []
+        walker = RepoWalker(str(self.root_dir), self.should_ignore_entry)
+        for entry in walker.walk():
+            indent = "  " * (entry.depth - 1)
+            name = f"{entry.name}/" if entry.is_dir else entry.name
+            structure.append(f"{indent}{name}")
+
+            if entry.is_file:
+                files.append(entry)
+
+        for entry in walker.ignored:
+            self.logger.log(InfoLog(f"Ignored: {entry.path}", level=1))
+
+        yield from structure
+        yield "\n" + "="*20 + "\n"
+
+        for entry, text, error in self.iter_read_results(files):
+            if self.admission is not None and error is None:
                 try:
-                    relative_path = path.relative_to(self.root_dir)
-                    content.append(f'<file path="{relative_path}">')
-                    content.append(path.read_text(encoding="utf-8", errors="ignore"))
-                    content.append("</file>\n")
-                except Exception as e:
-                    content.append(f"Error reading {path}: {e}")
-
-        return "\n".join(content)
+                    self.admission.check_total(entry.posix_path, entry.size)
+                except FileRejected as e:
+                    error = e
+
+            if isinstance(error, FileRejected):
+                self.logger.log(InfoLog(f"Skipped: {entry.path} ({error})", level=1))
+                continue
+
+            yield f'<file path="{entry.relative_path}">'
+            if error is not None:
+                yield f"Error reading {entry.path}: {error}"
+                continue
+            yield text # type: ignore
+            yield "</file>\n"
+
+    def build_repo_content(self):
+        result = "\n".join(self.iter_repo_content())
+        self.log_admission_summary()
+        return result
+
+    def log_admission_summary(self):
+        if self.admission is not None and self.admission.skipped:
+            self.logger.log(InfoLog(f"Admission policy skipped {len(self.admission.skipped)} files, "
+                                    f"admitted {self.admission.total_bytes} bytes."))
+
+    def write_repo_content(self, file_path: str) -> CodeMixFile:
+        with open(file_path, "w", encoding="utf-8", errors="replace", newline="") as file:
+            for i, part in enumerate(self.iter_repo_content()):
+                if i > 0:
+                    file.write("\n")
+                file.write(part)
+
+        self.log_admission_summary()
+        return CodeMixFile(file_path)
 
 ignore_list = [
     "*.pyo", "*.pyd", "*.pdb", "*.pkl", "*.log", "*.sqlite3", "*.db",
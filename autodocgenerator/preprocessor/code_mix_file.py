@@ -0,0 +1,171 @@
+import mmap
+import os
+from contextlib import contextmanager
+from typing import Iterator
+
+FILE_END_TAG = b"</file>"
+FILE_START_TAG = b'<file path="'
+RAW_RECORD_PATH = "<raw>"
+ERROR_PREFIX = b"Error reading "
+
+
+class FileRecord:
+    def __init__(self, path: str, content: str):
+        self.path = path
+        self.content = content
+
+
+def iter_records(buffer: str | mmap.mmap) -> Iterator[FileRecord]:
+    """
+    Yields <file path="..."> records of a code mix held in a string or in a memory map.
+    Boundaries are the lines CodeMix writes: a record ends at a "</file>" line that is followed (after blank lines)
+    by the next header line or by the end of the mix, so "</file>" and '<file path="' inside file contents
+    stay part of the file. Text that belongs to no record is yielded as a RAW_RECORD_PATH record.
+    """
+    is_text = isinstance(buffer, str)
+
+    def tag(value: bytes):
+        return value.decode("utf-8") if is_text else value
+
+    def text(start: int, end: int) -> str:
+        return buffer[start:end] if is_text else buffer[start:end].decode("utf-8", errors="ignore") # type: ignore
+
+    start_tag, end_tag, newline = tag(FILE_START_TAG), tag(b"\n" + FILE_END_TAG), tag(b"\n")
+    header_close, error_prefix = tag(b'">'), tag(ERROR_PREFIX)
+    size = len(buffer)
+
+    def header_end(pos: int) -> int:
+        """Start of the content if a header line starts at pos, else -1."""
+        if buffer[pos:pos + len(start_tag)] != start_tag:
+            return -1
+        line_end = buffer.find(newline, pos) # type: ignore
+        if line_end == -1 or buffer[line_end - len(header_close):line_end] != header_close:
+            return -1
+        return line_end + 1
+
+    def find_header(pos: int) -> int:
+        """First header line at or after pos."""
+        start = buffer.find(start_tag, pos) # type: ignore
+        while start != -1 and ((start > 0 and buffer[start - 1:start] != newline) or header_end(start) == -1):
+            start = buffer.find(start_tag, start + 1) # type: ignore
+        return start
+
+    def skip_blank_lines(pos: int) -> int:
+        while pos < size and buffer[pos:pos + 1] == newline:
+            pos += 1
+        return pos
+
+    def find_end(content_start: int) -> tuple[int, int]:
+        """
+        End of the record content and the position of the next record. Without a closing tag followed by a header
+        the record ends at its last closing tag and what follows is left to the caller, without any at the end of the mix.
+        """
+        last = None
+        end = buffer.find(end_tag, content_start - 1) # type: ignore
+        while end != -1:
+            after = end + len(end_tag)
+            if after == size:
+                return max(end, content_start), size
+            if buffer[after:after + 1] == newline:
+                next_start = skip_blank_lines(after)
+                if next_start == size or header_end(next_start) != -1:
+                    return max(end, content_start), next_start
+                last = (max(end, content_start), next_start)
+            end = buffer.find(end_tag, end + 1) # type: ignore
+        return last if last is not None else (size, size)
+
+    start = find_header(0)
+    while start != -1 and start < size:
+        content_start = header_end(start)
+        if content_start == -1:
+            next_start = find_header(start)
+            end = size if next_start == -1 else next_start
+            yield FileRecord(RAW_RECORD_PATH, text(start, end))
+            start = end
+            continue
+
+        path = text(start + len(start_tag), content_start - 1 - len(header_close))
+        # an unreadable file is written as one "Error reading" line without a closing tag
+        line_end = buffer.find(newline, content_start) # type: ignore
+        if buffer[content_start:content_start + len(error_prefix)] == error_prefix and line_end != -1 \
+                and header_end(line_end + 1) != -1:
+            yield FileRecord(path, text(content_start, line_end))
+            start = line_end + 1
+            continue
+
+        end, start = find_end(content_start)
+        yield FileRecord(path, text(content_start, end))
+
+
+def read_structure(buffer: str | mmap.mmap) -> str:
+    """Returns the "Repository Structure" listing that precedes the first file record."""
+    end = buffer.find("<file path=\"" if isinstance(buffer, str) else FILE_START_TAG) # type: ignore
+    head = buffer[:end if end != -1 else len(buffer)]
+    return (head if isinstance(head, str) else head.decode("utf-8", errors="ignore")).strip()
+
+
+class CodeMixFile:
+    """
+    Code mix spilled to disk and read back through mmap.
+    Iterating yields the same segments as code_mix.split("</file>") but
+    decodes only one segment at a time, so the whole mix is never held in memory.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+
+    @property
+    def size(self) -> int:
+        return os.path.getsize(self.file_path)
+
+    @contextmanager
+    def open_map(self) -> Iterator[mmap.mmap]:
+        with open(self.file_path, "rb") as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                yield mm
+
+    def __iter__(self) -> Iterator[str]:
+        if self.size == 0:
+            yield ""
+            return
+
+        with self.open_map() as mm:
+            start = 0
+            while True:
+                end = mm.find(FILE_END_TAG, start)
+                if end == -1:
+                    yield mm[start:].decode("utf-8", errors="ignore")
+                    return
+                yield mm[start:end].decode("utf-8", errors="ignore")
+                start = end + len(FILE_END_TAG)
+
+    def iter_segments(self) -> Iterator[str]:
+        """Like iterating the file, but every segment keeps its closing </file> tag."""
+        if self.size == 0:
+            return
+
+        with self.open_map() as mm:
+            start = 0
+            while start < len(mm):
+                end = mm.find(FILE_END_TAG, start)
+                end = len(mm) if end == -1 else end + len(FILE_END_TAG)
+                yield mm[start:end].decode("utf-8", errors="ignore")
+                start = end
+
+    def iter_records(self) -> Iterator[FileRecord]:
+        if self.size == 0:
+            return
+
+        with self.open_map() as mm:
+            yield from iter_records(mm)
+
+    def read_structure(self) -> str:
+        if self.size == 0:
+            return ""
+
+        with self.open_map() as mm:
+            return read_structure(mm)
+
+    def read(self) -> str:
+        with open(self.file_path, "r", encoding="utf-8", errors="ignore", newline="") as file:
+            return file.read()
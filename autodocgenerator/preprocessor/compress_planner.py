@@ -0,0 +1,168 @@
+import asyncio
+import math
+from .compressor import compress, async_compress, get_compress_prompt
+from .settings import ProjectSettings
+from ..engine.models.model import Model, AsyncModel
+from ..engine.tokenizer import TokenCounter
+from ..ui.progress_base import BaseProgress
+from ..ui.logging import BaseLogger, InfoLog, WarningLog
+
+
+class LevelPlan:
+    def __init__(self, level: int, input_tokens: list[int], groups: list[list[int]], power: int):
+        self.level = level
+        self.input_tokens = input_tokens
+        self.groups = groups
+        self.power = power
+
+    @property
+    def calls(self) -> int:
+        return len(self.groups)
+
+    def group_tokens(self) -> list[int]:
+        return [sum(self.input_tokens[i] for i in group) for group in self.groups]
+
+    def estimated_output_tokens(self) -> list[int]:
+        return [math.ceil(tokens / self.power) for tokens in self.group_tokens()]
+
+
+class CompressPlanner:
+    """
+    Decides the shape of the global info reduction level by level from measured token sizes:
+    consecutive inputs are packed into as few calls as fit into the model context window
+    (or max_input_tokens), and the compress power is picked so the level lands as close
+    as possible to target_tokens. The reduction stops as soon as everything fits into target_tokens.
+    """
+
+    MIN_POWER = 2
+
+    def __init__(self, token_counter: TokenCounter, project_settings: ProjectSettings, model: Model | AsyncModel,
+                 target_tokens: int = 2000, max_power: int = 8, max_input_tokens: int = 0, max_levels: int = 10):
+        self.token_counter = token_counter
+        self.target_tokens = max(1, target_tokens)
+        self.max_power = max(self.MIN_POWER, max_power)
+        self.max_levels = max_levels
+
+        prompt_tokens = token_counter.count_messages(get_compress_prompt("", project_settings, model, self.MIN_POWER))
+        window_budget = (token_counter.context_window - prompt_tokens) * self.MIN_POWER // (self.MIN_POWER + 1)
+        self.input_budget = max(1, min(window_budget, max_input_tokens) if max_input_tokens > 0 else window_budget)
+
+    def is_done(self, sizes: list[int]) -> bool:
+        return len(sizes) <= 1 or sum(sizes) <= self.target_tokens
+
+    def pack(self, sizes: list[int]) -> list[list[int]]:
+        groups: list[list[int]] = []
+        current: list[int] = []
+        current_tokens = 0
+        for i, tokens in enumerate(sizes):
+            if current and current_tokens + tokens > self.input_budget:
+                groups.append(current)
+                current, current_tokens = [], 0
+            current.append(i)
+            current_tokens += tokens
+
+        if current:
+            groups.append(current)
+        return groups
+
+    def plan_level(self, level: int, sizes: list[int]) -> LevelPlan:
+        power = min(self.max_power, max(self.MIN_POWER, math.ceil(sum(sizes) / self.target_tokens)))
+        return LevelPlan(level, sizes, self.pack(sizes), power)
+
+    def dry_run(self, sizes: list[int]) -> list[LevelPlan]:
+        """Plans the whole tree assuming every summary comes back at its requested size."""
+        plans = []
+        while not self.is_done(sizes) and len(plans) < self.max_levels:
+            plan = self.plan_level(len(plans), sizes)
+            plans.append(plan)
+            sizes = plan.estimated_output_tokens()
+        return plans
+
+    @staticmethod
+    def legacy_calls(count: int, compress_power: int = 4) -> tuple[int, int]:
+        """Calls and levels the fixed compress_power schedule of compress_to_one needs for count chunks."""
+        calls, levels = 0, 0
+        while count > 1:
+            power = compress_power if count >= compress_power + 1 else 2
+            calls += count
+            levels += 1
+            count = math.ceil(count / power)
+        return calls, levels
+
+    def report(self, sizes: list[int], compress_power: int = 4) -> str:
+        plans = self.dry_run(sizes)
+        lines = [f"Global info plan: {len(sizes)} chunks, {sum(sizes)} tokens, input budget {self.input_budget} tokens per call, "
+                 f"target {self.target_tokens} tokens"]
+        for plan in plans:
+            group_tokens = plan.group_tokens()
+            lines.append(f"  level {plan.level}: {len(plan.input_tokens)} inputs -> {plan.calls} calls, power {plan.power}, "
+                         f"call input {min(group_tokens)}..{max(group_tokens)} tokens, "
+                         f"output ~{sum(plan.estimated_output_tokens())} tokens")
+
+        legacy_calls, legacy_levels = self.legacy_calls(len(sizes), compress_power)
+        lines.append(f"  total: {sum(plan.calls for plan in plans)} calls in {len(plans)} levels "
+                     f"(fixed compress_power {compress_power}: {legacy_calls} calls in {legacy_levels} levels)")
+        return "\n".join(lines)
+
+
+def _join(data: list[str], groups: list[list[int]]) -> list[str]:
+    return ["".join(data[i] + "\n" for i in group) for group in groups]
+
+
+def adaptive_compress_to_one(data: list[str], model: Model, project_settings: ProjectSettings, planner: CompressPlanner,
+                             progress_bar: BaseProgress = BaseProgress()) -> str:
+    logger = BaseLogger()
+    sizes = [planner.token_counter.count(el) for el in data]
+    level = 0
+
+    while not planner.is_done(sizes):
+        if level >= planner.max_levels:
+            logger.log(WarningLog(f"Global info did not reach {planner.target_tokens} tokens in {level} levels, stopping."))
+            break
+
+        plan = planner.plan_level(level, sizes)
+        logger.log(InfoLog(f"Compress level {level}: {len(data)} inputs -> {plan.calls} calls, power {plan.power}"))
+
+        progress_bar.create_new_subtask(f"Compare all files", plan.calls)
+        result = []
+        for el in _join(data, plan.groups):
+            result.append(compress(el, project_settings, model, plan.power))
+            progress_bar.update_task()
+        progress_bar.remove_subtask()
+
+        data = result
+        sizes = [planner.token_counter.count(el) for el in data]
+        level += 1
+
+    return data[0] if len(data) == 1 else "".join(el + "\n" for el in data)
+
+
+async def async_adaptive_compress_to_one(data: list[str], async_model: AsyncModel, project_settings: ProjectSettings,
+                                         planner: CompressPlanner, progress_bar: BaseProgress = BaseProgress(),
+                                         max_concurrency: int = 4) -> str:
+    logger = BaseLogger()
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    sizes = [planner.token_counter.count(el) for el in data]
+    level = 0
+
+    async def run_compress(el: str, power: int) -> str:
+        result = await async_compress(el, project_settings, async_model, power, semaphore)
+        progress_bar.update_task()
+        return result
+
+    while not planner.is_done(sizes):
+        if level >= planner.max_levels:
+            logger.log(WarningLog(f"Global info did not reach {planner.target_tokens} tokens in {level} levels, stopping."))
+            break
+
+        plan = planner.plan_level(level, sizes)
+        logger.log(InfoLog(f"Compress level {level}: {len(data)} inputs -> {plan.calls} calls, power {plan.power}"))
+
+        progress_bar.create_new_subtask(f"Compare all files", plan.calls)
+        data = list(await asyncio.gather(*[run_compress(el, plan.power) for el in _join(data, plan.groups)]))
+        progress_bar.remove_subtask()
+
+        sizes = [planner.token_counter.count(el) for el in data]
+        level += 1
+
+    return data[0] if len(data) == 1 else "".join(el + "\n" for el in data)
@@ -1,4 +1,4 @@
-from ..engine.models.model import ParentModel, Model
+from ..engine.models.model import ParentModel, Model, AsyncModel
 from ..engine.config.config import get_BASE_COMPRESS_TEXT
 import math
 import asyncio
@@ -8,22 +8,35 @@ from .settings import ProjectSettings
 
 
 
-def compress(data: str, project_settings: ProjectSettings, model: Model, compress_power) -> str:
-    prompt = [
+def get_compress_prompt(data: str, project_settings: ProjectSettings, model: ParentModel, compress_power) -> list[dict[str, str]]:
+    return [
         {
             "role": "system",
             "content": project_settings.prompt
         },
         {
             "role": "system",
-            "content": get_BASE_COMPRESS_TEXT(len(data), compress_power)
+            "content": get_BASE_COMPRESS_TEXT(model.token_counter.count(data), compress_power)
         },
         {
             "role": "user",
             "content": data
         }
     ]
-    answer = model.get_answer_without_history(prompt=prompt)
+
+
+def compress(data: str, project_settings: ProjectSettings, model: Model, compress_power) -> str:
+    prompt = get_compress_prompt(data, project_settings, model, compress_power)
+    answer = model.get_answer_without_history(prompt=prompt, task="compress")
+
+    return answer
+
+
+async def async_compress(data: str, project_settings: ProjectSettings, async_model: AsyncModel, compress_power,
+                         semaphore: asyncio.Semaphore) -> str:
+    prompt = get_compress_prompt(data, project_settings, async_model, compress_power)
+    async with semaphore:
+        answer = await async_model.get_answer_without_history(prompt=prompt, task="compress")
 
     return answer
 
@@ -58,8 +71,38 @@ def compress_to_one(data: list, model: Model, project_settings: ProjectSettings,
     return data[0]
 
 
+async def async_compress_and_compare(data: list, async_model: AsyncModel, project_settings: ProjectSettings, compress_power: int = 4,
+                                     progress_bar: BaseProgress = BaseProgress(), semaphore: asyncio.Semaphore | None = None) -> list:
+    """One level of the reduction: every element is compressed concurrently, then results are grouped by compress_power."""
+    semaphore = semaphore or asyncio.Semaphore(4)
+    progress_bar.create_new_subtask(f"Compare all files", len(data))
+
+    async def run_compress(el: str) -> str:
+        result = await async_compress(el, project_settings, async_model, compress_power, semaphore)
+        progress_bar.update_task()
+        return result
+
+    results = await asyncio.gather(*[run_compress(el) for el in data])
+    progress_bar.remove_subtask()
 
+    compress_and_compare_data = ["" for i in range(math.ceil(len(data) / compress_power))]
+    for i, result in enumerate(results):
+        compress_and_compare_data[i // compress_power] += result + "\n"
 
+    return compress_and_compare_data
 
 
+async def async_compress_to_one(data: list, async_model: AsyncModel, project_settings: ProjectSettings, compress_power: int = 4,
+                                progress_bar: BaseProgress = BaseProgress(), max_concurrency: int = 4):
+    """Level parallel variant of compress_to_one, it needs one round of requests per level (about log_k(N)) instead of N."""
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
 
+    while len(data) > 1:
+        new_compress_power = compress_power
+        if (len(data) < compress_power + 1):
+            new_compress_power = 2
+
+        data = await async_compress_and_compare(data, async_model, project_settings, new_compress_power,
+                                                progress_bar=progress_bar, semaphore=semaphore)
+
+    return data[0]
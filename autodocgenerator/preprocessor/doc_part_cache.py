@@ -0,0 +1,26 @@
+import hashlib
+import json
+from .lru_store import LRUStore
+from ..ui.logging import BaseLogger, InfoLog
+
+
+class DocPartCache(LRUStore):
+    """
+    Persistent cache of write_docs_by_parts answers. The key is a hash of the chunk text,
+    the assembled prompt, the language and the model name, so an unchanged chunk
+    is answered from the cache and only changed chunks go to the model.
+    """
+
+    FILE_NAME = "doc_part_cache.json"
+
+    @staticmethod
+    def make_key(part: str, prompt: list[dict[str, str]], language: str, model_name: str | None) -> str:
+        hasher = hashlib.sha256()
+        for el in (part, json.dumps(prompt, ensure_ascii=False, sort_keys=True), language, model_name or ""):
+            hasher.update(el.encode("utf-8", errors="ignore"))
+            hasher.update(b"\x00")
+        return hasher.hexdigest()
+
+    def log_stats(self):
+        BaseLogger().log(InfoLog(f"Doc part cache: {self.hits} hits, {self.misses} misses, "
+                                 f"{self.evictions} evicted, {len(self)} entries stored."))
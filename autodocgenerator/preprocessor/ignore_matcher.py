@@ -0,0 +1,179 @@
+import re
+from itertools import groupby
+
+GLOB_CHARS = set("*?[\\")
+
+
+def translate_glob(pattern: str) -> str:
+    """Translates a gitignore style glob into a regex: "*" and "?" never cross "/", "**" does."""
+    result = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern.startswith("**", i):
+                if i + 2 < n and pattern[i + 2] == "/":
+                    result.append("(?:.*/)?")
+                    i += 3
+                    continue
+                result.append(".*")
+                i += 2
+                continue
+            result.append("[^/]*")
+        elif c == "?":
+            result.append("[^/]")
+        elif c == "[":
+            start = i + 1
+            if pattern[start:start + 1] == "!":
+                start += 1
+            if pattern[start:start + 1] == "]":
+                start += 1
+            end = pattern.find("]", start)
+            if end == -1:
+                result.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                elif body.startswith("^"):
+                    body = "\\" + body
+                result.append(f"[{body}]")
+                i = end
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            result.append(re.escape(pattern[i]))
+        else:
+            result.append(re.escape(c))
+        i += 1
+    return "".join(result)
+
+
+class IgnoreRule:
+    def __init__(self, raw: str):
+        pattern = raw.strip()
+        self.raw = raw
+        self.negate = pattern.startswith("!")
+        if self.negate:
+            pattern = pattern[1:]
+        elif pattern.startswith("\\!") or pattern.startswith("\\#"):
+            pattern = pattern[1:]
+
+        self.dir_only = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+
+        if pattern.startswith("**/") and "/" not in pattern[3:]:
+            pattern = pattern[3:]
+
+        self.anchored = "/" in pattern
+        self.pattern = pattern.lstrip("/")
+
+    @property
+    def is_literal(self) -> bool:
+        return not GLOB_CHARS & set(self.pattern)
+
+    @property
+    def extension(self) -> str | None:
+        """Returns ".ext" for plain "*.ext" patterns."""
+        if self.pattern.startswith("*.") and not GLOB_CHARS & set(self.pattern[1:]):
+            return self.pattern[1:]
+        return None
+
+
+class _RuleGroup:
+    """Consecutive rules with the same polarity, compiled into hash sets plus one fallback regex."""
+
+    def __init__(self, rules: list[IgnoreRule]):
+        self.negate = rules[0].negate
+        self.dir_only = rules[0].dir_only
+
+        self.names: set[str] = set()
+        self.extensions: set[str] = set()
+        name_patterns: list[str] = []
+        path_patterns: list[str] = []
+
+        for rule in rules:
+            if rule.anchored:
+                path_patterns.append(translate_glob(rule.pattern))
+            elif rule.is_literal:
+                self.names.add(rule.pattern)
+            elif rule.extension is not None:
+                self.extensions.add(rule.extension)
+            else:
+                name_patterns.append(translate_glob(rule.pattern))
+
+        self.name_regex = self._compile(name_patterns)
+        self.path_regex = self._compile(path_patterns)
+
+    @staticmethod
+    def _compile(patterns: list[str]) -> re.Pattern | None:
+        if not patterns:
+            return None
+        return re.compile("|".join(f"(?:{pattern})" for pattern in patterns), re.DOTALL)
+
+    def match(self, path: str, name: str, is_dir: bool) -> bool:
+        if self.dir_only and not is_dir:
+            return False
+
+        if name in self.names:
+            return True
+
+        if self.extensions:
+            dot = name.find(".")
+            while dot != -1:
+                if name[dot:] in self.extensions:
+                    return True
+                dot = name.find(".", dot + 1)
+
+        if self.name_regex is not None and self.name_regex.fullmatch(name):
+            return True
+
+        if self.path_regex is not None and self.path_regex.fullmatch(path):
+            return True
+
+        return False
+
+
+class IgnoreMatcher:
+    """
+    Compiled form of Config.ignore_files with .gitignore semantics:
+    "/" anchors a pattern to the project root, a trailing "/" matches only
+    directories, "!" re-includes a path and the last matching pattern wins.
+    Paths are relative to the project root and use "/" as separator.
+    """
+
+    def __init__(self, patterns: list[str] | None = None):
+        self.patterns: list[str] = []
+        self._groups: list[_RuleGroup] = []
+        self.add_patterns(patterns or [])
+
+    def add_patterns(self, patterns: list[str]):
+        for pattern in patterns:
+            stripped = pattern.strip()
+            if stripped and not stripped.startswith("#"):
+                self.patterns.append(pattern)
+
+        rules = [IgnoreRule(pattern) for pattern in self.patterns]
+        rules = [rule for rule in rules if rule.pattern]
+        self._groups = [_RuleGroup(list(group)) for _, group in groupby(rules, key=lambda rule: (rule.negate, rule.dir_only))]
+        return self
+
+    @classmethod
+    def from_gitignore(cls, file_path: str) -> "IgnoreMatcher":
+        with open(file_path, "r", encoding="utf-8") as file:
+            return cls(file.read().splitlines())
+
+    def match(self, path: str, is_dir: bool = False) -> bool:
+        """Checks a single path without looking at its parent directories."""
+        name = path.rsplit("/", 1)[-1]
+        for group in reversed(self._groups):
+            if group.match(path, name, is_dir):
+                return not group.negate
+        return False
+
+    def is_ignored(self, path: str, is_dir: bool = False) -> bool:
+        """Checks a path together with its parent directories, a path inside an ignored directory is ignored."""
+        parts = path.strip("/").split("/")
+        for i in range(1, len(parts)):
+            if self.match("/".join(parts[:i]), is_dir=True):
+                return True
+        return self.match("/".join(parts), is_dir)
@@ -0,0 +1,68 @@
+import os
+import threading
+from collections import OrderedDict
+from ..schema.lru_store_schema import LRUStoreSchema
+from ..ui.logging import BaseLogger, WarningLog
+
+
+class LRUStore:
+    """
+    String to string store persisted as one JSON file. Entries are kept in least to most
+    recently used order (the order survives save/load), the oldest ones are evicted above max_entries.
+    """
+
+    def __init__(self, file_path: str, max_entries: int = 5000):
+        self.file_path = file_path
+        self.max_entries = max_entries
+        self.logger = BaseLogger()
+        self.entries: OrderedDict[str, str] = OrderedDict(self._load().entries)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._evict()
+
+    def _load(self) -> LRUStoreSchema:
+        try:
+            with open(self.file_path, "r", encoding="utf-8") as file:
+                return LRUStoreSchema.model_validate_json(file.read())
+        except FileNotFoundError:
+            return LRUStoreSchema()
+        except Exception as e:
+            self.logger.log(WarningLog(f"Cache file {self.file_path} is broken, starting from empty cache: {e}"))
+            return LRUStoreSchema()
+
+    def _evict(self):
+        while self.max_entries > 0 and len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+
+    def put(self, key: str, value: str):
+        with self._lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            self._evict()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.file_path) or ".", exist_ok=True)
+        tmp_path = f"{self.file_path}.{os.getpid()}.tmp"
+        with self._lock:
+            data = LRUStoreSchema(entries=dict(self.entries)).model_dump_json()
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            file.write(data)
+        os.replace(tmp_path, self.file_path)
@@ -0,0 +1,183 @@
+import asyncio
+import hashlib
+import os
+from .compressor import compress, async_compress
+from .chunker import Chunker, tokens_for_chars
+from .code_mix_file import CodeMixFile
+from .settings import ProjectSettings
+from ..engine.models.model import ParentModel, Model, AsyncModel
+from ..engine.tokenizer import TokenCounter
+from ..schema.merkle_schema import MerkleNodeSchema, MerkleTreeSchema
+from ..ui.progress_base import BaseProgress
+from ..ui.logging import BaseLogger, InfoLog, WarningLog
+
+LEAF_ANCHOR_EVERY = 4
+
+
+def hash_text(*parts: str) -> str:
+    hasher = hashlib.sha256()
+    for part in parts:
+        hasher.update(part.encode("utf-8", errors="ignore"))
+        hasher.update(b"\x00")
+    return hasher.hexdigest()
+
+
+def is_anchor(node_hash: str, every: int) -> bool:
+    return int(node_hash[:8], 16) % max(1, every) == 0
+
+
+def split_leaves(data: str | CodeMixFile, max_symbols: int, token_counter: TokenCounter | None = None) -> list[str]:
+    """
+    Like split_data, but chunks are also closed after "anchor" files (picked by the hash of their path),
+    so a changed file only moves the borders of its own chunk and the leaves around it keep their hashes.
+    """
+    chunker = Chunker(tokens_for_chars(max_symbols), token_counter,
+                      boundary=lambda file_path: is_anchor(hash_text(file_path), LEAF_ANCHOR_EVERY))
+    return [chunk.text for chunk in chunker.iter_chunks(data)]
+
+
+def group_level(hashes: list[str], compress_power: int) -> list[list[str]]:
+    """
+    Content defined grouping: a group is closed on an anchor hash (once it has 2 nodes) or at 2 * compress_power nodes.
+    Inserting or removing a node only changes the groups next to it, every group but the last has at least 2 nodes.
+    """
+    if len(hashes) <= compress_power:
+        return [hashes]
+
+    groups: list[list[str]] = []
+    current: list[str] = []
+    for node_hash in hashes:
+        current.append(node_hash)
+        if len(current) >= 2 * compress_power or (len(current) >= 2 and is_anchor(node_hash, compress_power)):
+            groups.append(current)
+            current = []
+
+    if current:
+        if len(current) == 1 and groups:
+            groups[-1].extend(current)
+        else:
+            groups.append(current)
+    return groups
+
+
+class MerkleCompressor:
+    """
+    Persisted compression tree for global info. Leaf hash = hash of the leaf text (salted with the project prompt
+    and the model name), node hash = hash of its children hashes. Every node keeps the summary of its text
+    per compress_power, so after a change only the changed leaves and their ancestors are compressed again.
+    """
+
+    FILE_NAME = "global_info_tree.json"
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.logger = BaseLogger()
+        self.previous = self._load()
+        self.tree = MerkleTreeSchema()
+        self.texts: dict[str, str] = {}
+        self.reused = 0
+        self.computed = 0
+
+    def _load(self) -> MerkleTreeSchema:
+        try:
+            with open(self.file_path, "r", encoding="utf-8") as file:
+                return MerkleTreeSchema.model_validate_json(file.read())
+        except FileNotFoundError:
+            return MerkleTreeSchema()
+        except Exception as e:
+            self.logger.log(WarningLog(f"Global info tree is broken, rebuilding it: {e}"))
+            return MerkleTreeSchema()
+
+    def add_leaves(self, leaves: list[str], project_settings: ProjectSettings, model: ParentModel) -> list[str]:
+        salt = hash_text(project_settings.prompt, model.current_model_name or "")
+        level = []
+        for leaf in leaves:
+            leaf_hash = hash_text(salt, leaf)
+            self.texts[leaf_hash] = leaf
+            self.tree.nodes.setdefault(leaf_hash, MerkleNodeSchema())
+            level.append(leaf_hash)
+        return level
+
+    def get_missing(self, level: list[str], power: int) -> list[str]:
+        """Copies reusable summaries from the previous tree and returns hashes of the nodes that need the model."""
+        missing: dict[str, None] = {}
+        for node_hash in level:
+            summaries = self.tree.nodes[node_hash].summaries
+            if power in summaries or node_hash in missing:
+                continue
+
+            previous = self.previous.nodes.get(node_hash)
+            if previous is not None and power in previous.summaries:
+                summaries[power] = previous.summaries[power]
+                self.reused += 1
+            else:
+                missing[node_hash] = None
+        return list(missing)
+
+    def set_summary(self, node_hash: str, power: int, summary: str):
+        self.tree.nodes[node_hash].summaries[power] = summary
+        self.computed += 1
+
+    def build_level(self, groups: list[list[str]], power: int) -> list[str]:
+        level = []
+        for group in groups:
+            node_hash = hash_text(str(power), *group)
+            self.texts[node_hash] = "".join(self.tree.nodes[child].summaries[power] + "\n" for child in group)
+            self.tree.nodes.setdefault(node_hash, MerkleNodeSchema(children=group))
+            level.append(node_hash)
+        return level
+
+    def finish(self, level: list[str]) -> str:
+        if not level:
+            return ""
+        self.tree.root = level[0]
+        self.logger.log(InfoLog(f"Global info tree: {self.reused} summaries reused, {self.computed} compressed, "
+                                f"{len(self.tree.nodes)} nodes."))
+        return self.texts[level[0]]
+
+    def compress_to_one(self, leaves: list[str], model: Model, project_settings: ProjectSettings, compress_power: int = 4,
+                        progress_bar: BaseProgress = BaseProgress()) -> str:
+        level = self.add_leaves(leaves, project_settings, model)
+
+        while len(level) > 1:
+            missing = self.get_missing(level, compress_power)
+
+            progress_bar.create_new_subtask(f"Compare all files", len(missing))
+            for node_hash in missing:
+                self.set_summary(node_hash, compress_power, compress(self.texts[node_hash], project_settings, model, compress_power))
+                progress_bar.update_task()
+            progress_bar.remove_subtask()
+
+            level = self.build_level(group_level(level, compress_power), compress_power)
+
+        return self.finish(level)
+
+    async def async_compress_to_one(self, leaves: list[str], async_model: AsyncModel, project_settings: ProjectSettings,
+                                    compress_power: int = 4, progress_bar: BaseProgress = BaseProgress(),
+                                    max_concurrency: int = 4) -> str:
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        level = self.add_leaves(leaves, project_settings, async_model)
+
+        async def run_compress(node_hash: str):
+            summary = await async_compress(self.texts[node_hash], project_settings, async_model, compress_power, semaphore)
+            self.set_summary(node_hash, compress_power, summary)
+            progress_bar.update_task()
+
+        while len(level) > 1:
+            missing = self.get_missing(level, compress_power)
+
+            progress_bar.create_new_subtask(f"Compare all files", len(missing))
+            await asyncio.gather(*[run_compress(node_hash) for node_hash in missing])
+            progress_bar.remove_subtask()
+
+            level = self.build_level(group_level(level, compress_power), compress_power)
+
+        return self.finish(level)
+
+    def save(self):
+        """Only nodes of the current tree are written, summaries of removed subtrees are dropped."""
+        os.makedirs(os.path.dirname(self.file_path) or ".", exist_ok=True)
+        tmp_path = f"{self.file_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            file.write(self.tree.model_dump_json())
+        os.replace(tmp_path, self.file_path)
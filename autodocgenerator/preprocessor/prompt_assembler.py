@@ -0,0 +1,111 @@
+from typing import Any
+from ..engine.tokenizer import TokenCounter
+from ..engine.models.budget import DEFAULT_MAX_OUTPUT_TOKENS
+from ..ui.logging import BaseLogger, InfoLog, WarningLog
+
+MIN_SECTION_TOKENS = 64
+MESSAGE_OVERHEAD_TOKENS = 4
+MAX_OUTPUT_SHARE = 4
+
+
+class PromptSection:
+    """
+    One message of a prompt. Required sections are never touched, the others are cut down (keeping the head
+    or the tail of the text) and then dropped, lowest priority first, while the prompt is over its budget.
+    """
+
+    def __init__(self, name: str, content: str, role: str = "system", priority: int = 0, required: bool = False,
+                 keep: str = "head", prefix: str = ""):
+        self.name = name
+        self.content = content
+        self.role = role
+        self.priority = priority
+        self.required = required
+        self.keep = keep
+        self.prefix = prefix
+        self.state = "full"
+
+    def get_message(self) -> dict[str, str]:
+        return {
+            "role": self.role,
+            "content": f"{self.prefix}{self.content}"
+        }
+
+
+class PromptAssembler:
+    """Builds a prompt from sections in the order they were added and fits it into a token budget."""
+
+    def __init__(self, token_counter: TokenCounter):
+        self.token_counter = token_counter
+        self.sections: list[PromptSection] = []
+        self.logger = BaseLogger()
+
+    def add(self, name: str, content: str | None, role: str = "system", priority: int = 0, required: bool = False,
+            keep: str = "head", prefix: str = "") -> "PromptAssembler":
+        if content is not None:
+            self.sections.append(PromptSection(name, content, role, priority, required, keep, prefix))
+        return self
+
+    def count(self, section: PromptSection) -> int:
+        if section.state == "dropped":
+            return 0
+        return self.token_counter.count(section.get_message()["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+    def total(self) -> int:
+        return sum(self.count(section) for section in self.sections) + 2
+
+    def _cut(self, section: PromptSection, max_tokens: int):
+        content_tokens = max_tokens - MESSAGE_OVERHEAD_TOKENS - self.token_counter.count(section.prefix)
+        if content_tokens < MIN_SECTION_TOKENS:
+            section.state = "dropped"
+            return
+
+        if section.keep == "tail":
+            section.content = self.token_counter.tail(section.content, content_tokens)
+        else:
+            section.content = self.token_counter.head(section.content, content_tokens)
+        section.state = "compressed"
+
+    def assemble(self, max_tokens: int = 0) -> list[dict[str, str]]:
+        """max_tokens <= 0 means no budget."""
+        if max_tokens > 0:
+            over = self.total() - max_tokens
+            optional = [section for section in self.sections if not section.required]
+            for section in sorted(optional, key=lambda el: el.priority):
+                if over <= 0:
+                    break
+                tokens = self.count(section)
+                self._cut(section, tokens - over)
+                over -= tokens - self.count(section)
+
+            if over > 0:
+                self.logger.log(WarningLog(f"Prompt is {over} tokens over its budget of {max_tokens} tokens "
+                                           f"even without optional context."))
+
+        return [section.get_message() for section in self.sections if section.state != "dropped"]
+
+    def log_shares(self, max_tokens: int = 0):
+        total = self.total()
+        shares = []
+        for section in self.sections:
+            tokens = self.count(section)
+            state = f" ({section.state})" if section.state != "full" else ""
+            shares.append(f"{section.name} {tokens} ({tokens * 100 / total:.0f}%){state}")
+        budget = f" of {max_tokens}" if max_tokens > 0 else ""
+        self.logger.log(InfoLog(f"Prompt {total}{budget} tokens: {', '.join(shares)}", level=1))
+
+
+def get_prompt_budget(context_window: int, sampling_params: dict[str, Any], max_tokens: int = 0) -> int:
+    """
+    Input budget of a model: its context window minus the room for the answer, lowered to max_tokens if it is set.
+    The answer gets the max_tokens of the model but at most 1 / MAX_OUTPUT_SHARE of the window, so models
+    that ask for more output than their window holds still get a budget.
+    """
+    output_tokens = int(sampling_params.get("max_tokens") or DEFAULT_MAX_OUTPUT_TOKENS)
+    budget = context_window - min(output_tokens, context_window // MAX_OUTPUT_SHARE)
+    if max_tokens > 0:
+        budget = min(budget, max_tokens) if budget > 0 else max_tokens
+    if budget <= 0:
+        BaseLogger().log(WarningLog(f"No prompt budget for a context window of {context_window} tokens, "
+                                    f"prompts are sent without a token limit."))
+    return max(0, budget)
@@ -0,0 +1,72 @@
+import os
+from typing import Callable, Iterator
+
+
+class RepoEntry:
+    def __init__(self, path: str, relative_path: str, name: str, depth: int,
+                 is_dir: bool, is_file: bool, can_descend: bool = False):
+        self.path = path
+        self.relative_path = relative_path
+        self.name = name
+        self.depth = depth
+        self.is_dir = is_dir
+        self.is_file = is_file
+        self.can_descend = can_descend
+        self.size = 0
+
+    @property
+    def posix_path(self) -> str:
+        return self.relative_path.replace(os.sep, "/")
+
+
+class RepoWalker:
+    """
+    Single pass depth-first walker built on os.scandir.
+    Entries are yielded in the same order as sorted(Path.rglob("*")) and
+    ignored directories are pruned, so their subtrees are never listed.
+    """
+
+    def __init__(self, root_dir: str, should_ignore: Callable[[RepoEntry], bool]):
+        self.root_dir = os.fspath(root_dir)
+        self.should_ignore = should_ignore
+        self.ignored: list[RepoEntry] = []
+
+    def _scan(self, dir_path: str, relative_dir: str, depth: int) -> list[RepoEntry]:
+        entries = []
+        try:
+            with os.scandir(dir_path) as it:
+                for dir_entry in it:
+                    try:
+                        is_dir = dir_entry.is_dir()
+                        is_file = not is_dir and dir_entry.is_file()
+                        can_descend = is_dir and not dir_entry.is_symlink()
+                    except OSError:
+                        continue
+
+                    relative_path = os.path.join(relative_dir, dir_entry.name) if relative_dir else dir_entry.name
+                    entries.append(RepoEntry(dir_entry.path, relative_path, dir_entry.name, depth,
+                                             is_dir, is_file, can_descend))
+        except OSError:
+            return []
+
+        entries.sort(key=lambda entry: entry.name)
+        return entries
+
+    def walk(self) -> Iterator[RepoEntry]:
+        self.ignored = []
+        stack = [iter(self._scan(self.root_dir, "", 1))]
+
+        while stack:
+            entry = next(stack[-1], None)
+            if entry is None:
+                stack.pop()
+                continue
+
+            if self.should_ignore(entry):
+                self.ignored.append(entry)
+                continue
+
+            yield entry
+
+            if entry.can_descend:
+                stack.append(iter(self._scan(entry.path, entry.relative_path, entry.depth + 1)))
@@ -0,0 +1,126 @@
+import hashlib
+import os
+import threading
+import zlib
+from ..schema.snapshot_schema import FileSnapshotSchema, SnapshotManifestSchema
+from ..ui.logging import BaseLogger, InfoLog, WarningLog
+
+
+def decode_text(raw: bytes) -> str:
+    """Same result as Path.read_text(encoding="utf-8", errors="ignore") for the given bytes."""
+    return raw.decode("utf-8", errors="ignore").replace("\r\n", "\n").replace("\r", "\n")
+
+
+class SnapshotCache:
+    """
+    Per-file manifest (path, size, mtime_ns, content hash) plus a content addressed
+    blob store with zlib compressed file bodies. Files whose size and mtime_ns match
+    the manifest are served from the blob store, everything else is read from disk.
+    """
+
+    MANIFEST_NAME = "snapshot_manifest.json"
+    BLOBS_FOLDER_NAME = "blobs"
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self.manifest_path = os.path.join(cache_dir, self.MANIFEST_NAME)
+        self.blobs_dir = os.path.join(cache_dir, self.BLOBS_FOLDER_NAME)
+        self.logger = BaseLogger()
+
+        self.previous = self._load_manifest()
+        self.current = SnapshotManifestSchema()
+        self.changes: dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _load_manifest(self) -> SnapshotManifestSchema:
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as file:
+                return SnapshotManifestSchema.model_validate_json(file.read())
+        except FileNotFoundError:
+            return SnapshotManifestSchema()
+        except Exception as e:
+            self.logger.log(WarningLog(f"Snapshot manifest is broken, rebuilding it: {e}"))
+            return SnapshotManifestSchema()
+
+    def _blob_path(self, content_hash: str) -> str:
+        return os.path.join(self.blobs_dir, content_hash[:2], content_hash)
+
+    def _read_blob(self, content_hash: str) -> bytes | None:
+        try:
+            with open(self._blob_path(content_hash), "rb") as file:
+                return zlib.decompress(file.read())
+        except (OSError, zlib.error):
+            return None
+
+    def _write_blob(self, content_hash: str, raw: bytes):
+        blob_path = self._blob_path(content_hash)
+        if os.path.isfile(blob_path):
+            return
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        tmp_path = f"{blob_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(zlib.compress(raw))
+        os.replace(tmp_path, blob_path)
+
+    def read_bytes(self, path: str, relative_path: str) -> bytes:
+        stat = os.stat(path)
+        snapshot = self.previous.files.get(relative_path)
+
+        if snapshot is not None and snapshot.size == stat.st_size and snapshot.mtime_ns == stat.st_mtime_ns:
+            raw = self._read_blob(snapshot.hash)
+            if raw is not None:
+                with self._lock:
+                    self.hits += 1
+                    self.current.files[relative_path] = snapshot
+                return raw
+
+        with open(path, "rb") as file:
+            raw = file.read()
+
+        content_hash = hashlib.sha256(raw).hexdigest()
+        self._write_blob(content_hash, raw)
+
+        with self._lock:
+            self.misses += 1
+            self.current.files[relative_path] = FileSnapshotSchema(size=len(raw), mtime_ns=stat.st_mtime_ns, hash=content_hash)
+            if snapshot is None:
+                self.changes[relative_path] = "ADDED"
+            elif snapshot.hash != content_hash:
+                self.changes[relative_path] = "MODIFIED"
+
+        return raw
+
+    def read_text(self, path: str, relative_path: str) -> str:
+        return decode_text(self.read_bytes(path, relative_path))
+
+    def get_hash(self, relative_path: str) -> str | None:
+        snapshot = self.current.files.get(relative_path)
+        return snapshot.hash if snapshot is not None else None
+
+    @property
+    def changed_files(self) -> list[str]:
+        return sorted(self.changes)
+
+    def save(self):
+        for relative_path in self.previous.files:
+            if relative_path not in self.current.files:
+                self.changes[relative_path] = "DELETED"
+
+        with open(self.manifest_path, "w", encoding="utf-8") as file:
+            file.write(self.current.model_dump_json())
+
+        used_hashes = {snapshot.hash for snapshot in self.current.files.values()}
+        removed = 0
+        if os.path.isdir(self.blobs_dir):
+            for prefix in os.listdir(self.blobs_dir):
+                prefix_dir = os.path.join(self.blobs_dir, prefix)
+                for blob_name in os.listdir(prefix_dir):
+                    if blob_name not in used_hashes:
+                        os.remove(os.path.join(prefix_dir, blob_name))
+                        removed += 1
+
+        self.previous = self.current
+        self.logger.log(InfoLog(f"Snapshot cache: {self.hits} files served from cache, {self.misses} read from disk, "
+                                f"{len(self.changes)} changed, {removed} stale blobs removed."))
@@ -1,83 +1,69 @@
 from ..engine.models.gpt_model import GPTModel, AsyncGPTModel, AsyncModel, Model
 from ..engine.config.config import BASE_PART_COMPLITE_TEXT
 import asyncio
+from typing import Callable
 from ..ui.progress_base import BaseProgress
 from ..ui.logging import BaseLogger, InfoLog, ErrorLog, WarningLog
 from .settings import ProjectSettings
+from .chunker import Chunker, Chunk, tokens_for_chars
+from .structural_chunker import StructuralChunker, StructuralChunk, STRUCTURE_FILE_NAME
+from .code_mix_file import CodeMixFile
+from .doc_part_cache import DocPartCache
+from ..engine.tokenizer import TokenCounter, get_token_counter
+from .prompt_assembler import PromptAssembler, get_prompt_budget
 
+PREV_INFO_TAIL_TOKENS = 750
 
-def split_data(data: str, max_symbols: int) -> list[str]:
 
-    split_objects: list[str] = []
-    splited_by_files = data.split("</file>")
-    
+def split_data(data: str | CodeMixFile, max_symbols: int, token_counter: TokenCounter | None = None) -> list[str]:
+    return [chunk.text for chunk in split_data_to_chunks(data, tokens_for_chars(max_symbols), token_counter=token_counter)]
+
+def split_data_to_chunks(data: str | CodeMixFile, max_tokens: int, structural: bool = False,
+                         token_counter: TokenCounter | None = None) -> list[Chunk] | list[StructuralChunk]:
     logger = BaseLogger()
     logger.log(InfoLog("Starting data splitting..."))
 
-    while True:
-        have_to_change = False
-        for i, el in enumerate(splited_by_files):
-            if len(el) > max_symbols * 1.5:
-                splited_by_files.insert(i+1, el[i][int(max_symbols / 2):])
-                splited_by_files[i] = el[i][:int(max_symbols / 2)]
-                have_to_change = True
-
-        if have_to_change == False:
-            break
-
-    curr_index = 0
-    for el in splited_by_files:
-        if len(split_objects) - 1 < curr_index:
-            split_objects.append("")
-
-        if len(split_objects[curr_index]) + len(el) > max_symbols * 1.25:
-            curr_index += 1
-            split_objects.append(el)
-            continue
-
-        split_objects[curr_index] += "\n" + el
-
-    logger.log(InfoLog(f"Data split into {len(split_objects)} parts based on max symbols {max_symbols}."))
-
-    return split_objects
-
-def write_docs_by_parts(part: str, model: Model, project_settings: ProjectSettings, 
-                        prev_info: str| None = None, language: str = "en", global_info: str| None = None):
+    if structural:
+        chunks = StructuralChunker(max_tokens, token_counter).split(data)
+    else:
+        chunks = Chunker(max_tokens, token_counter).split(data)
+
+    logger.log(InfoLog(f"Data split into {len(chunks)} parts based on max tokens {max_tokens}."))
+    return chunks
+
+def get_part_assembler(part: str, project_settings: ProjectSettings, prev_info: str | None = None, language: str = "en",
+                       global_info: str | None = None, neighbour_info: str | None = None,
+                       token_counter: TokenCounter | None = None) -> PromptAssembler:
+    """Context sections are cut first: prev_info, then neighbour_info, global_info and the project settings."""
+    assembler = PromptAssembler(token_counter if token_counter is not None else get_token_counter())
+    assembler.add("language", f"For the following task use language {language}", required=True)
+    assembler.add("project_settings", project_settings.prompt, priority=3, prefix="global project info: ")
+    assembler.add("instructions", BASE_PART_COMPLITE_TEXT, required=True)
+    assembler.add("global_info", global_info, priority=2, prefix="global relations in project: ")
+    assembler.add("prev_info", prev_info, priority=0, keep="tail",
+                  prefix="it is last part of documentation that you have write before ")
+    assembler.add("neighbour_info", neighbour_info, priority=1,
+                  prefix="parts of the project that are documented separately next to this one: ")
+    assembler.add("part", part, role="user", required=True)
+    return assembler
+
+def get_part_prompt(part: str, project_settings: ProjectSettings, prev_info: str | None = None, language: str = "en",
+                    global_info: str | None = None, neighbour_info: str | None = None) -> list[dict[str, str]]:
+    return get_part_assembler(part, project_settings, prev_info, language, global_info, neighbour_info).assemble()
+
+def get_budgeted_part_prompt(model: Model | AsyncModel, part: str, project_settings: ProjectSettings, prev_info: str | None = None,
+                             language: str = "en", global_info: str | None = None, neighbour_info: str | None = None,
+                             prompt_budget: int = 0) -> list[dict[str, str]]:
+    """Fits the part prompt into the input budget of the model and logs where its tokens go."""
+    token_counter = model.token_counter
+    assembler = get_part_assembler(part, project_settings, prev_info, language, global_info, neighbour_info, token_counter)
+    max_tokens = get_prompt_budget(token_counter.context_window, model.sampling_params, prompt_budget)
+    prompt = assembler.assemble(max_tokens)
+    assembler.log_shares(max_tokens)
+    return prompt
+
+def clean_part_answer(answer: str) -> str:
     logger = BaseLogger()
-    logger.log(InfoLog("Generating documentation for a part..."))
-    prompt = [
-            {
-                "role": "system",
-                "content": f"For the following task use language {language}"
-            },
-            {
-                "role": "system",
-                "content": f"global project info: {project_settings.prompt}"
-            },
-            {
-                "role": "system",
-                "content": BASE_PART_COMPLITE_TEXT
-            }
-    ]
-
-    if global_info is not None:
-        prompt.append({
-            "role": "system",
-            "content": f"global relations in project: {global_info}"
-        })
-
-    if prev_info is not None:
-        prompt.append({
-                "role": "system",
-                "content": f"it is last part of documentation that you have write before {prev_info}"
-            })
-
-    prompt.append({
-                "role": "user",
-                "content": part
-            })
-    
-    answer: str = model.get_answer_without_history(prompt=prompt)
     temp_answer = answer.removeprefix("```")
     logger.log(InfoLog("Documentation for part generated. total length: " + str(len(answer))))
     logger.log(InfoLog(f"Part Documentation: {answer}", level=2))
@@ -87,8 +73,88 @@ def write_docs_by_parts(part: str, model: Model, project_settings: ProjectSettin
     answer = temp_answer.removesuffix("```")
     return answer
 
-def gen_doc_parts(full_code_mix, max_symbols, model: Model, project_settings: ProjectSettings,  language, progress_bar: BaseProgress, global_info = None):
-    splited_data = split_data(full_code_mix, max_symbols)
+def get_part_cache_key(part: str, project_settings: ProjectSettings, language: str, global_info: str | None, model_name: str | None) -> str:
+    """prev_info and neighbour_info are left out of the key, they only give context and change whenever a neighbour changes."""
+    return DocPartCache.make_key(part, get_part_prompt(part, project_settings, None, language, global_info), language, model_name)
+
+def write_docs_by_parts(part: str, model: Model, project_settings: ProjectSettings, 
+                        prev_info: str| None = None, language: str = "en", global_info: str| None = None,
+                        doc_cache: DocPartCache | None = None, on_delta: Callable[[str], None] | None = None,
+                        prompt_budget: int = 0):
+    """
+    With on_delta the answer is streamed: on_delta gets every piece of the raw answer as soon as it arrives.
+    prompt_budget lowers the input budget of the model (its context window minus the room for the answer).
+    """
+    logger = BaseLogger()
+    cache_key = None
+    if doc_cache is not None:
+        cache_key = get_part_cache_key(part, project_settings, language, global_info, model.current_model_name)
+        cached = doc_cache.get(cache_key)
+        if cached is not None:
+            logger.log(InfoLog("Documentation for part taken from cache."))
+            if on_delta is not None:
+                on_delta(cached)
+            return cached
+
+    logger.log(InfoLog("Generating documentation for a part..."))
+    prompt = get_budgeted_part_prompt(model, part, project_settings, prev_info, language, global_info, prompt_budget=prompt_budget)
+
+    answer: str
+    if on_delta is None:
+        answer = model.get_answer_without_history(prompt=prompt, task="document")
+    else:
+        deltas = []
+        for delta in model.stream_answer_without_history(prompt=prompt, task="document"):
+            deltas.append(delta)
+            on_delta(delta)
+        answer = "".join(deltas)
+    answer = clean_part_answer(answer)
+    if cache_key is not None:
+        doc_cache.put(cache_key, answer)
+    return answer
+
+async def async_write_docs_by_parts(part: str, async_model: AsyncModel, project_settings: ProjectSettings, semaphore: asyncio.Semaphore,
+                                    language: str = "en", global_info: str | None = None, neighbour_info: str | None = None,
+                                    doc_cache: DocPartCache | None = None, prompt_budget: int = 0):
+    logger = BaseLogger()
+    cache_key = None
+    if doc_cache is not None:
+        cache_key = get_part_cache_key(part, project_settings, language, global_info, async_model.current_model_name)
+        cached = doc_cache.get(cache_key)
+        if cached is not None:
+            logger.log(InfoLog("Documentation for part taken from cache."))
+            return cached
+
+    async with semaphore:
+        logger.log(InfoLog("Generating documentation for a part..."))
+        prompt = get_budgeted_part_prompt(async_model, part, project_settings, None, language, global_info, neighbour_info,
+                                          prompt_budget)
+        answer: str = await async_model.get_answer_without_history(prompt=prompt, task="document")
+
+    answer = clean_part_answer(answer)
+    if cache_key is not None:
+        doc_cache.put(cache_key, answer)
+    return answer
+
+def describe_chunk(chunk: Chunk | StructuralChunk) -> str:
+    if isinstance(chunk, StructuralChunk):
+        return ", ".join(symbol for symbol in chunk.symbols if not symbol.startswith(STRUCTURE_FILE_NAME)) or "repository structure"
+    return ", ".join(chunk.files) or "repository structure"
+
+def get_neighbour_info(chunks: list[Chunk] | list[StructuralChunk], index: int) -> str:
+    """Replaces the sequential prev_info: tells the model what the previous and next chunks contain."""
+    result = [f"this is part {index + 1} of {len(chunks)}"]
+    if index > 0:
+        result.append(f"previous part covers: {describe_chunk(chunks[index - 1])}")
+    if index + 1 < len(chunks):
+        result.append(f"next part covers: {describe_chunk(chunks[index + 1])}")
+    return "\n".join(result)
+
+def gen_doc_parts(full_code_mix: str | CodeMixFile, max_symbols, model: Model, project_settings: ProjectSettings,  language, progress_bar: BaseProgress, global_info = None,
+                  structural: bool = False, doc_cache: DocPartCache | None = None, on_delta: Callable[[str], None] | None = None,
+                  prompt_budget: int = 0):
+    token_counter = model.token_counter
+    splited_data = [chunk.text for chunk in split_data_to_chunks(full_code_mix, tokens_for_chars(max_symbols), structural, token_counter)]
     result = None
     logger = BaseLogger()
     logger.log(InfoLog("Starting documentation generation by parts..."))
@@ -97,11 +163,14 @@ def gen_doc_parts(full_code_mix, max_symbols, model: Model, project_settings: Pr
     
     all_result = ""
     for i, el in enumerate(splited_data):
-        result = write_docs_by_parts(el, model, project_settings, result, language, global_info=global_info)
+        result = write_docs_by_parts(el, model, project_settings, result, language, global_info=global_info, doc_cache=doc_cache,
+                                     on_delta=on_delta, prompt_budget=prompt_budget)
         all_result += result
         all_result += "\n\n"
+        if on_delta is not None:
+            on_delta("\n\n")
 
-        result = result[len(result) - 3000:]
+        result = token_counter.tail(result, PREV_INFO_TAIL_TOKENS)
         progress_bar.update_task()
     
     progress_bar.remove_subtask()
@@ -109,3 +178,33 @@ def gen_doc_parts(full_code_mix, max_symbols, model: Model, project_settings: Pr
                        Total documentation length: {len(all_result)}"""))
     logger.log(InfoLog(f"Documentation: {all_result}", level=2))
     return all_result
+
+async def async_gen_doc_parts(full_code_mix: str | CodeMixFile, max_symbols, async_model: AsyncModel, project_settings: ProjectSettings, language,
+                              progress_bar: BaseProgress, global_info = None, structural: bool = False, max_concurrency: int = 4,
+                              doc_cache: DocPartCache | None = None, prompt_budget: int = 0):
+    """
+    Concurrent variant of gen_doc_parts: parts do not wait for each other (no prev_info),
+    at most max_concurrency requests are in flight and results keep the chunk order.
+    """
+    chunks = split_data_to_chunks(full_code_mix, tokens_for_chars(max_symbols), structural, async_model.token_counter)
+    logger = BaseLogger()
+    logger.log(InfoLog(f"Starting concurrent documentation generation by parts (max concurrency {max_concurrency})..."))
+
+    progress_bar.create_new_subtask(f"Generete doc parts", total_len=len(chunks))
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run_part(index: int) -> str:
+        result = await async_write_docs_by_parts(chunks[index].text, async_model, project_settings, semaphore, language,
+                                                 global_info=global_info, neighbour_info=get_neighbour_info(chunks, index),
+                                                 doc_cache=doc_cache, prompt_budget=prompt_budget)
+        progress_bar.update_task()
+        return result
+
+    results = await asyncio.gather(*[run_part(i) for i in range(len(chunks))])
+
+    progress_bar.remove_subtask()
+    all_result = "".join(result + "\n\n" for result in results)
+    logger.log(InfoLog(f"""Documentation generation by parts completed.\n
+                       Total documentation length: {len(all_result)}"""))
+    logger.log(InfoLog(f"Documentation: {all_result}", level=2))
+    return all_result
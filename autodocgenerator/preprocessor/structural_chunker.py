@@ -0,0 +1,181 @@
+import ast
+import hashlib
+import re
+from typing import Iterator
+from .chunker import Chunker, estimate_tokens
+from .code_mix_file import CodeMixFile, FileRecord, RAW_RECORD_PATH, iter_records, read_structure
+from ..engine.tokenizer import TokenCounter
+
+STRUCTURE_FILE_NAME = "<structure>"
+MODULE_SYMBOL = "<module>"
+SYMBOL_PATTERN = re.compile(
+    r"^(?:export\s+)?(?:default\s+)?(?:public\s+|private\s+|protected\s+|static\s+|async\s+|abstract\s+)*"
+    r"(?:class|def|function|fn|func|interface|struct|enum|trait|impl|type|const|let|var|module)\s+([A-Za-z_$][\w$]*)"
+)
+BLOCK_CLOSERS = ("}", ")", "]", "end")
+
+
+class CodeUnit:
+    def __init__(self, file_path: str, symbol: str, text: str, token_counter: TokenCounter | None = None):
+        self.file_path = file_path
+        self.symbol = symbol
+        self.text = text
+        count = estimate_tokens if token_counter is None else token_counter.count
+        self.tokens = count(text) + count(f'<file path="{file_path}">\n\n</file>\n')
+
+    @property
+    def id(self) -> str:
+        return f"{self.file_path}::{self.symbol}"
+
+
+class StructuralChunk:
+    def __init__(self):
+        self.units: list[CodeUnit] = []
+        self.tokens = 0
+
+    def add(self, unit: CodeUnit):
+        self.units.append(unit)
+        self.tokens += unit.tokens
+
+    @property
+    def id(self) -> str:
+        """Stable id built from file and symbol names, it only changes when the chunk composition changes."""
+        if len(self.units) == 1:
+            return self.units[0].id
+        return f"{self.units[0].id}..{self.units[-1].id}"
+
+    @property
+    def files(self) -> list[str]:
+        return list(dict.fromkeys(unit.file_path for unit in self.units))
+
+    @property
+    def symbols(self) -> list[str]:
+        return [unit.id for unit in self.units]
+
+    @property
+    def text(self) -> str:
+        result = []
+        for i, unit in enumerate(self.units):
+            if unit.file_path in (STRUCTURE_FILE_NAME, RAW_RECORD_PATH):
+                result.append(unit.text + "\n")
+                continue
+
+            if i == 0 or self.units[i - 1].file_path != unit.file_path:
+                result.append(f'<file path="{unit.file_path}">\n')
+            else:
+                result.append("\n")
+            result.append(unit.text)
+            if i == len(self.units) - 1 or self.units[i + 1].file_path != unit.file_path:
+                result.append("\n</file>\n")
+        return "".join(result)
+
+
+def _unique_symbol(symbol: str, used: dict[str, int]) -> str:
+    used[symbol] = used.get(symbol, 0) + 1
+    return symbol if used[symbol] == 1 else f"{symbol}#{used[symbol]}"
+
+
+def _python_starts(content: str) -> list[tuple[int, str]] | None:
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return None
+
+    lines = content.split("\n")
+    starts: list[tuple[int, str]] = []
+    for node in tree.body:
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            continue
+
+        start = min([node.lineno] + [decorator.lineno for decorator in node.decorator_list]) - 1
+        while start > 0 and lines[start - 1].lstrip().startswith("#"):
+            start -= 1
+        starts.append((start, node.name))
+
+    return starts
+
+
+def _heuristic_starts(content: str) -> list[tuple[int, str]]:
+    starts: list[tuple[int, str]] = []
+    previous_blank = True
+    for i, line in enumerate(content.split("\n")):
+        stripped = line.strip()
+        if not stripped:
+            previous_blank = True
+            continue
+
+        is_top_level = not line[0].isspace()
+        if previous_blank and is_top_level and not stripped.startswith(BLOCK_CLOSERS):
+            match = SYMBOL_PATTERN.match(stripped)
+            symbol = match.group(1) if match else f"block:{hashlib.sha1(stripped.encode('utf-8')).hexdigest()[:8]}"
+            starts.append((i, symbol))
+        previous_blank = False
+
+    return starts
+
+
+def split_record(record: FileRecord, token_counter: TokenCounter | None = None) -> list[CodeUnit]:
+    """Splits one file into top level definitions, using ast for Python and indentation/blank lines otherwise."""
+    starts = _python_starts(record.content) if record.path.endswith(".py") else None
+    if starts is None:
+        starts = _heuristic_starts(record.content)
+
+    lines = record.content.split("\n")
+    if not starts or starts[0][0] > 0:
+        starts.insert(0, (0, MODULE_SYMBOL))
+
+    used: dict[str, int] = {}
+    units = []
+    for i, (start, symbol) in enumerate(starts):
+        end = starts[i + 1][0] if i + 1 < len(starts) else len(lines)
+        if end > start:
+            units.append(CodeUnit(record.path, _unique_symbol(symbol, used), "\n".join(lines[start:end]), token_counter))
+
+    return units
+
+
+class StructuralChunker:
+    """
+    Packs whole top level definitions (classes, functions, blocks) into chunks of at most
+    max_tokens estimated tokens. Definitions larger than the budget are split on line boundaries.
+    """
+
+    def __init__(self, max_tokens: int, token_counter: TokenCounter | None = None):
+        self.max_tokens = max(1, max_tokens)
+        self.token_counter = token_counter
+        self.line_chunker = Chunker(self.max_tokens, token_counter)
+
+    def _iter_units(self, data: str | CodeMixFile) -> Iterator[CodeUnit]:
+        structure = data.read_structure() if isinstance(data, CodeMixFile) else read_structure(data)
+        records = data.iter_records() if isinstance(data, CodeMixFile) else iter_records(data)
+
+        if structure:
+            yield CodeUnit(STRUCTURE_FILE_NAME, MODULE_SYMBOL, structure, self.token_counter)
+
+        raw_symbols: dict[str, int] = {}
+        for record in records:
+            if record.path == RAW_RECORD_PATH:
+                units = [CodeUnit(RAW_RECORD_PATH, _unique_symbol(MODULE_SYMBOL, raw_symbols), record.content, self.token_counter)]
+            else:
+                units = split_record(record, self.token_counter)
+            for unit in units:
+                if unit.tokens <= self.max_tokens:
+                    yield unit
+                    continue
+
+                for i, (piece, _) in enumerate(self.line_chunker.split_by_lines(unit.text)):
+                    yield CodeUnit(unit.file_path, f"{unit.symbol}#part{i + 1}", piece.removesuffix("\n"), self.token_counter)
+
+    def iter_chunks(self, data: str | CodeMixFile) -> Iterator[StructuralChunk]:
+        current = StructuralChunk()
+        for unit in self._iter_units(data):
+            if current.units and current.tokens + unit.tokens > self.max_tokens:
+                yield current
+                current = StructuralChunk()
+            current.add(unit)
+
+        if current.units:
+            yield current
+
+    def split(self, data: str | CodeMixFile) -> list[StructuralChunk]:
+        return list(self.iter_chunks(data))
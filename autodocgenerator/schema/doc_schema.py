@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 import random
-from ..postprocessor.embedding import Embedding
+from ..postprocessor.embedding import Embedding, AsyncEmbedding
 from typing import Any
 
 class DocContent(BaseModel):
@@ -10,6 +10,9 @@ class DocContent(BaseModel):
     def init_embedding(self, embedding_model: Embedding):
         self.embedding_vector = embedding_model.get_vector(self.content)
 
+    async def async_init_embedding(self, embedding_model: AsyncEmbedding):
+        self.embedding_vector = await embedding_model.get_vector(self.content)
+
 class DocHeadSchema(BaseModel):
     content_orders: list[str] = []
     parts: dict[str, DocContent] = {}
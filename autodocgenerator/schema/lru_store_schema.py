@@ -0,0 +1,5 @@
+from pydantic import BaseModel, Field
+
+
+class LRUStoreSchema(BaseModel):
+    entries: dict[str, str] = Field(default_factory=dict)
@@ -0,0 +1,11 @@
+from pydantic import BaseModel, Field
+
+
+class MerkleNodeSchema(BaseModel):
+    children: list[str] = Field(default_factory=list)
+    summaries: dict[int, str] = Field(default_factory=dict)
+
+
+class MerkleTreeSchema(BaseModel):
+    root: str = ""
+    nodes: dict[str, MerkleNodeSchema] = Field(default_factory=dict)
@@ -0,0 +1,11 @@
+from pydantic import BaseModel, Field
+
+
+class FileSnapshotSchema(BaseModel):
+    size: int
+    mtime_ns: int
+    hash: str
+
+
+class SnapshotManifestSchema(BaseModel):
+    files: dict[str, FileSnapshotSchema] = Field(default_factory=dict)
@@ -0,0 +1,85 @@
+import os
+import random
+import sys
+import tempfile
+import time
+
+from autodocgenerator.preprocessor.chunker import Chunker
+from autodocgenerator.preprocessor.code_mix_file import CodeMixFile
+
+
+def legacy_split_data(data: str, max_symbols: int) -> list[str]:
+    """Previous split_data implementation, kept here as the baseline (including its bugs)."""
+    split_objects: list[str] = []
+    splited_by_files = data.split("</file>")
+
+    while True:
+        have_to_change = False
+        for i, el in enumerate(splited_by_files):
+            if len(el) > max_symbols * 1.5:
+                splited_by_files.insert(i+1, el[i][int(max_symbols / 2):])
+                splited_by_files[i] = el[i][:int(max_symbols / 2)]
+                have_to_change = True
+
+        if have_to_change == False:
+            break
+
+    curr_index = 0
+    for el in splited_by_files:
+        if len(split_objects) - 1 < curr_index:
+            split_objects.append("")
+
+        if len(split_objects[curr_index]) + len(el) > max_symbols * 1.25:
+            curr_index += 1
+            split_objects.append(el)
+            continue
+
+        split_objects[curr_index] += "\n" + el
+
+    return split_objects
+
+
+def make_code_mix(target_bytes: int, rnd: random.Random, max_file_lines: int = 400) -> str:
+    parts = ["Repository Structure:", "src/", "\n" + "="*20 + "\n"]
+    size = 0
+    i = 0
+    while size < target_bytes:
+        lines = [f"def func_{i}_{j}(x):" + " " * rnd.randint(0, 8) + "return x * " + str(j) * rnd.randint(1, 200)
+                 for j in range(rnd.randint(1, max_file_lines))]
+        body = "\n".join(lines)
+        parts.append(f'<file path="src/module_{i}.py">')
+        parts.append(body)
+        parts.append("</file>\n")
+        size += len(body)
+        i += 1
+    return "\n".join(parts)
+
+
+def run(target_mb: int = 50, max_symbols: int = 5000) -> None:
+    rnd = random.Random(1)
+    data = make_code_mix(target_mb * 1024 * 1024, rnd, max_file_lines=120)
+    print(f"code mix size: {len(data) / 1024 / 1024:.1f} MB")
+
+    start = time.perf_counter()
+    legacy = legacy_split_data(data, max_symbols)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    chunks = Chunker(max_symbols // 4).split(data)
+    current_time = time.perf_counter() - start
+
+    file_path = os.path.join(tempfile.mkdtemp(prefix="adg_chunker_bench_"), "code_mix.txt")
+    with open(file_path, "w", encoding="utf-8", newline="") as file:
+        file.write(data)
+    start = time.perf_counter()
+    file_chunks = sum(1 for _ in Chunker(max_symbols // 4).iter_chunks(CodeMixFile(file_path)))
+    file_time = time.perf_counter() - start
+    os.remove(file_path)
+
+    print(f"legacy split_data:  {legacy_time:.3f}s, {len(legacy)} parts, {sum(map(len, legacy)) / 1024 / 1024:.1f} MB kept")
+    print(f"chunker (str):      {current_time:.3f}s, {len(chunks)} chunks, {sum(len(c.text) for c in chunks) / 1024 / 1024:.1f} MB kept")
+    print(f"chunker (mmap):     {file_time:.3f}s, {file_chunks} chunks")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+from autodocgenerator.engine.models.gpt_model import GPT4oModel, AsyncGPT4oModel
+from autodocgenerator.engine.models.hedging import HedgedModel, AsyncHedgedModel, HedgeStats
+from autodocgenerator.engine.models.scheduler import RequestScheduler, SchedulerSettings
+from benchmarks.scheduler_benchmark import FakeLLMEndpoint
+
+
+def run_sync(model, requests: int) -> list[float]:
+    latencies = []
+    for i in range(requests):
+        start = time.perf_counter()
+        model.get_answer_without_history([{"role": "user", "content": f"request {i}"}])
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def run_async(model, requests: int) -> list[float]:
+    latencies = []
+    for i in range(requests):
+        start = time.perf_counter()
+        await model.get_answer_without_history([{"role": "user", "content": f"request {i}"}])
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def format_latencies(latencies: list[float]) -> str:
+    ordered = sorted(latencies)
+    p50 = ordered[len(ordered) // 2]
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return f"total {sum(ordered):6.2f}s, p50 {p50:.2f}s, p99 {p99:.2f}s"
+
+
+def run(requests: int = 150) -> None:
+    """Sequential requests against an endpoint where 5% of the answers take 2 seconds."""
+    api_keys = [f"fake-key-{i}" for i in range(3)]
+    settings = SchedulerSettings()
+    settings.key_requests_per_minute = 0
+    for is_async in (False, True):
+        for hedged in (False, True):
+            RequestScheduler().set_settings(settings)
+            endpoint = FakeLLMEndpoint(requests_per_window=1000, latency=(0.05, 0.1), slow_probability=0.05).start()
+            model_class = AsyncGPT4oModel if is_async else GPT4oModel
+            model = model_class(api_keys, models_list=["fake/model-a", "fake/model-b"], use_random=False, base_url=endpoint.base_url)
+            stats = HedgeStats()
+            if hedged:
+                model = (AsyncHedgedModel if is_async else HedgedModel)(model, stats, percentile=90, min_samples=20)
+
+            latencies = asyncio.run(run_async(model, requests)) if is_async else run_sync(model, requests)
+            endpoint.stop()
+
+            name = f"{'async' if is_async else 'sync'} {'hedged' if hedged else 'plain'}"
+            print(f"{name:14} {format_latencies(latencies)}" + (f"; {stats.format()}" if hedged else ""))
+
+
+if __name__ == "__main__":
+    run()
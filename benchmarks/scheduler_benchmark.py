@@ -0,0 +1,196 @@
+import asyncio
+import json
+import random
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from autodocgenerator.engine.models.gpt_model import AsyncGPT4oModel
+from autodocgenerator.engine.models.scheduler import RequestScheduler, SchedulerSettings
+
+
+class FakeLLMEndpoint:
+    """
+    OpenAI compatible /chat/completions endpoint on localhost. Every api key may send requests_per_window
+    requests per window seconds (429 with Retry-After above that), on top of that 429s and 500s are injected
+    at random and every answer is delayed by latency seconds (slow_latency seconds with slow_probability, a heavy tail).
+    Answers are answer_words words long, one word per token: a smaller max_tokens cuts them with finish reason "length".
+    Point a model at it with base_url=endpoint.base_url
+    (or MODELS_BASE_URL for run_file). Streamed requests get the answer as server sent events.
+    """
+
+    def __init__(self, requests_per_window: int = 10, window: float = 2.0, latency: tuple[float, float] = (0.05, 0.2),
+                 rate_limit_probability: float = 0.0, error_probability: float = 0.0, seed: int = 0,
+                 slow_probability: float = 0.0, slow_latency: float = 2.0, answer_words: int = 0):
+        self.requests_per_window = requests_per_window
+        self.window = window
+        self.latency = latency
+        self.rate_limit_probability = rate_limit_probability
+        self.error_probability = error_probability
+        self.slow_probability = slow_probability
+        self.slow_latency = slow_latency
+        self.answer_words = answer_words
+        self.max_tokens: list[int | None] = []
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.history: dict[str, deque] = {}
+        self.counts = {200: 0, 429: 0, 500: 0}
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self.server.daemon_threads = True
+        self.server.handle_error = self.handle_error
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}/v1"
+
+    def start(self) -> "FakeLLMEndpoint":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def handle_error(self, request, client_address):
+        """Clients that cancel a request (a lost hedge) close the connection, that is not an error here."""
+        error = sys.exc_info()[1]
+        if not isinstance(error, (BrokenPipeError, ConnectionResetError)):
+            ThreadingHTTPServer.handle_error(self.server, request, client_address)
+
+    def get_latency(self) -> float:
+        if self.random.random() < self.slow_probability:
+            return self.slow_latency
+        return self.random.uniform(*self.latency)
+
+    def get_answer(self, body: dict) -> tuple[str, str]:
+        """Answer text of the request and its finish reason."""
+        words = f"answer to {len(body.get('messages', []))} messages".split(" ") + ["word"] * self.answer_words
+        max_tokens = body.get("max_tokens")
+        with self.lock:
+            self.max_tokens.append(max_tokens)
+        if max_tokens is not None and len(words) > max_tokens:
+            return " ".join(words[:max_tokens]), "length"
+        return " ".join(words), "stop"
+
+    def decide(self, api_key: str) -> tuple[int, float | None]:
+        """Returns the status code of the next answer for the key and its Retry-After."""
+        with self.lock:
+            now = time.monotonic()
+            history = self.history.setdefault(api_key, deque())
+            while history and history[0] <= now - self.window:
+                history.popleft()
+
+            if len(history) >= self.requests_per_window:
+                status = 429, history[0] + self.window - now
+            elif self.random.random() < self.rate_limit_probability:
+                status = 429, 1.0
+            elif self.random.random() < self.error_probability:
+                status = 500, None
+            else:
+                history.append(now)
+                status = 200, None
+
+            self.counts[status[0]] += 1
+            return status
+
+    def _make_handler(self):
+        endpoint = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                api_key = (self.headers.get("Authorization") or self.headers.get("api-key") or "").removeprefix("Bearer ")
+                time.sleep(endpoint.get_latency())
+
+                status, retry_after = endpoint.decide(api_key)
+                content, finish_reason = endpoint.get_answer(body)
+                if status == 200 and body.get("stream"):
+                    self.send_stream(body, content)
+                    return
+                if status == 200:
+                    answer = {
+                        "id": "fake", "object": "chat.completion", "created": int(time.time()), "model": body.get("model", ""),
+                        "choices": [{"index": 0, "finish_reason": finish_reason,
+                                     "message": {"role": "assistant", "content": content}}],
+                        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+                    }
+                else:
+                    answer = {"error": {"message": "rate limited" if status == 429 else "server error", "code": status}}
+
+                data = json.dumps(answer).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                if retry_after is not None:
+                    self.send_header("Retry-After", f"{retry_after:.3f}")
+                self.end_headers()
+                self.wfile.write(data)
+
+            def send_stream(self, body: dict, content: str):
+                """Server sent events in chunked encoding, one word per delta."""
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for word in [el + " " for el in content.split(" ")] + [None]:
+                    delta = {"role": "assistant", "content": word} if word is not None else {}
+                    chunk = {"id": "fake", "object": "chat.completion.chunk", "created": int(time.time()), "model": body.get("model", ""),
+                             "choices": [{"index": 0, "delta": delta, "finish_reason": None if word is not None else "stop"}]}
+                    self.write_chunk(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    time.sleep(endpoint.random.uniform(*endpoint.latency) / 10)
+                self.write_chunk(b"data: [DONE]\n\n")
+                self.write_chunk(b"")
+
+            def write_chunk(self, data: bytes):
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+async def run_requests(base_url: str, api_keys: list[str], requests: int, max_concurrency: int) -> float:
+    model = AsyncGPT4oModel(api_keys, models_list=["fake/model-a", "fake/model-b"], use_random=False, base_url=base_url)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            await model.get_answer_without_history([{"role": "user", "content": f"request {i}"}])
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one(i) for i in range(requests)])
+    return time.perf_counter() - start
+
+
+def run(requests: int = 120, keys: int = 3, max_concurrency: int = 16) -> None:
+    api_keys = [f"fake-key-{i}" for i in range(keys)]
+    for enabled in (False, True):
+        endpoint = FakeLLMEndpoint(requests_per_window=10, window=2.0, rate_limit_probability=0.02,
+                                   error_probability=0.02).start()
+        settings = SchedulerSettings()
+        settings.enabled = enabled
+        settings.key_requests_per_minute = endpoint.requests_per_window * 60 / endpoint.window
+        settings.backoff_base = 0.2
+        RequestScheduler().set_settings(settings)
+
+        elapsed = asyncio.run(run_requests(endpoint.base_url, api_keys, requests, max_concurrency))
+        endpoint.stop()
+
+        name = "scheduler" if enabled else "immediate retry"
+        print(f"{name:16} {elapsed:6.2f}s, answers {endpoint.counts[200]}, 429s {endpoint.counts[429]}, "
+              f"500s {endpoint.counts[500]}; {RequestScheduler().stats.format()}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        endpoint = FakeLLMEndpoint(rate_limit_probability=0.05, error_probability=0.05).start()
+        print(f"fake endpoint on {endpoint.base_url}")
+        threading.Event().wait()
+    else:
+        run()
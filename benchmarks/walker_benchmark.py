@@ -0,0 +1,103 @@
+import fnmatch
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from autodocgenerator.preprocessor.code_mix import CodeMix, ignore_list
+
+
+def legacy_should_ignore(cm: CodeMix, path: Path) -> bool:
+    relative_path = path.relative_to(cm.root_dir)
+    path_str = str(relative_path)
+
+    for pattern in cm.ignore_patterns:
+        if fnmatch.fnmatch(path_str, pattern) or \
+           fnmatch.fnmatch(os.path.basename(path_str), pattern) or \
+           any(fnmatch.fnmatch(p, pattern) for p in relative_path.parts):
+            return True
+    return False
+
+
+def legacy_build_repo_content(cm: CodeMix) -> str:
+    """Previous rglob and fnmatch based implementation, kept here as the baseline."""
+    content = []
+    content.append("Repository Structure:")
+
+    for path in sorted(cm.root_dir.rglob("*")):
+        if legacy_should_ignore(cm, path):
+            continue
+
+        depth = len(path.relative_to(cm.root_dir).parts)
+        indent = "  " * (depth - 1)
+        name = f"{path.name}/" if path.is_dir() else path.name
+        content.append(f"{indent}{name}")
+
+    content.append("\n" + "="*20 + "\n")
+
+    for path in sorted(cm.root_dir.rglob("*")):
+        if path.is_file() and not legacy_should_ignore(cm, path):
+            try:
+                relative_path = path.relative_to(cm.root_dir)
+                content.append(f'<file path="{relative_path}">')
+                content.append(path.read_text(encoding="utf-8", errors="ignore"))
+                content.append("</file>\n")
+            except Exception as e:
+                content.append(f"Error reading {path}: {e}")
+
+    return "\n".join(content)
+
+
+def make_synthetic_tree(root: str, file_count: int, source_share: float = 0.1) -> None:
+    """
+    Builds a monorepo-like tree: a small share of source files and the rest
+    hidden inside directories that are ignored (.git, venv, node_modules).
+    """
+    source_files = int(file_count * source_share)
+    ignored_dirs = [".git/objects", "venv/lib/site-packages", "node_modules"]
+    per_dir = 200
+
+    def fill(base: str, count: int, ext: str, body: str):
+        for i in range(count):
+            dir_path = os.path.join(root, base, f"pkg_{i // per_dir}")
+            if i % per_dir == 0:
+                os.makedirs(dir_path, exist_ok=True)
+            with open(os.path.join(dir_path, f"file_{i}{ext}"), "w", encoding="utf-8") as file:
+                file.write(body)
+
+    fill("src", source_files, ".py", "def f():\n    return 1\n")
+    rest = file_count - source_files
+    for i, base in enumerate(ignored_dirs):
+        share = rest // len(ignored_dirs) + (1 if i < rest % len(ignored_dirs) else 0)
+        fill(base, share, ".js", "module.exports = 1;\n")
+
+
+def run(file_count: int = 100_000) -> None:
+    root = tempfile.mkdtemp(prefix="adg_walker_bench_")
+    try:
+        print(f"Creating synthetic tree with {file_count} files in {root} ...")
+        make_synthetic_tree(root, file_count)
+
+        patterns = ignore_list + ["node_modules"]
+        cm = CodeMix(root, patterns)
+
+        start = time.perf_counter()
+        legacy = legacy_build_repo_content(cm)
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        current = cm.build_repo_content()
+        current_time = time.perf_counter() - start
+
+        print(f"rglob (legacy):   {legacy_time:.3f}s")
+        print(f"scandir walker:   {current_time:.3f}s")
+        print(f"speedup:          {legacy_time / current_time:.1f}x")
+        print(f"identical output: {legacy == current}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
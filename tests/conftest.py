@@ -0,0 +1,22 @@
+import pytest
+
+from autodocgenerator.engine.models.budget import OutputBudgetController, OutputBudgetSettings
+from autodocgenerator.engine.models.scheduler import RequestScheduler, SchedulerSettings
+
+
+@pytest.fixture
+def output_budget():
+    settings = OutputBudgetSettings()
+    settings.enabled = True
+    OutputBudgetController().set_settings(settings)
+    yield OutputBudgetController()
+    OutputBudgetController().set_settings(OutputBudgetSettings())
+
+
+@pytest.fixture(autouse=True)
+def scheduler():
+    settings = SchedulerSettings()
+    settings.enabled = False
+    RequestScheduler().set_settings(settings)
+    yield RequestScheduler()
+    RequestScheduler().set_settings(SchedulerSettings())
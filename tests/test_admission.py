@@ -0,0 +1,32 @@
+import pytest
+
+from autodocgenerator.preprocessor.admission import AdmissionPolicy, AdmissionSettings, FileRejected
+
+
+def check(text: str) -> list[tuple[str, str]]:
+    policy = AdmissionPolicy(AdmissionSettings())
+    try:
+        policy.check_text("file", text)
+    except FileRejected:
+        pass
+    return policy.skipped
+
+
+@pytest.mark.parametrize("text", [
+    "// Code generated by protoc-gen-go. DO NOT EDIT.\npackage api\n",
+    "#!/usr/bin/env python\n# -*- coding: utf-8 -*-\n# This file is automatically generated\nimport os\n",
+    '"""\nAuto-generated by the schema tool.\n"""\nimport os\n',
+    "/*\n * @generated\n */\nexport const a = 1;\n",
+    "<?xml version=\"1.0\"?>\n<!-- autogenerated, do not edit -->\n<root/>\n",
+])
+def test_markers_in_the_header_reject_the_file(text):
+    assert [reason for _, reason in check(text)][0].startswith("generated file header")
+
+
+@pytest.mark.parametrize("text", [
+    "import os\n\n# do not edit the list below by hand, run make gen\nNAMES = []\n",
+    'def render():\n    """Writes an autogenerated notice into the output."""\n    return "@generated"\n',
+    "# Helpers for the report\n\nHEADER = 'code generated by the report tool'\n",
+])
+def test_markers_after_the_header_are_ignored(text):
+    assert check(text) == []
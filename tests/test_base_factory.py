@@ -0,0 +1,33 @@
+import asyncio
+import warnings
+
+from autodocgenerator.engine.models.model import AsyncModel
+from autodocgenerator.factory.base_factory import BaseModule, DocFactory
+from autodocgenerator.ui.progress_base import BaseProgress
+
+
+class EchoAsyncModel(AsyncModel):
+    async def _complete(self, messages, model_name, params=None):
+        await asyncio.sleep(0)
+        return f"<a name=\"part\"></a>\n{messages[-1]['content']}"
+
+
+class SyncOnlyModule(BaseModule):
+    def generate(self, info: dict, model):
+        return model.get_answer_without_history([{"role": "user", "content": info["text"]}])
+
+
+def test_async_fallback_gives_generate_a_sync_model():
+    model = EchoAsyncModel(["key"], models_list=["model"], use_random=False)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning)
+        result = asyncio.run(SyncOnlyModule().async_generate({"text": "hello"}, model))
+    assert isinstance(result, str)
+    assert result.endswith("hello")
+
+
+def test_async_factory_runs_sync_only_modules():
+    model = EchoAsyncModel(["key"], models_list=["model"], use_random=False)
+    factory = DocFactory(SyncOnlyModule(), SyncOnlyModule(), with_splited=False)
+    doc = asyncio.run(factory.async_generate_doc({"text": "hello"}, model, BaseProgress()))
+    assert [el.content for el in doc.parts.values()] == [f"<a name=\"part\"></a>\nhello"] * 2
@@ -0,0 +1,44 @@
+from autodocgenerator.engine.models.cached_model import ResponseCache, CachedModel
+from autodocgenerator.engine.models.model import Model
+
+PROMPT = [{"role": "user", "content": "document this file"}]
+
+
+class BudgetEchoModel(Model):
+    sampling_params = {"temperature": 0.3, "max_tokens": 16384}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.requests = 0
+
+    def _complete(self, messages, model_name, params=None):
+        self.requests += 1
+        return f"answer within {(params or {}).get('max_tokens')} tokens"
+
+
+def make_model(tmp_path) -> tuple[BudgetEchoModel, CachedModel]:
+    model = BudgetEchoModel(["key"], models_list=["model"], use_random=False)
+    return model, CachedModel(model, ResponseCache(str(tmp_path / ResponseCache.FILE_NAME)))
+
+
+def test_same_budget_is_answered_from_cache(tmp_path, output_budget):
+    model, cached = make_model(tmp_path)
+    first = cached.get_answer_without_history(PROMPT, task="document")
+    assert cached.get_answer_without_history(PROMPT, task="document") == first
+    assert model.requests == 1
+
+
+def test_larger_budget_is_not_answered_by_a_smaller_one(tmp_path, output_budget):
+    model, cached = make_model(tmp_path)
+    small = cached.get_answer_without_history(PROMPT, task="document")
+
+    output_budget.settings.budgets = {**output_budget.settings.budgets, "document": [4096, 1.0]}
+    large = cached.get_answer_without_history(PROMPT, task="document")
+    assert large != small
+    assert model.requests == 2
+
+
+def test_budget_key_does_not_count_requests(tmp_path, output_budget):
+    _, cached = make_model(tmp_path)
+    ResponseCache.make_key(PROMPT, cached, "document")
+    assert output_budget.stats.requests == 0
@@ -0,0 +1,66 @@
+import random
+
+import pytest
+
+from autodocgenerator.engine.tokenizer import HeuristicTokenCounter
+from autodocgenerator.preprocessor.chunker import Chunker
+from autodocgenerator.preprocessor.code_mix_file import CodeMixFile
+
+WORDS = ["return", "x", "é", "данные", "数据", "🙂", "ß", "\t", "  "]
+
+
+def make_code_mix(rnd: random.Random, files: int) -> str:
+    parts = ["Repository Structure:", "src/", "\n" + "=" * 20 + "\n"]
+    for i in range(files):
+        lines = [f"def func_{i}_{j}(x):  " + " ".join(rnd.choices(WORDS, k=rnd.randint(0, 120)))
+                 for j in range(rnd.randint(1, 60))]
+        parts.append(f'<file path="src/module_{i}.py">')
+        parts.append("\n".join(lines))
+        parts.append("</file>\n")
+    data = "\n".join(parts)
+    if rnd.random() < 0.2:
+        data += "tail without closing tag " * rnd.randint(0, 50)
+    return data
+
+
+def check_chunks(chunks, data: str, max_tokens: int, token_counter=None):
+    assert "".join(chunk.text for chunk in chunks) == data
+    assert all(chunk.tokens <= max_tokens for chunk in chunks)
+    if token_counter is not None:
+        assert all(token_counter.count(chunk.text) <= max_tokens for chunk in chunks)
+
+    offset = 0
+    for chunk in chunks:
+        assert chunk.byte_range[0] == offset
+        offset = chunk.byte_range[1]
+    assert offset == len(data.encode("utf-8"))
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_chunks_rebuild_the_input_within_budget(seed):
+    rnd = random.Random(seed)
+    data = make_code_mix(rnd, rnd.randint(0, 20))
+    max_tokens = rnd.randint(1, 3000)
+    check_chunks(Chunker(max_tokens).split(data), data, max_tokens)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_heuristic_token_counter_budget(seed):
+    rnd = random.Random(seed)
+    data = make_code_mix(rnd, rnd.randint(1, 20))
+    max_tokens = rnd.randint(1, 1000)
+    token_counter = HeuristicTokenCounter()
+    check_chunks(Chunker(max_tokens, token_counter).split(data), data, max_tokens, token_counter)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_code_mix_file_gives_the_same_chunks(tmp_path, seed):
+    rnd = random.Random(seed)
+    data = make_code_mix(rnd, rnd.randint(1, 20))
+    max_tokens = rnd.randint(1, 1000)
+    file_path = tmp_path / "code_mix.txt"
+    file_path.write_text(data, encoding="utf-8", newline="")
+
+    file_chunks = Chunker(max_tokens).split(CodeMixFile(str(file_path)))
+    check_chunks(file_chunks, data, max_tokens)
+    assert [el.text for el in file_chunks] == [el.text for el in Chunker(max_tokens).split(data)]
@@ -0,0 +1,103 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from autodocgenerator.engine.models.client_pool import ClientPool, close_async_clients_after
+from autodocgenerator.engine.models.gpt_model import GPT4oModel
+from autodocgenerator.engine.models.model import Model, AsyncModel
+
+
+class FakeAsyncClient:
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class PooledModel(Model):
+    pool_provider = "fake"
+
+    def _create_client(self):
+        return ClientPool().get(self._get_pool_provider(self.pool_provider), self.api_keys[self.current_key_index], object)
+
+    def _complete(self, messages, model_name, params=None):
+        assert self.client is self.client
+        return "answer"
+
+
+class AsyncPooledModel(AsyncModel):
+    pool_provider = "fake"
+
+    def _create_client(self):
+        return ClientPool().get_async(self._get_pool_provider(self.pool_provider), self.api_keys[self.current_key_index],
+                                      FakeAsyncClient)
+
+    async def _complete(self, messages, model_name, params=None):
+        assert self.client is self.client
+        return "answer"
+
+
+@pytest.fixture
+def pool():
+    pool = ClientPool()
+    pool._init_pool()
+    yield pool
+    pool._init_pool()
+
+
+def test_resource_of_an_ended_loop_is_closed_when_replaced(pool):
+    async def get_session():
+        session = pool.get_async_shared("aiohttp:test", aiohttp.ClientSession)
+        await asyncio.sleep(0)
+        return session
+
+    first = asyncio.run(get_session())
+    second = asyncio.run(close_async_clients_after(get_session()))
+    assert second is not first
+    assert first.closed
+    assert second.closed
+
+
+def test_async_clients_are_closed_before_the_loop_ends(pool):
+    async def run():
+        session = pool.get_async_shared("aiohttp:test", aiohttp.ClientSession)
+        client = pool.get_async("test", "key", FakeAsyncClient)
+        return session, client
+
+    session, client = asyncio.run(close_async_clients_after(run()))
+    assert session.closed
+    assert client.closed
+    assert not pool._async_clients and not pool._async_shared
+
+
+def test_client_reuses_are_counted_per_request(pool):
+    model = PooledModel(["key-1", "key-2"], models_list=["model"], use_random=False)
+    for _ in range(3):
+        model.get_answer_without_history([{"role": "user", "content": "hello"}])
+
+    stats = pool.get_stats("fake")
+    assert (stats.requests, stats.clients_created, stats.client_reuses) == (3, 1, 2)
+    assert "connections" not in stats.format()
+
+
+def test_async_client_reuses_are_counted_per_loop(pool):
+    model = AsyncPooledModel(["key"], models_list=["model"], use_random=False)
+
+    async def run():
+        for _ in range(3):
+            await model.get_answer_without_history([{"role": "user", "content": "hello"}])
+
+    asyncio.run(close_async_clients_after(run()))
+    asyncio.run(close_async_clients_after(run()))
+    stats = pool.get_stats("fake")
+    assert (stats.requests, stats.clients_created, stats.client_reuses) == (6, 2, 4)
+
+
+def test_connections_and_requests_share_the_provider_key(pool):
+    model = GPT4oModel(["key"], use_random=False, base_url="http://localhost:1/v1")
+    assert model.client is model.client
+    model._count_request("key")
+    assert list(pool.stats) == ["github_models@http://localhost:1/v1"]
+    assert pool.stats["github_models@http://localhost:1/v1"].traced
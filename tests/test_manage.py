@@ -0,0 +1,22 @@
+from autodocgenerator.config.config import Config, ProjectBuildConfig
+from autodocgenerator.engine.models.cached_model import AsyncCachedModel
+from autodocgenerator.engine.models.model import AsyncModel
+from autodocgenerator.manage import AsyncManager
+from autodocgenerator.postprocessor.embedding import AsyncEmbedding
+
+
+class EchoAsyncModel(AsyncModel):
+    async def _complete(self, messages, model_name, params=None):
+        return messages[-1]["content"]
+
+
+def test_async_manager_wraps_its_model_once(tmp_path):
+    pbc = ProjectBuildConfig()
+    pbc.load_settings({"use_response_cache": True, "hedge_requests": True})
+    config = Config().set_pcs(pbc)
+    model = EchoAsyncModel(["key-1", "key-2"], models_list=["model"], use_random=False)
+
+    manager = AsyncManager(str(tmp_path), config, model, AsyncEmbedding("key"))
+
+    assert isinstance(manager.llm_model, AsyncCachedModel)
+    assert manager.async_llm_model is manager.llm_model
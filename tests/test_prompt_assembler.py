@@ -0,0 +1,17 @@
+from autodocgenerator.engine.models.budget import DEFAULT_MAX_OUTPUT_TOKENS
+from autodocgenerator.preprocessor.prompt_assembler import get_prompt_budget
+
+
+def test_output_room_is_capped_to_a_share_of_the_window():
+    assert get_prompt_budget(8192, {"max_tokens": 16384}) == 6144
+    assert get_prompt_budget(8192, {}) == 6144
+
+
+def test_small_output_keeps_the_rest_of_the_window():
+    assert get_prompt_budget(128_000, {"max_tokens": 4096}) == 128_000 - 4096
+    assert get_prompt_budget(128_000, {}) == 128_000 - DEFAULT_MAX_OUTPUT_TOKENS
+
+
+def test_prompt_token_budget_lowers_the_budget():
+    assert get_prompt_budget(8192, {"max_tokens": 16384}, 2000) == 2000
+    assert get_prompt_budget(8192, {"max_tokens": 1000}, 100_000) == 7192
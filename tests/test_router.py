@@ -0,0 +1,74 @@
+import asyncio
+
+from autodocgenerator.engine.models.model import Model, AsyncModel
+from autodocgenerator.engine.models.router import ModelRouter, RoutingSettings, RoutedModel, AsyncRoutedModel
+
+PROMPT = [{"role": "user", "content": "is this change important?"}]
+
+
+class RecordingModel(Model):
+    sampling_params = {"temperature": 0.3, "max_tokens": 16384}
+    sent: list[tuple[str, dict]] = []
+
+    def _complete(self, messages, model_name, params=None):
+        RecordingModel.sent.append((model_name, params or {}))
+        return "true|false"
+
+
+class AsyncRecordingModel(AsyncModel):
+    sampling_params = {"temperature": 0.3, "max_tokens": 16384}
+    sent: list[tuple[str, dict]] = []
+
+    async def _complete(self, messages, model_name, params=None):
+        AsyncRecordingModel.sent.append((model_name, params or {}))
+        return "true|false"
+
+
+def get_settings() -> RoutingSettings:
+    settings = RoutingSettings()
+    settings.load_settings({"enabled": True, "tiers": {"cheap": ["small"], "big": ["large"]},
+                            "tasks": {"classify": "cheap", "intro": "big"}})
+    return settings
+
+
+def test_routed_answer_keeps_budget_params(output_budget):
+    RecordingModel.sent = []
+    model = RecordingModel(["key"], models_list=["default"], use_random=False)
+    direct = model.get_answer_without_history(PROMPT, task="classify")
+    routed = RoutedModel(model, ModelRouter(get_settings(), model))
+    assert routed.get_answer_without_history(PROMPT, task="classify") == direct
+
+    (_, direct_params), (routed_model, routed_params) = RecordingModel.sent
+    assert direct_params == {"stop": ["\n\n"], "max_tokens": 64}
+    assert routed_model == "small"
+    assert routed_params == direct_params
+
+
+def test_routed_stream_keeps_stop_sequences(output_budget):
+    RecordingModel.sent = []
+    model = RecordingModel(["key"], models_list=["default"], use_random=False)
+    routed = RoutedModel(model, ModelRouter(get_settings(), model))
+    assert "".join(routed.stream_answer_without_history(PROMPT, task="classify")) == "true|false"
+    assert RecordingModel.sent == [("small", {"stop": ["\n\n"]})]
+
+
+def test_async_routed_answer_keeps_budget_params(output_budget):
+    AsyncRecordingModel.sent = []
+    model = AsyncRecordingModel(["key"], models_list=["default"], use_random=False)
+    routed = AsyncRoutedModel(model, ModelRouter(get_settings(), model))
+
+    async def run():
+        await routed.get_answer_without_history(PROMPT, task="classify")
+        return "".join([delta async for delta in routed.stream_answer_without_history(PROMPT, task="intro")])
+
+    assert asyncio.run(run()) == "true|false"
+    assert AsyncRecordingModel.sent == [("small", {"stop": ["\n\n"], "max_tokens": 64}), ("large", {})]
+
+
+def test_unrouted_task_uses_default_model(output_budget):
+    RecordingModel.sent = []
+    model = RecordingModel(["key"], models_list=["default"], use_random=False)
+    routed = RoutedModel(model, ModelRouter(get_settings(), model))
+    routed.get_answer_without_history(PROMPT, task="order")
+    assert RecordingModel.sent[0][0] == "default"
+    assert RecordingModel.sent[0][1]["stop"] == ["\n\n"]
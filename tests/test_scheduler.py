@@ -0,0 +1,23 @@
+import time
+
+from autodocgenerator.engine.models.scheduler import RequestScheduler, SchedulerSettings
+
+
+def test_default_settings_do_not_throttle():
+    scheduler = RequestScheduler()
+    scheduler.set_settings(SchedulerSettings())
+    start = time.monotonic()
+    waits = [scheduler.acquire(["key"], ["model"], 0, 0)[0] for _ in range(100)]
+    assert max(waits) == 0
+    assert time.monotonic() - start < 1
+
+
+def test_key_rate_limit_is_opt_in():
+    settings = SchedulerSettings()
+    settings.key_requests_per_minute = 60
+    settings.key_burst = 5
+    scheduler = RequestScheduler()
+    scheduler.set_settings(settings)
+    waits = [scheduler.acquire(["key"], ["model"], 0, 0)[0] for _ in range(6)]
+    assert waits[:5] == [0, 0, 0, 0, 0]
+    assert waits[5] > 0
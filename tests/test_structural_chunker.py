@@ -0,0 +1,60 @@
+import pytest
+
+from autodocgenerator.preprocessor.code_mix import CodeMix
+from autodocgenerator.preprocessor.code_mix_file import CodeMixFile, RAW_RECORD_PATH, iter_records
+from autodocgenerator.preprocessor.structural_chunker import StructuralChunker
+
+FILES = {
+    "parser.py": (
+        'FILE_END_TAG = "</file>"\n'
+        "\n\n"
+        "class Parser:\n"
+        "    def header(self, path):\n"
+        "        return f'<file path=\"{path}\">'\n"
+        "\n\n"
+        "def close():\n"
+        '    return """\n'
+        "</file>\n"
+        '"""\n'
+    ),
+    "notes.md": "# Format\n\n<file path=\"example.py\">\nprint(1)\n</file>\n\nThe end.\n",
+    "util.js": "export function last() {\n  return 1;\n}\n",
+}
+
+
+@pytest.fixture
+def code_mix(tmp_path):
+    for name, text in FILES.items():
+        (tmp_path / name).write_text(text, encoding="utf-8")
+    return CodeMix(str(tmp_path), []).build_repo_content()
+
+
+def joined_lines(chunks) -> set[str]:
+    return set("".join(chunk.text for chunk in chunks).split("\n"))
+
+
+@pytest.mark.parametrize("max_tokens", [10, 50, 10_000])
+def test_structural_chunks_keep_every_line(code_mix, max_tokens):
+    lines = joined_lines(StructuralChunker(max_tokens).split(code_mix))
+    assert [el for el in code_mix.split("\n") if el not in lines] == []
+
+
+def test_records_end_at_the_closing_line_written_by_code_mix(code_mix):
+    records = {record.path: record.content for record in iter_records(code_mix)}
+    assert records == FILES
+
+
+def test_code_mix_file_gives_the_same_units(code_mix, tmp_path):
+    file_path = tmp_path / "code_mix.txt"
+    file_path.write_text(code_mix, encoding="utf-8", newline="")
+    from_file = StructuralChunker(50).split(CodeMixFile(str(file_path)))
+    assert [el.symbols for el in from_file] == [el.symbols for el in StructuralChunker(50).split(code_mix)]
+    assert all("\n" not in symbol for el in from_file for symbol in el.symbols)
+
+
+def test_text_outside_of_records_is_kept_as_raw_unit(code_mix):
+    data = code_mix + "text after the last file\n"
+    chunks = StructuralChunker(10_000).split(data)
+    assert [unit.text for chunk in chunks for unit in chunk.units if unit.file_path == RAW_RECORD_PATH] == \
+        ["text after the last file\n"]
+    assert "text after the last file" in joined_lines(chunks)